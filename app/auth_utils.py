@@ -2,9 +2,11 @@ from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, Header, status
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import cfg as c
-from app.db import SessionLocal
+from app.db import AsyncSessionLocal, SessionLocal, async_read_session, read_session
 from app import models
 
 # CHANGE #10: Admin credentials (in production, use environment variables)
@@ -24,6 +26,27 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Request session whose reads go to the read replica (analytics views)."""
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """AsyncSession dependency for the async read endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """AsyncSession whose reads go to the read replica."""
+    async with async_read_session() as db:
+        yield db
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None,
@@ -35,11 +58,7 @@ def create_access_token(
     return encoded_jwt
 
 
-def get_current_user(
-    authorization: str | None = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db),
-) -> models.Users:
-    
+def _user_hash_from_token(authorization: str | None) -> str:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,11 +82,10 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    user = (
-        db.query(models.Users)
-        .filter(models.Users.user_hash == user_hash)
-        .first()
-    )
+    return user_hash
+
+
+def _check_user(user: models.Users | None) -> models.Users:
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,6 +94,31 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    authorization: str | None = Header(None, alias="Authorization"),
+    db: Session = Depends(get_db),
+) -> models.Users:
+    user_hash = _user_hash_from_token(authorization)
+    user = (
+        db.query(models.Users)
+        .filter(models.Users.user_hash == user_hash)
+        .first()
+    )
+    return _check_user(user)
+
+
+async def get_current_user_async(
+    authorization: str | None = Header(None, alias="Authorization"),
+    db: AsyncSession = Depends(get_async_db),
+) -> models.Users:
+    """get_current_user for async handlers (shares the request's AsyncSession)."""
+    user_hash = _user_hash_from_token(authorization)
+    user = (
+        await db.execute(select(models.Users).where(models.Users.user_hash == user_hash))
+    ).scalars().first()
+    return _check_user(user)
+
+
 # =============================================================================
 # THERAPIST AUTHENTICATION UTILITIES (New)
 # =============================================================================
@@ -99,14 +142,7 @@ def create_therapist_access_token(
     return encoded_jwt
 
 
-def get_current_therapist(
-    authorization: str | None = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db),
-) -> models.Therapists:
-    """
-    Dependency to get current authenticated therapist from JWT token.
-    Similar to get_current_user but for therapists.
-    """
+def _therapist_hash_from_token(authorization: str | None) -> str:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -141,13 +177,10 @@ def get_current_therapist(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    
-    therapist = (
-        db.query(models.Therapists)
-        .filter(models.Therapists.therapist_hash == therapist_hash)
-        .first()
-    )
-    
+    return therapist_hash
+
+
+def _check_therapist(therapist: models.Therapists | None) -> models.Therapists:
     if not therapist:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -163,6 +196,35 @@ def get_current_therapist(
     return therapist
 
 
+def get_current_therapist(
+    authorization: str | None = Header(None, alias="Authorization"),
+    db: Session = Depends(get_db),
+) -> models.Therapists:
+    """
+    Dependency to get current authenticated therapist from JWT token.
+    Similar to get_current_user but for therapists.
+    """
+    therapist_hash = _therapist_hash_from_token(authorization)
+    therapist = (
+        db.query(models.Therapists)
+        .filter(models.Therapists.therapist_hash == therapist_hash)
+        .first()
+    )
+    return _check_therapist(therapist)
+
+
+async def get_current_therapist_async(
+    authorization: str | None = Header(None, alias="Authorization"),
+    db: AsyncSession = Depends(get_async_db),
+) -> models.Therapists:
+    """get_current_therapist for async handlers."""
+    therapist_hash = _therapist_hash_from_token(authorization)
+    therapist = (
+        await db.execute(select(models.Therapists).where(models.Therapists.therapist_hash == therapist_hash))
+    ).scalars().first()
+    return _check_therapist(therapist)
+
+
 def verify_therapist_patient_access(
     therapist: models.Therapists,
     patient_user_id: int,
@@ -1,8 +1,252 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
+import threading
 
 DB_URL = os.getenv("DB_URL", "sqlite:///./app/journey.db")
-engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# =============================================================================
+# ENGINE PROFILE
+# =============================================================================
+# REWIRE_SQLITE_PROFILE=wal (default) puts file databases in WAL mode with the
+# pragmas below, so readers never block on writers; "legacy" keeps SQLite's
+# defaults (rollback journal, synchronous=FULL).
+SQLITE_PROFILE = os.getenv("REWIRE_SQLITE_PROFILE", "wal").lower()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("REWIRE_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_MB = int(os.getenv("REWIRE_SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.getenv("REWIRE_SQLITE_CACHE_MB", "64"))
+# Serialize write transactions in-process instead of letting writers race for
+# SQLite's lock (and time out with "database is locked").
+SQLITE_WRITE_QUEUE = os.getenv("REWIRE_SQLITE_WRITE_QUEUE", "0").lower() in ("1", "true", "yes", "on")
+
+DB_POOL_SIZE = int(os.getenv("REWIRE_DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("REWIRE_DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("REWIRE_DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("REWIRE_DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes", "on")
+DB_POOL_RECYCLE = int(os.getenv("REWIRE_DB_POOL_RECYCLE", "1800"))
+# Per-statement timeout on server databases (0 = none); analytics on the
+# replica may be given a longer one.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("REWIRE_DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_REPLICA_STATEMENT_TIMEOUT_MS = int(
+    os.getenv("REWIRE_DB_REPLICA_STATEMENT_TIMEOUT_MS", str(DB_STATEMENT_TIMEOUT_MS))
+)
+
+# Optional read replica for analytics reads (read_session()); unset = primary
+DB_REPLICA_URL = os.getenv("DB_REPLICA_URL", "")
+
+# Async driver URLs for the async read endpoints (AsyncSessionLocal); by
+# default derived from DB_URL / DB_REPLICA_URL (aiosqlite, asyncpg).
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL", "")
+ASYNC_DB_REPLICA_URL = os.getenv("ASYNC_DB_REPLICA_URL", "")
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+_write_lock = threading.Lock()
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") != "sqlite:"
+
+
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _acquire_write_lock(conn, cursor, statement, parameters, context, executemany):
+    """Take the process-wide writer lock before a connection's first write."""
+    if conn.info.get("holds_write_lock"):
+        return
+    if not statement.lstrip().upper().startswith(_WRITE_PREFIXES):
+        return
+    # A thread that already holds the lock on another connection would wait
+    # forever; after the busy timeout fall back to SQLite's own locking.
+    if _write_lock.acquire(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000):
+        conn.info["holds_write_lock"] = True
+    else:
+        print("[db] Write queue wait timed out; continuing without it")
+
+
+def _release_write_lock(conn, *args):
+    # The engine's commit/rollback events fire before the DBAPI call, so the
+    # lock is handed back when the next transaction begins or the connection
+    # returns to the pool, both after SQLite has released its own lock.
+    if conn.info.pop("holds_write_lock", False):
+        _write_lock.release()
+
+
+def _release_on_checkin(dbapi_conn, connection_record):
+    if connection_record.info.pop("holds_write_lock", False):
+        _write_lock.release()
+
+
+def _create_engine(url: str, statement_timeout_ms: int = 0, write_queue: bool = False):
+    """
+    Engine for one database URL.
+
+    Server databases (Postgres, ...) get a sized, pre-pinged pool and a
+    per-statement timeout; file SQLite gets the profile pragmas above.
+    """
+    if not url.startswith("sqlite"):
+        connect_args = {}
+        if statement_timeout_ms and url.startswith("postgresql"):
+            connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+        return create_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if not _is_file_sqlite(url):
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    eng = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if SQLITE_PROFILE == "wal":
+        event.listen(eng, "connect", _set_sqlite_pragmas)
+    if write_queue:
+        event.listen(eng, "before_cursor_execute", _acquire_write_lock)
+        event.listen(eng, "begin", _release_write_lock)
+        event.listen(eng, "checkin", _release_on_checkin)
+    return eng
+
+
+# =============================================================================
+# READ-REPLICA ROUTING
+# =============================================================================
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs to the read replica when opened with
+    info={"read_replica": True} (see read_session()).
+
+    Flushes, DML and raw text statements always go to the primary, and once a
+    session has written it reads from the primary too, so it sees its own
+    writes. Without DB_REPLICA_URL both engines are the same.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.info.get("read_replica") or self.info.get("wrote"):
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or clause is None or not getattr(clause, "is_select", False):
+            self.info["wrote"] = True
+            return super().get_bind(mapper, clause=clause, **kw)
+        return self._replica_bind()
+
+    def _replica_bind(self):
+        return replica_engine
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pass_select_clause(state):
+    # ORM-enabled UNIONs reach get_bind() without their clause; pass it so
+    # they are routed as reads like any other SELECT
+    if state.is_select:
+        state.bind_arguments.setdefault("clause", state.statement)
+
+
+engine = _create_engine(DB_URL, DB_STATEMENT_TIMEOUT_MS, write_queue=SQLITE_WRITE_QUEUE)
+replica_engine = (
+    _create_engine(DB_REPLICA_URL, DB_REPLICA_STATEMENT_TIMEOUT_MS) if DB_REPLICA_URL else engine
+)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+def read_session() -> Session:
+    """A SessionLocal session whose reads go to the replica (analytics, exports)."""
+    return SessionLocal(info={"read_replica": True})
+
+
+# =============================================================================
+# ASYNC SESSIONS
+# =============================================================================
+# The hottest read endpoints are `async def` handlers on AsyncSessionLocal, so
+# a request waiting on the database holds no threadpool thread. Their ORM
+# code runs through AsyncSession.run_sync(), which drives the same sync
+# Session API over the async driver. The in-process write queue does not
+# apply to these engines.
+
+
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2:", "postgresql+psycopg:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg:" + url[len(prefix):]
+    return url
+
+
+def _create_async_engine(url: str, statement_timeout_ms: int = 0):
+    """Async counterpart of _create_engine (same pool sizing and pragmas)."""
+    if not url.startswith("sqlite"):
+        connect_args = {}
+        if statement_timeout_ms and url.startswith("postgresql+asyncpg"):
+            connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+        return create_async_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if not _is_file_sqlite(url):
+        return create_async_engine(url)
+
+    # aiosqlite defaults to NullPool (a new connection and thread per checkout)
+    eng = create_async_engine(
+        url,
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if SQLITE_PROFILE == "wal":
+        event.listen(eng.sync_engine, "connect", _set_sqlite_pragmas)
+    return eng
+
+
+class AsyncRoutingSession(RoutingSession):
+    """RoutingSession for AsyncSessionLocal: replica reads go to the async replica engine."""
+
+    def _replica_bind(self):
+        return async_replica_engine.sync_engine
+
+
+async_engine = _create_async_engine(ASYNC_DB_URL or _async_url(DB_URL), DB_STATEMENT_TIMEOUT_MS)
+async_replica_engine = (
+    _create_async_engine(ASYNC_DB_REPLICA_URL or _async_url(DB_REPLICA_URL), DB_REPLICA_STATEMENT_TIMEOUT_MS)
+    if DB_REPLICA_URL
+    else async_engine
+)
+# expire_on_commit=False: attribute access after commit must not lazy-load
+# outside run_sync()
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+)
+
+
+def async_read_session() -> AsyncSession:
+    """An AsyncSessionLocal session whose reads go to the replica."""
+    return AsyncSessionLocal(info={"read_replica": True})
@@ -11,10 +11,8 @@ except Exception:
     pass
 try:
     from app.db import engine
-    from app.models import Base
 except Exception:
     engine = None
-    Base = None
 app = FastAPI(
     title="ReWire Beta Backend",
     version="0.1.0",
@@ -36,454 +34,27 @@ app.mount("/public", StaticFiles(directory=str(c.out_dir_path)), name="public")
 assets_path = Path(__file__).parent / "assets"
 if assets_path.exists():
     app.mount("/assets", StaticFiles(directory=str(assets_path)), name="assets")
-if Base is not None and engine is not None:
-    try:
-        Base.metadata.create_all(bind=engine)
-    except Exception:
-        pass
 
 
 # =============================================================================
-# AUTO-MIGRATION: Database migrations on startup
+# AUTO-MIGRATION: versioned schema migrations (see app/migrations.py)
 # =============================================================================
-def run_migrations():
-    """Run database migrations on startup."""
-    if engine is None:
-        return
-    try:
-        from sqlalchemy import text
-        with engine.connect() as conn:
-            # -----------------------------------------------------------------
-            # Migration 1: Add user_hash column to activities table
-            # -----------------------------------------------------------------
-            result = conn.execute(text("PRAGMA table_info(activities)"))
-            columns = [row[1] for row in result.fetchall()]
-            
-            if 'user_hash' not in columns:
-                conn.execute(text("ALTER TABLE activities ADD COLUMN user_hash TEXT"))
-                conn.commit()
-                print("[migration] Added user_hash column to activities table")
-            
-            # Check if index exists
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='index' AND name='ix_activities_user_hash'"))
-            if not result.fetchone():
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_activities_user_hash ON activities (user_hash)"))
-                conn.commit()
-                print("[migration] Created index ix_activities_user_hash")
-            
-            # Add action_intention column if missing
-            if 'action_intention' not in columns:
-                conn.execute(text("ALTER TABLE activities ADD COLUMN action_intention TEXT"))
-                conn.commit()
-                print("[migration] Added action_intention column to activities table")
-            
-            # Add source_type column if missing
-            if 'source_type' not in columns:
-                conn.execute(text("ALTER TABLE activities ADD COLUMN source_type TEXT"))
-                conn.commit()
-                print("[migration] Added source_type column to activities table")
-            
-            # Add video_session_id column if missing
-            if 'video_session_id' not in columns:
-                conn.execute(text("ALTER TABLE activities ADD COLUMN video_session_id TEXT"))
-                conn.commit()
-                print("[migration] Added video_session_id column to activities table")
-            
-            # -----------------------------------------------------------------
-            # Migration 1b: BACKFILL user_hash for existing activities
-            # This fixes Issue #4: Existing users can't see their activities
-            # because activities have user_hash=NULL
-            # -----------------------------------------------------------------
-            try:
-                # Count activities with NULL user_hash
-                result = conn.execute(text(
-                    "SELECT COUNT(*) FROM activities WHERE user_hash IS NULL"
-                ))
-                null_count = result.fetchone()[0]
-                
-                if null_count > 0:
-                    print(f"[migration] Found {null_count} activities with NULL user_hash, attempting backfill...")
-                    
-                    # Backfill from ActivitySessions (which has user_hash and activity_id)
-                    conn.execute(text("""
-                        UPDATE activities
-                        SET user_hash = (
-                            SELECT activity_sessions.user_hash 
-                            FROM activity_sessions 
-                            WHERE activity_sessions.activity_id = activities.id 
-                            AND activity_sessions.user_hash IS NOT NULL
-                            LIMIT 1
-                        )
-                        WHERE activities.user_hash IS NULL
-                        AND EXISTS (
-                            SELECT 1 FROM activity_sessions 
-                            WHERE activity_sessions.activity_id = activities.id
-                            AND activity_sessions.user_hash IS NOT NULL
-                        )
-                    """))
-                    conn.commit()
-                    
-                    # Check how many were updated
-                    result = conn.execute(text(
-                        "SELECT COUNT(*) FROM activities WHERE user_hash IS NULL"
-                    ))
-                    remaining_null = result.fetchone()[0]
-                    updated_count = null_count - remaining_null
-                    
-                    print(f"[migration] Backfilled user_hash for {updated_count} activities")
-                    if remaining_null > 0:
-                        print(f"[migration] {remaining_null} activities still have NULL user_hash (no ActivitySession link)")
-            except Exception as backfill_err:
-                print(f"[migration] Backfill error (non-fatal): {backfill_err}")
-            
-            # -----------------------------------------------------------------
-            # Migration 2: Add deleted_at column to users table (Soft Delete)
-            # -----------------------------------------------------------------
-            result = conn.execute(text("PRAGMA table_info(users)"))
-            user_columns = [row[1] for row in result.fetchall()]
-            
-            if 'deleted_at' not in user_columns:
-                conn.execute(text("ALTER TABLE users ADD COLUMN deleted_at DATETIME"))
-                conn.commit()
-                print("[migration] Added deleted_at column to users table")
-            
-            # Check if index exists for deleted_at
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='index' AND name='ix_users_deleted_at'"))
-            if not result.fetchone():
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_deleted_at ON users (deleted_at)"))
-                conn.commit()
-                print("[migration] Created index ix_users_deleted_at")
-            
-            # Add ml_questionnaire_complete column if missing
-            if 'ml_questionnaire_complete' not in user_columns:
-                conn.execute(text("ALTER TABLE users ADD COLUMN ml_questionnaire_complete BOOLEAN DEFAULT 0"))
-                conn.commit()
-                print("[migration] Added ml_questionnaire_complete column to users table")
-            
-            # -----------------------------------------------------------------
-            # Migration 3: Create/Fix ML Questionnaire Responses table
-            # The model expects individual columns for each question, NOT generic rows
-            # -----------------------------------------------------------------
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='ml_questionnaire_responses'"
-            ))
-            table_exists = result.fetchone() is not None
-            
-            needs_recreate = False
-            if table_exists:
-                # Check if table has the CORRECT schema (individual question columns)
-                result = conn.execute(text("PRAGMA table_info(ml_questionnaire_responses)"))
-                existing_cols = [row[1] for row in result.fetchall()]
-                # If it has the old wrong schema (question_code), we need to recreate
-                if 'question_code' in existing_cols or 'dpes_1' not in existing_cols:
-                    needs_recreate = True
-                    print("[migration] ml_questionnaire_responses has wrong schema, will recreate")
-            
-            if not table_exists or needs_recreate:
-                # Drop old table if exists (it had wrong schema)
-                if needs_recreate:
-                    conn.execute(text("DROP TABLE IF EXISTS ml_questionnaire_responses"))
-                    conn.commit()
-                    print("[migration] Dropped old ml_questionnaire_responses table")
-                
-                # Create with CORRECT schema matching MLQuestionnaireResponse model
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS ml_questionnaire_responses (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_hash TEXT NOT NULL,
-                        dpes_1 INTEGER,
-                        dpes_4 INTEGER,
-                        dpes_29 INTEGER,
-                        neo_ffi_10 INTEGER,
-                        neo_ffi_14 INTEGER,
-                        neo_ffi_16 INTEGER,
-                        neo_ffi_45 INTEGER,
-                        neo_ffi_46 INTEGER,
-                        kamf_4_1 INTEGER,
-                        age TEXT,
-                        gender TEXT,
-                        ethnicity TEXT,
-                        education TEXT,
-                        depression_status TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        updated_at DATETIME
-                    )
-                """))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_ml_questionnaire_responses_user_hash ON ml_questionnaire_responses (user_hash)"))
-                conn.commit()
-                print("[migration] Created ml_questionnaire_responses table with correct schema")
-            
-            # -----------------------------------------------------------------
-            # Migration 4: Create/Fix Stimuli Suggestions table
-            # -----------------------------------------------------------------
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='stimuli_suggestions'"
-            ))
-            table_exists = result.fetchone() is not None
-            
-            if not table_exists:
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS stimuli_suggestions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_hash TEXT NOT NULL,
-                        stimulus_rank INTEGER NOT NULL,
-                        stimulus_name TEXT NOT NULL,
-                        stimulus_url TEXT NOT NULL,
-                        stimulus_description TEXT,
-                        score REAL,
-                        questionnaire_id INTEGER,
-                        was_shown BOOLEAN DEFAULT 0,
-                        was_watched BOOLEAN DEFAULT 0,
-                        was_completed BOOLEAN DEFAULT 0,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_stimuli_suggestions_user_hash ON stimuli_suggestions (user_hash)"))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_stimuli_suggestions_rank ON stimuli_suggestions (user_hash, stimulus_rank)"))
-                conn.commit()
-                print("[migration] Created stimuli_suggestions table")
-            else:
-                # Add missing columns to existing table
-                result = conn.execute(text("PRAGMA table_info(stimuli_suggestions)"))
-                stim_cols = [row[1] for row in result.fetchall()]
-                
-                if 'questionnaire_id' not in stim_cols:
-                    conn.execute(text("ALTER TABLE stimuli_suggestions ADD COLUMN questionnaire_id INTEGER"))
-                    conn.commit()
-                    print("[migration] Added questionnaire_id column to stimuli_suggestions")
-                
-                if 'was_shown' not in stim_cols:
-                    conn.execute(text("ALTER TABLE stimuli_suggestions ADD COLUMN was_shown BOOLEAN DEFAULT 0"))
-                    conn.commit()
-                    print("[migration] Added was_shown column to stimuli_suggestions")
-                
-                if 'was_watched' not in stim_cols:
-                    conn.execute(text("ALTER TABLE stimuli_suggestions ADD COLUMN was_watched BOOLEAN DEFAULT 0"))
-                    conn.commit()
-                    print("[migration] Added was_watched column to stimuli_suggestions")
-                
-                if 'was_completed' not in stim_cols:
-                    conn.execute(text("ALTER TABLE stimuli_suggestions ADD COLUMN was_completed BOOLEAN DEFAULT 0"))
-                    conn.commit()
-                    print("[migration] Added was_completed column to stimuli_suggestions")
-            
-            # -----------------------------------------------------------------
-            # Migration 5: Create chills_timestamps table
-            # -----------------------------------------------------------------
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='chills_timestamps'"
-            ))
-            if not result.fetchone():
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS chills_timestamps (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT NOT NULL,
-                        video_time_seconds REAL NOT NULL,
-                        video_name TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chills_timestamps_session_id ON chills_timestamps (session_id)"))
-                conn.commit()
-                print("[migration] Created chills_timestamps table")
-            
-            # -----------------------------------------------------------------
-            # Migration 5b: Add video_name column to chills_timestamps table
-            # NEW: Store which video the user was watching when they felt chills
-            # -----------------------------------------------------------------
-            result = conn.execute(text("PRAGMA table_info(chills_timestamps)"))
-            chills_cols = [row[1] for row in result.fetchall()]
-            
-            if 'video_name' not in chills_cols:
-                conn.execute(text("ALTER TABLE chills_timestamps ADD COLUMN video_name TEXT"))
-                conn.commit()
-                print("[migration] Added video_name column to chills_timestamps table")
-            
-            # Add user_hash column if missing (for better tracking)
-            if 'user_hash' not in chills_cols:
-                conn.execute(text("ALTER TABLE chills_timestamps ADD COLUMN user_hash TEXT"))
-                conn.commit()
-                print("[migration] Added user_hash column to chills_timestamps table")
-            
-            # Add intensity column if missing
-            if 'intensity' not in chills_cols:
-                conn.execute(text("ALTER TABLE chills_timestamps ADD COLUMN intensity INTEGER"))
-                conn.commit()
-                print("[migration] Added intensity column to chills_timestamps table")
-            
-            # -----------------------------------------------------------------
-            # Migration 6: Create body_map_spots table
-            # -----------------------------------------------------------------
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='body_map_spots'"
-            ))
-            if not result.fetchone():
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS body_map_spots (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT NOT NULL,
-                        x_percent REAL NOT NULL,
-                        y_percent REAL NOT NULL,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_body_map_spots_session_id ON body_map_spots (session_id)"))
-                conn.commit()
-                print("[migration] Created body_map_spots table")
-            
-            # -----------------------------------------------------------------
-            # Migration 7: Create/Fix post_video_responses table
-            # -----------------------------------------------------------------
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='post_video_responses'"
-            ))
-            table_exists = result.fetchone() is not None
-            
-            if not table_exists:
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS post_video_responses (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT NOT NULL UNIQUE,
-                        user_hash TEXT,
-                        insights_text TEXT,
-                        value_selected TEXT,
-                        value_custom TEXT,
-                        action_selected TEXT,
-                        action_custom TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_post_video_responses_session_id ON post_video_responses (session_id)"))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_post_video_responses_user_hash ON post_video_responses (user_hash)"))
-                conn.commit()
-                print("[migration] Created post_video_responses table")
-            else:
-                # Add user_hash column if missing
-                result = conn.execute(text("PRAGMA table_info(post_video_responses)"))
-                pvr_cols = [row[1] for row in result.fetchall()]
-                
-                if 'user_hash' not in pvr_cols:
-                    conn.execute(text("ALTER TABLE post_video_responses ADD COLUMN user_hash TEXT"))
-                    conn.commit()
-                    print("[migration] Added user_hash column to post_video_responses")
-            
-            # -----------------------------------------------------------------
-            # Migration 8: Create ml_questionnaires table (if model uses it)
-            # -----------------------------------------------------------------
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='ml_questionnaires'"
-            ))
-            if not result.fetchone():
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS ml_questionnaires (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_hash TEXT NOT NULL,
-                        responses_json TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        updated_at DATETIME
-                    )
-                """))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_ml_questionnaires_user_hash ON ml_questionnaires (user_hash)"))
-                conn.commit()
-                print("[migration] Created ml_questionnaires table")
-            
-            # -----------------------------------------------------------------
-            # Migration 9: Seed video_stimuli table from Stimuli.csv
-            # This ensures VideoSession can be created with valid video_id
-            # -----------------------------------------------------------------
-            try:
-                # First ensure the table exists
-                result = conn.execute(text(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='video_stimuli'"
-                ))
-                if not result.fetchone():
-                    conn.execute(text("""
-                        CREATE TABLE IF NOT EXISTS video_stimuli (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            stimulus_name TEXT NOT NULL,
-                            stimulus_description TEXT,
-                            stimulus_url TEXT NOT NULL,
-                            embed_url TEXT,
-                            thumbnail_url TEXT,
-                            duration_seconds INTEGER,
-                            category TEXT,
-                            tags_json TEXT,
-                            awe_potential REAL,
-                            emotional_valence REAL,
-                            arousal_level REAL,
-                            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """))
-                    conn.commit()
-                    print("[migration] Created video_stimuli table")
-                
-                # Check how many stimuli exist
-                result = conn.execute(text("SELECT COUNT(*) FROM video_stimuli"))
-                existing_count = result.fetchone()[0]
-                
-                if existing_count == 0:
-                    # Load from CSV and seed
-                    import os
-                    import csv
-                    csv_path = os.path.join(os.path.dirname(__file__), "data", "Stimuli.csv")
-                    
-                    if os.path.exists(csv_path):
-                        with open(csv_path, 'r', encoding='utf-8') as f:
-                            reader = csv.DictReader(f)
-                            inserted = 0
-                            for row in reader:
-                                name = row.get('Stimulus name', '').strip()
-                                desc = row.get('Description ', row.get('Description', '')).strip()
-                                url = row.get('URL', '').strip()
-                                
-                                if name and url:
-                                    # Extract video ID for embed/thumbnail URLs
-                                    import re
-                                    video_id = None
-                                    match = re.search(r'youtu\.be/([a-zA-Z0-9_-]{11})', url)
-                                    if match:
-                                        video_id = match.group(1)
-                                    else:
-                                        match = re.search(r'youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})', url)
-                                        if match:
-                                            video_id = match.group(1)
-                                    
-                                    embed_url = f"https://www.youtube.com/embed/{video_id}" if video_id else None
-                                    thumbnail_url = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg" if video_id else None
-                                    
-                                    # Escape single quotes in text
-                                    name_safe = name.replace("'", "''")
-                                    desc_safe = desc.replace("'", "''")
-                                    url_safe = url.replace("'", "''")
-                                    embed_safe = embed_url.replace("'", "''") if embed_url else None
-                                    thumb_safe = thumbnail_url.replace("'", "''") if thumbnail_url else None
-                                    
-                                    conn.execute(text(f"""
-                                        INSERT INTO video_stimuli (stimulus_name, stimulus_description, stimulus_url, embed_url, thumbnail_url)
-                                        VALUES ('{name_safe}', '{desc_safe}', '{url_safe}', '{embed_safe}', '{thumb_safe}')
-                                    """))
-                                    inserted += 1
-                            
-                            conn.commit()
-                            print(f"[migration] Seeded {inserted} stimuli into video_stimuli table")
-                    else:
-                        print(f"[migration] Stimuli.csv not found at {csv_path}")
-                else:
-                    print(f"[migration] video_stimuli already has {existing_count} records, skipping seed")
-                    
-            except Exception as seed_err:
-                print(f"[migration] Error seeding video_stimuli (non-fatal): {seed_err}")
-            
-            print("[migration] All migrations completed successfully")
-            
-    except Exception as e:
-        print(f"[migration] Error running migrations: {e}")
-        import traceback
-        traceback.print_exc()
-
-run_migrations()
+if engine is not None:
+    from app.migrations import run_on_startup
+    run_on_startup(engine)
 # =============================================================================
 
+# Keep user_daily_stats in step with every ORM write (see engagement_rollup),
+# on both the sync sessions and the sessions behind AsyncSessionLocal
+from app.db import AsyncRoutingSession, SessionLocal
+from app.services import engagement_rollup, dashboard_cache, platform_counters
+for _session_factory in (SessionLocal, AsyncRoutingSession):
+    engagement_rollup.install(_session_factory)
+    # Admin /stats totals (see platform_counters)
+    platform_counters.install(_session_factory)
+    # Drop therapist dashboard snapshots when a linked patient writes
+    dashboard_cache.install(_session_factory)
+
 
 from app.routes.health import r as health_r
 from app.routes.journey import r as journey_r
@@ -513,6 +84,44 @@ from app.routes.admin_dashboard import r as admin_dashboard_r
 # ML Video Refactor: Chills tracking routes
 from app.routes.chills import r as chills_r
 
+# Load and warm up the ONNX chills model before the first intake request.
+# Set REWIRE_ML_WARMUP=0 to keep the old lazy load.
+@app.on_event("startup")
+def warm_up_ml_predictor():
+    if os.getenv("REWIRE_ML_WARMUP", "1").lower() in ("0", "false", "no"):
+        return
+    try:
+        from app.services.ml_predictor import get_predictor
+        predictor = get_predictor()
+        print(f"[startup] ML predictor ready: {predictor.diagnostics()}")
+    except Exception as e:
+        print(f"[startup] ML predictor warm-up failed (non-fatal): {e}")
+
+
+@app.on_event("shutdown")
+def flush_journey_events():
+    # Write out buffered /api/journey/event posts before the worker exits
+    from app.services import event_buffer
+    event_buffer.stop()
+    print(f"[shutdown] Journey event buffer flushed: {event_buffer.stats()}")
+
+
+@app.on_event("shutdown")
+def flush_autosaves():
+    # Write drafts the autosave coalescer is still holding
+    from app.services import autosave
+    autosave.stop()
+    print(f"[shutdown] Autosave drafts flushed: {autosave.stats()}")
+
+
+@app.on_event("shutdown")
+async def dispose_async_engines():
+    from app.db import async_engine, async_replica_engine
+    await async_engine.dispose()
+    if async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
+
+
 app.include_router(health_r)
 app.include_router(journey_r)
 app.include_router(feedback_r)
@@ -0,0 +1,372 @@
+"""
+Versioned schema migrations.
+
+Each migration has a version number and runs once, in its own transaction,
+recording itself in the schema_version table. migrate() is called on every
+worker start (app/main.py):
+- Fast path: one SELECT MAX(version); nothing else runs when the schema is
+  current.
+- Slow path: take the migration lock (a flock on "<db file>.migrate.lock"
+  for SQLite, pg_advisory_lock on Postgres), re-check the version, and apply
+  the pending migrations. Workers that start at the same time wait for the
+  lock and then find the schema current.
+
+Migrations are written to be safe on databases that predate this table
+(they probe before altering), so existing deployments simply run them all
+once. Adding a table or column to app/models.py needs a new entry at the end
+of MIGRATIONS (e.g. `_create_tables(conn, models.X.__table__)`); the
+baseline create_all only runs on the slow path.
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations --status   # print current / latest version
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import engagement_rollup
+
+
+MIGRATE_ON_STARTUP = os.getenv("REWIRE_MIGRATE_ON_STARTUP", "1").lower() in ("1", "true", "yes", "on")
+_PG_LOCK_KEY = 72_616_401  # arbitrary, constant across processes
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _columns(conn: Connection, table: str) -> List[str]:
+    return [col["name"] for col in inspect(conn).get_columns(table)]
+
+
+def _has_index(conn: Connection, table: str, name: str) -> bool:
+    return any(ix["name"] == name for ix in inspect(conn).get_indexes(table))
+
+
+def _has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def _add_column(conn: Connection, column, default: Optional[str] = None) -> bool:
+    """ALTER TABLE ... ADD COLUMN for a model column if it is missing."""
+    table = column.table.name
+    if column.name in _columns(conn, table):
+        return False
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+    conn.execute(text(ddl))
+    print(f"[migration] Added {column.name} column to {table} table")
+    return True
+
+
+def _create_index(conn: Connection, table: str, name: str, columns: str) -> None:
+    if not _has_index(conn, table, name):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+        print(f"[migration] Created index {name}")
+
+
+def _create_tables(conn: Connection, *tables) -> None:
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+
+# =============================================================================
+# MIGRATIONS
+# =============================================================================
+
+
+def m001_baseline(conn: Connection) -> None:
+    """Every table and index declared in app/models.py."""
+    models.Base.metadata.create_all(bind=conn)
+
+
+def m002_activities_columns(conn: Connection) -> None:
+    A = models.Activities.__table__.c
+    _add_column(conn, A.user_hash)
+    _create_index(conn, "activities", "ix_activities_user_hash", "user_hash")
+    _add_column(conn, A.action_intention)
+    _add_column(conn, A.source_type)
+    _add_column(conn, A.video_session_id)
+
+
+def m003_backfill_activities_user_hash(conn: Connection) -> None:
+    """Activities created before user_hash existed take it from a linked session."""
+    null_count = conn.execute(text("SELECT COUNT(*) FROM activities WHERE user_hash IS NULL")).scalar() or 0
+    if not null_count:
+        return
+    conn.execute(text("""
+        UPDATE activities
+        SET user_hash = (
+            SELECT activity_sessions.user_hash
+            FROM activity_sessions
+            WHERE activity_sessions.activity_id = activities.id
+            AND activity_sessions.user_hash IS NOT NULL
+            LIMIT 1
+        )
+        WHERE activities.user_hash IS NULL
+        AND EXISTS (
+            SELECT 1 FROM activity_sessions
+            WHERE activity_sessions.activity_id = activities.id
+            AND activity_sessions.user_hash IS NOT NULL
+        )
+    """))
+    remaining = conn.execute(text("SELECT COUNT(*) FROM activities WHERE user_hash IS NULL")).scalar() or 0
+    print(f"[migration] Backfilled user_hash for {null_count - remaining} activities "
+          f"({remaining} have no ActivitySession link)")
+
+
+def m004_users_soft_delete(conn: Connection) -> None:
+    U = models.Users.__table__.c
+    _add_column(conn, U.deleted_at)
+    _create_index(conn, "users", "ix_users_deleted_at", "deleted_at")
+    _add_column(conn, U.ml_questionnaire_complete, default="FALSE")
+
+
+def m005_ml_questionnaire_responses_schema(conn: Connection) -> None:
+    """The table once stored one row per question; the model has one column per question."""
+    cols = _columns(conn, "ml_questionnaire_responses")
+    if "question_code" in cols or "dpes_1" not in cols:
+        conn.execute(text("DROP TABLE IF EXISTS ml_questionnaire_responses"))
+        _create_tables(conn, models.MLQuestionnaireResponse.__table__)
+        print("[migration] Recreated ml_questionnaire_responses with one column per question")
+
+
+def m006_stimuli_suggestions_columns(conn: Connection) -> None:
+    S = models.StimuliSuggestion.__table__.c
+    _add_column(conn, S.questionnaire_id)
+    for col in (S.was_shown, S.was_watched, S.was_completed):
+        _add_column(conn, col, default="FALSE")
+
+
+def m007_chills_timestamps_columns(conn: Connection) -> None:
+    C = models.ChillsTimestamp.__table__.c
+    _add_column(conn, C.video_name)
+    _add_column(conn, C.user_hash)
+    _add_column(conn, C.intensity)
+
+
+def m008_post_video_responses_user_hash(conn: Connection) -> None:
+    _add_column(conn, models.PostVideoResponse.__table__.c.user_hash)
+
+
+def _youtube_id(url: str) -> Optional[str]:
+    match = re.search(r"youtu\.be/([a-zA-Z0-9_-]{11})", url) or re.search(
+        r"youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})", url
+    )
+    return match.group(1) if match else None
+
+
+def m009_seed_video_stimuli(conn: Connection) -> None:
+    """Seed video_stimuli from data/Stimuli.csv (one executemany) if it is empty."""
+    table = models.VideoStimulus.__table__
+    if conn.execute(select(func.count()).select_from(table)).scalar():
+        return
+    csv_path = os.path.join(os.path.dirname(__file__), "data", "Stimuli.csv")
+    if not os.path.exists(csv_path):
+        print(f"[migration] Stimuli.csv not found at {csv_path}")
+        return
+
+    rows = []
+    with open(csv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            name = row.get("Stimulus name", "").strip()
+            desc = row.get("Description ", row.get("Description", "")).strip()
+            url = row.get("URL", "").strip()
+            if not (name and url):
+                continue
+            video_id = _youtube_id(url)
+            rows.append({
+                "stimulus_name": name,
+                "stimulus_description": desc,
+                "stimulus_url": url,
+                "embed_url": f"https://www.youtube.com/embed/{video_id}" if video_id else None,
+                "thumbnail_url": f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg" if video_id else None,
+            })
+    if rows:
+        conn.execute(table.insert(), rows)
+    print(f"[migration] Seeded {len(rows)} stimuli into video_stimuli table")
+
+
+def m010_composite_indexes(conn: Connection) -> None:
+    """Multi-column indexes for the per-user hot queries (see scripts/check_query_plans.py)."""
+    for model in (
+        models.Sessions,
+        models.ActivitySessions,
+        models.JournalEntries,
+        models.PreGeneratedAudio,
+        models.PushSubscription,
+        models.ChillsTimestamp,
+    ):
+        present = set(_columns(conn, model.__tablename__))
+        for index in model.__table__.indexes:
+            # Indexes on columns added by a later migration are created there
+            if len(index.columns) > 1 and all(c.name in present for c in index.columns):
+                _create_index(conn, model.__tablename__, index.name, ", ".join(c.name for c in index.columns))
+
+
+def m011_journal_entries_updated_at(conn: Connection) -> None:
+    """updated_at for incremental timeline sync; existing rows take created_at."""
+    if _add_column(conn, models.JournalEntries.__table__.c.updated_at):
+        conn.execute(text("UPDATE journal_entries SET updated_at = created_at WHERE updated_at IS NULL"))
+    _create_index(conn, "journal_entries", "ix_journal_entries_user_hash_updated_at", "user_hash, updated_at")
+
+
+def m012_cold_archive_tables(conn: Connection) -> None:
+    _create_tables(conn, models.ArchiveFile.__table__, models.ArchivedSessionCounts.__table__)
+
+
+def m013_feedback_updated_at(conn: Connection) -> None:
+    """updated_at so feedback edits invalidate therapist summaries; existing rows take created_at."""
+    if _add_column(conn, models.Feedback.__table__.c.updated_at):
+        conn.execute(text("UPDATE feedback SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def m014_backfill_user_daily_stats(conn: Connection) -> None:
+    """Build the engagement rollup from existing rows; the after_flush hook keeps it current from here on."""
+    _create_tables(conn, models.UserDailyStats.__table__)
+    db = Session(bind=conn)
+    try:
+        written = engagement_rollup.rebuild_daily_stats(db)
+        db.flush()
+    finally:
+        db.close()
+    print(f"[migration] Backfilled {written} user_daily_stats rows")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline", m001_baseline),
+    (2, "activities_columns", m002_activities_columns),
+    (3, "backfill_activities_user_hash", m003_backfill_activities_user_hash),
+    (4, "users_soft_delete", m004_users_soft_delete),
+    (5, "ml_questionnaire_responses_schema", m005_ml_questionnaire_responses_schema),
+    (6, "stimuli_suggestions_columns", m006_stimuli_suggestions_columns),
+    (7, "chills_timestamps_columns", m007_chills_timestamps_columns),
+    (8, "post_video_responses_user_hash", m008_post_video_responses_user_hash),
+    (9, "seed_video_stimuli", m009_seed_video_stimuli),
+    (10, "composite_indexes", m010_composite_indexes),
+    (11, "journal_entries_updated_at", m011_journal_entries_updated_at),
+    (12, "cold_archive_tables", m012_cold_archive_tables),
+    (13, "feedback_updated_at", m013_feedback_updated_at),
+    (14, "backfill_user_daily_stats", m014_backfill_user_daily_stats),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied version; 0 for a database that predates schema_version."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except Exception:
+        return 0
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """Hold a cross-process lock for the duration of a migration run."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _PG_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _PG_LOCK_KEY})
+        return
+
+    path = engine.url.database if engine.dialect.name == "sqlite" else None
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if not path or path == ":memory:" or fcntl is None:
+        yield
+        return
+
+    with open(f"{path}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate(engine: Engine) -> int:
+    """Apply pending migrations; returns the number applied."""
+    if current_version(engine) >= LATEST_VERSION:
+        return 0
+
+    t0 = time.perf_counter()
+    applied = 0
+    with _migration_lock(engine):
+        _meta.create_all(bind=engine)
+        version = current_version(engine)
+        for number, name, fn in MIGRATIONS:
+            if number <= version:
+                continue
+            with engine.begin() as conn:
+                fn(conn)
+                conn.execute(schema_version.insert().values(
+                    version=number, name=name, applied_at=datetime.utcnow()
+                ))
+            applied += 1
+            print(f"[migration] Applied {number:03d} {name}")
+
+    if applied:
+        print(f"[migration] Schema at version {LATEST_VERSION} ({applied} applied in "
+              f"{time.perf_counter() - t0:.2f}s)")
+    return applied
+
+
+def run_on_startup(engine: Engine) -> None:
+    """migrate() for app startup: never stops the app from booting."""
+    if not MIGRATE_ON_STARTUP:
+        return
+    try:
+        migrate(engine)
+    except Exception as e:
+        print(f"[migration] Error running migrations: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db import engine as _engine
+
+    ap = argparse.ArgumentParser(description="Apply pending schema migrations")
+    ap.add_argument("--status", action="store_true", help="print versions and exit")
+    args = ap.parse_args()
+    if args.status:
+        print(f"current={current_version(_engine)} latest={LATEST_VERSION}")
+    else:
+        print(f"Applied {migrate(_engine)} migrations; schema at version {current_version(_engine)}")
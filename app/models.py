@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import (
     Column,
     String,
@@ -8,6 +10,8 @@ from sqlalchemy import (
     Boolean,
     ForeignKey,
     Float,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.sql import func
 
@@ -16,6 +20,7 @@ from .db import Base
 
 class Sessions(Base):
     __tablename__ = "sessions"
+    __table_args__ = (Index("ix_sessions_user_hash_created_at", "user_hash", "created_at"),)
     id = Column(String, primary_key=True, index=True)
     user_hash = Column(String, index=True, nullable=True)
     track_id = Column(String, index=True)
@@ -40,6 +45,8 @@ class Feedback(Base):
     meta_json = Column(Text, nullable=True)         
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every edit; part of the therapist summary data version
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 # =============================================================================
@@ -147,6 +154,9 @@ class Activities(Base):
 
 class ActivitySessions(Base):
     __tablename__ = "activity_sessions"
+    __table_args__ = (
+        Index("ix_activity_sessions_user_hash_status_completed_at", "user_hash", "status", "completed_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_hash = Column(String, index=True)
     activity_id = Column(Integer, index=True)
@@ -160,6 +170,10 @@ class ActivitySessions(Base):
 
 class JournalEntries(Base):
     __tablename__ = "journal_entries"
+    __table_args__ = (
+        Index("ix_journal_entries_user_hash_date", "user_hash", "date"),
+        Index("ix_journal_entries_user_hash_updated_at", "user_hash", "updated_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_hash = Column(String, index=True)
     session_id = Column(String, index=True, nullable=True)   
@@ -169,6 +183,9 @@ class JournalEntries(Base):
     meta_json = Column(Text, nullable=True)                  
     date = Column(Date, index=True)                          
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set from Python (microseconds) rather than CURRENT_TIMESTAMP (whole
+    # seconds) so ?updated_since= comparisons are exact
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 
@@ -341,6 +358,9 @@ class PreGeneratedAudio(Base):
     user's last session feedback (emotion_word, chills_detail, session_insight).
     """
     __tablename__ = "pre_generated_audio"
+    __table_args__ = (
+        Index("ix_pre_generated_audio_user_hash_day_status", "user_hash", "for_journey_day", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_hash = Column(String, index=True, nullable=False)
@@ -394,6 +414,7 @@ class PushSubscription(Base):
     activity reminders, and other engagement notifications.
     """
     __tablename__ = "push_subscriptions"
+    __table_args__ = (Index("ix_push_subscriptions_user_hash_is_active", "user_hash", "is_active"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_hash = Column(String, index=True, nullable=False)
@@ -861,6 +882,7 @@ class ChillsTimestamp(Base):
     Multiple timestamps can exist per session.
     """
     __tablename__ = "chills_timestamps"
+    __table_args__ = (Index("ix_chills_timestamps_session_id_created_at", "session_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, ForeignKey("video_sessions.session_id"), index=True, nullable=False)
@@ -1030,3 +1052,128 @@ class PostVideoResponse(Base):
     action_selected = Column(String, nullable=True)
     action_custom = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# =============================================================================
+# ENGAGEMENT ROLLUP
+# =============================================================================
+
+
+class UserDailyStats(Base):
+    """
+    Per-user, per-day engagement counters (UTC dates).
+
+    Maintained incrementally on every flush by app.services.engagement_rollup
+    and rebuilt from the raw tables by scripts/backfill_user_daily_stats.py.
+    Heatmaps, streaks and weekly trends read this table instead of scanning
+    activity_sessions, journal_entries, sessions, etc.
+    """
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (UniqueConstraint("user_hash", "date", name="uq_user_daily_stats_user_date"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_hash = Column(String, index=True, nullable=False)
+    date = Column(Date, index=True, nullable=False)
+
+    activities_completed = Column(Integer, default=0, nullable=False)
+    journal_entries = Column(Integer, default=0, nullable=False)
+    audio_sessions = Column(Integer, default=0, nullable=False)
+    video_sessions = Column(Integer, default=0, nullable=False)
+    chills_taps = Column(Integer, default=0, nullable=False)
+    feedback_count = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# =============================================================================
+# MATERIALIZED PATIENT SUMMARIES
+# =============================================================================
+
+
+class PatientSummarySnapshot(Base):
+    """
+    Stored output of therapist_summary generators (one row per user and kind).
+
+    `kind` is "summary" (generate_patient_summary) or "prep_notes"
+    (generate_session_prep_notes). A row is served while its data_version
+    matches the patient's current data version and it is younger than the
+    max age; otherwise it is regenerated and overwritten.
+    """
+    __tablename__ = "patient_summary_snapshots"
+    __table_args__ = (UniqueConstraint("user_hash", "kind", name="uq_patient_summary_user_kind"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_hash = Column(String, index=True, nullable=False)
+    kind = Column(String, nullable=False)
+    data_version = Column(String, nullable=False)
+    payload_json = Column(Text, nullable=False)
+    generated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# =============================================================================
+# PLATFORM COUNTERS
+# =============================================================================
+
+
+class PlatformCounter(Base):
+    """
+    Named platform-wide counters for the admin /stats view.
+
+    Totals ("users", "sessions", ...) and per-UTC-day buckets
+    ("sessions:2024-05-01") are maintained on every flush by
+    app.services.platform_counters and reconciled from the raw tables on
+    /api/admin/stats?fresh=1.
+    """
+    __tablename__ = "platform_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# =============================================================================
+# COLD ARCHIVE
+# =============================================================================
+
+
+class ArchiveFile(Base):
+    """
+    One compressed archive file written by app.services.cold_archive.
+
+    Rows are removed from the live table in the same transaction that
+    records the file here, so the archive read path only trusts files that
+    have a row in this table.
+    """
+    __tablename__ = "archive_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, index=True, nullable=False)  # journey_events, chills, body_map
+    month = Column(String, nullable=False)  # YYYY-MM
+    path = Column(String, nullable=False)  # relative to REWIRE_ARCHIVE_DIR
+    row_count = Column(Integer, nullable=False)
+    min_id = Column(Integer, nullable=True)
+    max_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ArchivedSessionCounts(Base):
+    """
+    Per-session, per-day row counts for telemetry moved to the cold archive.
+
+    Lets live reads (chills count per session, platform counters, the
+    user_daily_stats rebuild) include archived rows without opening the
+    archive files.
+    """
+    __tablename__ = "archived_session_counts"
+    __table_args__ = (
+        UniqueConstraint("source", "session_id", "date", name="uq_archived_session_counts_source_session_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False)
+    session_id = Column(String, index=True, nullable=True)
+    user_hash = Column(String, index=True, nullable=True)
+    date = Column(Date, nullable=False)
+    row_count = Column(Integer, default=0, nullable=False)
+    first_at = Column(DateTime(timezone=True), nullable=True)
+    last_at = Column(DateTime(timezone=True), nullable=True)
@@ -13,19 +13,32 @@ UPDATES:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional, List, Any
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Date, func, desc, select, or_, and_, union_all
 import csv
 import io
+import itertools
 import json
-
-from ..auth_utils import get_db
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+from ..auth_utils import get_db, get_read_db
+from ..db import read_session
 from .. import models
+from ..services import cold_archive, platform_counters, research_export
+
 
+logger = logging.getLogger(__name__)
 
 r = APIRouter(prefix="/api/admin", tags=["admin-dashboard"])
 
@@ -78,112 +91,49 @@ class PaginatedResponse(BaseModel):
 
 @r.get("/stats")
 def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    fresh: bool = Query(False, description="Recount from the raw tables and reconcile the stored counters"),
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
 ):
     """
     Get dashboard statistics overview.
     Only counts active (non-deleted) users.
+
+    Served from the platform_counters table in one query; ?fresh=1 recounts
+    everything and corrects the stored values first. The recount reads and
+    writes the primary, so replica lag never overwrites the stored counters.
     """
-    now = datetime.utcnow()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_ago = now - timedelta(days=7)
-    
-    # ==========================================================================
-    # SOFT DELETE: Only count active (non-deleted) users
-    # ==========================================================================
-    total_users = (
-        db.query(func.count(models.Users.id))
-        .filter(models.Users.deleted_at.is_(None))
-        .scalar() or 0
-    )
-    
-    # Active users today (users with sessions today)
-    active_today_sessions = (
-        db.query(func.count(func.distinct(models.Sessions.user_hash)))
-        .filter(models.Sessions.created_at >= today_start)
-        .scalar() or 0
-    )
-    
-    # Active users this week
-    active_week_sessions = (
-        db.query(func.count(func.distinct(models.Sessions.user_hash)))
-        .filter(models.Sessions.created_at >= week_ago)
-        .scalar() or 0
-    )
-    
-    # Total sessions
-    total_sessions = db.query(func.count(models.Sessions.id)).scalar() or 0
-    
-    # Sessions today
-    sessions_today = (
-        db.query(func.count(models.Sessions.id))
-        .filter(models.Sessions.created_at >= today_start)
-        .scalar() or 0
-    )
-    
-    # Total activities completed
-    total_activities = (
-        db.query(func.count(models.ActivitySessions.id))
-        .filter(models.ActivitySessions.completed_at.isnot(None))
-        .scalar() or 0
-    )
-    
-    # Activities completed today
-    activities_today = (
-        db.query(func.count(models.ActivitySessions.id))
-        .filter(
-            models.ActivitySessions.completed_at.isnot(None),
-            models.ActivitySessions.completed_at >= today_start,
-        )
-        .scalar() or 0
-    )
-    
-    # Total journal entries
-    total_journal = db.query(func.count(models.JournalEntries.id)).scalar() or 0
-    
+    if fresh:
+        stats = {}
+    else:
+        stats = platform_counters.read_stats(db)
+    if fresh or not platform_counters.has_totals(stats):
+        platform_counters.recompute(primary)
+        stats = platform_counters.read_stats(primary)
+
+    today = datetime.utcnow().date()
+    total_users = stats.get("users", 0)
+    total_sessions = stats.get("sessions", 0)
+
     # Average sessions per user
     avg_sessions = 0.0
     if total_users > 0:
         avg_sessions = round(total_sessions / total_users, 2)
-    
-    # Total feedback entries
-    total_feedback = db.query(func.count(models.Feedback.id)).scalar() or 0
-    
-    # Total chills timestamps
-    total_chills = 0
-    try:
-        total_chills = db.query(func.count(models.ChillsTimestamp.id)).scalar() or 0
-    except Exception:
-        pass
-    
-    # Total video sessions
-    total_video_sessions = 0
-    try:
-        total_video_sessions = db.query(func.count(models.VideoSession.id)).scalar() or 0
-    except Exception:
-        pass
-    
-    # Total ML questionnaires completed
-    total_ml_questionnaires = 0
-    try:
-        total_ml_questionnaires = db.query(func.count(models.MLQuestionnaireResponse.id)).scalar() or 0
-    except Exception:
-        pass
-    
+
     return {
         "total_users": total_users,
-        "active_users_today": active_today_sessions,
-        "active_users_week": active_week_sessions,
+        "active_users_today": stats.get("active_users_today", 0),
+        "active_users_week": stats.get("active_users_week", 0),
         "total_sessions": total_sessions,
-        "sessions_today": sessions_today,
-        "total_activities_completed": total_activities,
-        "activities_today": activities_today,
-        "total_journal_entries": total_journal,
+        "sessions_today": stats.get(platform_counters.daily_name("sessions", today), 0),
+        "total_activities_completed": stats.get("activities_completed", 0),
+        "activities_today": stats.get(platform_counters.daily_name("activities_completed", today), 0),
+        "total_journal_entries": stats.get("journal_entries", 0),
         "avg_sessions_per_user": avg_sessions,
-        "total_feedback": total_feedback,
-        "total_chills": total_chills,
-        "total_video_sessions": total_video_sessions,
-        "total_ml_questionnaires": total_ml_questionnaires,
+        "total_feedback": stats.get("feedback", 0),
+        "total_chills": stats.get("chills", 0),
+        "total_video_sessions": stats.get("video_sessions", 0),
+        "total_ml_questionnaires": stats.get("ml_questionnaires", 0),
     }
 
 
@@ -192,20 +142,62 @@ def get_dashboard_stats(
 # =============================================================================
 
 
+def _chill_counts(user_hashes: Optional[list] = None):
+    """(user_hash, n) subquery of chills taps per user: live rows plus the cold archive."""
+    C = models.ChillsTimestamp
+    A = models.ArchivedSessionCounts
+    live = select(C.user_hash.label("user_hash"), func.count(C.id).label("n")).group_by(C.user_hash)
+    archived = (
+        select(A.user_hash.label("user_hash"), func.sum(A.row_count).label("n"))
+        .where(A.source == "chills")
+        .group_by(A.user_hash)
+    )
+    if user_hashes is not None:
+        live = live.where(C.user_hash.in_(user_hashes))
+        archived = archived.where(A.user_hash.in_(user_hashes))
+    both = union_all(live, archived).subquery()
+    return select(both.c.user_hash, func.sum(both.c.n).label("n")).group_by(both.c.user_hash).subquery()
+
+
+# Approximate totals for the user list: exact COUNT(*) at most once per TTL
+# per (include_deleted, search) combination.
+USER_COUNT_TTL_SECONDS = float(os.getenv("REWIRE_ADMIN_COUNT_TTL", "60"))
+_user_count_cache: dict = {}
+_user_count_lock = threading.Lock()
+
+
+def _cached_user_count(query, key) -> int:
+    now = time.monotonic()
+    with _user_count_lock:
+        hit = _user_count_cache.get(key)
+        if hit and now - hit[0] < USER_COUNT_TTL_SECONDS:
+            return hit[1]
+    total = query.order_by(None).count()
+    with _user_count_lock:
+        _user_count_cache[key] = (now, total)
+    return total
+
+
 @r.get("/users")
 def list_users(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
     include_deleted: bool = Query(False),
+    cursor: Optional[str] = Query(None),
 ):
     """
     List all users with pagination and search.
     By default, excludes deleted users (deleted_at is not null).
     Set include_deleted=true to see all users including deleted ones.
+    
+    Pagination: pass the returned next_cursor as ?cursor= for keyset paging
+    on (created_at, id), which stays fast on deep pages; ?page= (OFFSET) is
+    still accepted. Per-user counts come from grouped subqueries in the same
+    statement as the page. total is cached for REWIRE_ADMIN_COUNT_TTL seconds.
     """
     query = db.query(models.Users)
     
@@ -224,58 +216,86 @@ def list_users(
             (models.Users.user_hash.ilike(search_term))
         )
     
-    # Get total count
-    total = query.count()
+    # Get total count (cached)
+    total = _cached_user_count(query, (include_deleted, search or ""))
+    
+    # Keyset: rows strictly after the cursor user in (created_at, id) order.
+    # The anchor is read from the row itself so the comparison uses the
+    # stored representation of created_at.
+    descending = sort_order == "desc"
+    if cursor:
+        try:
+            cursor_id = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        anchor = (
+            select(models.Users.created_at)
+            .where(models.Users.id == cursor_id)
+            .scalar_subquery()
+        )
+        if descending:
+            query = query.filter(or_(
+                models.Users.created_at < anchor,
+                and_(models.Users.created_at == anchor, models.Users.id < cursor_id),
+            ))
+        else:
+            query = query.filter(or_(
+                models.Users.created_at > anchor,
+                and_(models.Users.created_at == anchor, models.Users.id > cursor_id),
+            ))
     
     # Sort
-    if sort_order == "desc":
-        query = query.order_by(desc(models.Users.created_at))
+    if descending:
+        query = query.order_by(desc(models.Users.created_at), desc(models.Users.id))
     else:
-        query = query.order_by(models.Users.created_at)
+        query = query.order_by(models.Users.created_at, models.Users.id)
     
-    # Paginate
-    offset = (page - 1) * page_size
-    users = query.offset(offset).limit(page_size).all()
+    # Paginate (fetch one extra row to know whether there is a next page)
+    if not cursor:
+        query = query.offset((page - 1) * page_size)
+    page_users = query.limit(page_size + 1).subquery()
+    U = aliased(models.Users, page_users)
+    page_hashes = select(page_users.c.user_hash)
     
-    # Build response with additional stats
-    items = []
-    for user in users:
-        # Count sessions for this user
-        session_count = (
-            db.query(func.count(models.Sessions.id))
-            .filter(models.Sessions.user_hash == user.user_hash)
-            .scalar() or 0
+    # Per-user stats as grouped subqueries over the page's users only
+    sessions = (
+        select(
+            models.Sessions.user_hash,
+            func.count(models.Sessions.id).label("n"),
+            func.max(models.Sessions.created_at).label("last"),
         )
-        
-        # Count completed activities
-        activity_count = (
-            db.query(func.count(models.ActivitySessions.id))
-            .filter(
-                models.ActivitySessions.user_hash == user.user_hash,
-                models.ActivitySessions.completed_at.isnot(None),
-            )
-            .scalar() or 0
+        .where(models.Sessions.user_hash.in_(page_hashes))
+        .group_by(models.Sessions.user_hash)
+        .subquery()
+    )
+    activities = (
+        select(models.ActivitySessions.user_hash, func.count(models.ActivitySessions.id).label("n"))
+        .where(
+            models.ActivitySessions.user_hash.in_(page_hashes),
+            models.ActivitySessions.completed_at.isnot(None),
         )
-        
-        # Count chills
-        chills_count = 0
-        try:
-            chills_count = (
-                db.query(func.count(models.ChillsTimestamp.id))
-                .filter(models.ChillsTimestamp.user_hash == user.user_hash)
-                .scalar() or 0
-            )
-        except Exception:
-            pass
-        
-        # Get last session
-        last_session = (
-            db.query(models.Sessions.created_at)
-            .filter(models.Sessions.user_hash == user.user_hash)
-            .order_by(desc(models.Sessions.created_at))
-            .first()
+        .group_by(models.ActivitySessions.user_hash)
+        .subquery()
+    )
+    chills = _chill_counts(page_hashes)
+    
+    rows = (
+        db.query(U, sessions.c.n, sessions.c.last, activities.c.n, chills.c.n)
+        .outerjoin(sessions, sessions.c.user_hash == U.user_hash)
+        .outerjoin(activities, activities.c.user_hash == U.user_hash)
+        .outerjoin(chills, chills.c.user_hash == U.user_hash)
+        .order_by(
+            *((desc(U.created_at), desc(U.id)) if descending else (U.created_at, U.id))
         )
-        
+        .all()
+    )
+    
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    
+    # Build response with additional stats
+    items = []
+    for user, session_count, last_session, activity_count, chills_count in rows:
         items.append({
             "id": user.id,
             "user_hash": user.user_hash,
@@ -283,10 +303,10 @@ def list_users(
             "email": user.email,
             "journey_day": user.journey_day or 1,
             "created_at": user.created_at.isoformat() if user.created_at else None,
-            "last_active": last_session[0].isoformat() if last_session and last_session[0] else None,
-            "total_sessions": session_count,
-            "total_activities": activity_count,
-            "total_chills": chills_count,
+            "last_active": last_session.isoformat() if last_session else None,
+            "total_sessions": session_count or 0,
+            "total_activities": activity_count or 0,
+            "total_chills": chills_count or 0,
             "deleted_at": user.deleted_at.isoformat() if user.deleted_at else None,
         })
     
@@ -298,13 +318,27 @@ def list_users(
         "page": page,
         "page_size": page_size,
         "total_pages": total_pages,
+        "next_cursor": str(items[-1]["id"]) if has_more and items else None,
     }
 
 
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _archived_for_user(db: Session, source: str, user_hash: str) -> list:
+    """A user's rows moved to the cold archive, newest first (they follow the live rows)."""
+    return [
+        row
+        for _, rows in cold_archive.iter_archived_rows(db, source, newest_first=True, user_hash=user_hash)
+        for row in rows
+    ]
+
+
 @r.get("/users/{user_id}")
 def get_user_detail(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Get COMPLETE detailed information for a specific user.
@@ -520,6 +554,15 @@ def get_user_detail(
                 "intensity": c.intensity,
                 "created_at": c.created_at.isoformat() if c.created_at else None,
             })
+        for c in _archived_for_user(db, "chills", user_hash):
+            chills_timestamps.append({
+                "id": c["id"],
+                "session_id": c["session_id"],
+                "video_time_seconds": c["video_time_seconds"],
+                "video_name": c["video_name"],
+                "intensity": c["intensity"],
+                "created_at": _iso(c["created_at"]),
+            })
     except Exception as e:
         print(f"[admin] Chills timestamps fetch error: {e}")
     
@@ -545,6 +588,14 @@ def get_user_detail(
                 "y_percent": spot.y_percent,
                 "created_at": spot.created_at.isoformat() if spot.created_at else None,
             })
+        for spot in _archived_for_user(db, "body_map", user_hash):
+            body_map_spots.append({
+                "id": spot["id"],
+                "session_id": spot["session_id"],
+                "x_percent": spot["x_percent"],
+                "y_percent": spot["y_percent"],
+                "created_at": _iso(spot["created_at"]),
+            })
     except Exception as e:
         print(f"[admin] Body map spots fetch error: {e}")
     
@@ -840,7 +891,7 @@ def delete_user(
 
 @r.get("/sessions")
 def list_sessions(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     user_hash: Optional[str] = Query(None),
@@ -909,7 +960,7 @@ def list_sessions(
 
 @r.get("/activities")
 def list_activity_completions(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     user_hash: Optional[str] = Query(None),
@@ -985,7 +1036,7 @@ def list_activity_completions(
 
 @r.get("/feedback")
 def list_feedback(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
 ):
@@ -1051,7 +1102,7 @@ def list_feedback(
 
 @r.get("/journal")
 def list_journal_entries(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     user_hash: Optional[str] = Query(None),
@@ -1116,95 +1167,182 @@ def list_journal_entries(
 # =============================================================================
 
 
-def _generate_csv(data: List[dict], filename: str) -> StreamingResponse:
-    """Helper to generate CSV streaming response."""
-    if not data:
-        output = io.StringIO()
-        output.write("No data available\n")
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=data[0].keys())
-    writer.writeheader()
-    writer.writerows(data)
-    output.seek(0)
-    
+# Rows fetched per round trip while streaming an export; memory stays bounded
+# by one batch regardless of table size.
+EXPORT_BATCH_SIZE = int(os.getenv("REWIRE_ADMIN_EXPORT_BATCH", "1000"))
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _export_fields(available: dict, columns: Optional[str]) -> list:
+    """
+    Labeled SELECT columns for an export. `columns` is the comma-separated
+    ?columns= filter; unknown names are a 400 so typos don't silently drop data.
+    """
+    if not columns:
+        names = list(available)
+    else:
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [n for n in names if n not in available]
+        if unknown or not names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown export columns: {', '.join(unknown) or '(none)'}. "
+                       f"Available: {', '.join(available)}",
+            )
+    return [available[n].label(n) for n in names]
+
+
+def _date_range(stmt, column, start: Optional[date], end: Optional[date]):
+    """Restrict to start <= column < end + 1 day (both bounds inclusive dates)."""
+    as_datetime = not isinstance(column.type, Date)
+    if start:
+        stmt = stmt.where(column >= (datetime.combine(start, datetime.min.time()) if as_datetime else start))
+    if end:
+        end = end + timedelta(days=1)
+        stmt = stmt.where(column < (datetime.combine(end, datetime.min.time()) if as_datetime else end))
+    return stmt
+
+
+def _stream_csv(stmt, filename: str, archived=None) -> StreamingResponse:
+    """
+    Stream a SELECT as CSV, one batch of EXPORT_BATCH_SIZE rows per chunk.
+    `archived(db, keys)` may yield further row batches (cold-archived rows,
+    see _archived_rows) that are written after the live rows.
+
+    The generator owns its session: the request's get_db session is closed
+    before the response body is sent.
+    """
+    def generate():
+        db = read_session()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        wrote_header = False
+        try:
+            result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            keys = list(result.keys())
+            batches = result.partitions()
+            if archived is not None:
+                batches = itertools.chain(batches, archived(db, keys))
+            for batch in batches:
+                if not wrote_header:
+                    writer.writerow(keys)
+                    wrote_header = True
+                writer.writerows([_csv_value(v) for v in row] for row in batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            if not wrote_header:
+                yield "No data available\n"
+        except Exception:
+            # Re-raise so the server aborts the response: a truncated file
+            # must not look like a complete export
+            logger.exception("Export %s failed", filename)
+            raise
+        finally:
+            db.close()
+
     return StreamingResponse(
-        iter([output.getvalue()]),
+        generate(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
+def _archived_rows(source: str, start: Optional[date], end: Optional[date]):
+    """
+    `archived` callback for _stream_csv: rows of `source` moved to the cold
+    archive, newest first like the live export, with user_name / user_email
+    looked up once per batch.
+    """
+    def rows(db: Session, keys: list):
+        U = models.Users
+        for _, archived in cold_archive.iter_archived_rows(db, source, start, end, newest_first=True):
+            for i in range(0, len(archived), EXPORT_BATCH_SIZE):
+                batch = archived[i:i + EXPORT_BATCH_SIZE]
+                users = {}
+                if "user_name" in keys or "user_email" in keys:
+                    hashes = {row["user_hash"] for row in batch if row["user_hash"]}
+                    users = {
+                        user_hash: {"user_name": name, "user_email": email}
+                        for user_hash, name, email in db.execute(
+                            select(U.user_hash, U.name, U.email).where(U.user_hash.in_(hashes))
+                        )
+                    }
+                yield [
+                    [users.get(row["user_hash"], {}).get(k) if k in ("user_name", "user_email") else row.get(k)
+                     for k in keys]
+                    for row in batch
+                ]
+    return rows
+
+
+def _user_fields() -> dict:
+    """user_name / user_email from a LEFT JOIN on Users."""
+    return {"user_name": models.Users.name, "user_email": models.Users.email}
+
+
 @r.get("/export/users")
 def export_users_csv(
-    db: Session = Depends(get_db),
     include_deleted: bool = Query(False),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all users as CSV."""
-    query = db.query(models.Users)
-    
+    U = models.Users
+    sessions = (
+        select(models.Sessions.user_hash.label("user_hash"), func.count(models.Sessions.id).label("n"))
+        .group_by(models.Sessions.user_hash)
+        .subquery()
+    )
+    activities = (
+        select(models.ActivitySessions.user_hash.label("user_hash"), func.count(models.ActivitySessions.id).label("n"))
+        .where(models.ActivitySessions.completed_at.isnot(None))
+        .group_by(models.ActivitySessions.user_hash)
+        .subquery()
+    )
+    chills = _chill_counts()
+
+    fields = _export_fields({
+        "id": U.id,
+        "user_hash": U.user_hash,
+        "name": U.name,
+        "email": U.email,
+        "provider": U.provider,
+        "journey_day": func.coalesce(U.journey_day, 1),
+        "onboarding_complete": U.onboarding_complete,
+        "ml_questionnaire_complete": U.ml_questionnaire_complete,
+        "safety_flag": U.safety_flag,
+        "total_sessions": func.coalesce(sessions.c.n, 0),
+        "total_activities": func.coalesce(activities.c.n, 0),
+        "total_chills": func.coalesce(chills.c.n, 0),
+        "created_at": U.created_at,
+        "deleted_at": U.deleted_at,
+    }, columns)
+
+    stmt = (
+        select(*fields)
+        .select_from(U)
+        .outerjoin(sessions, sessions.c.user_hash == U.user_hash)
+        .outerjoin(activities, activities.c.user_hash == U.user_hash)
+        .outerjoin(chills, chills.c.user_hash == U.user_hash)
+    )
     if not include_deleted:
-        query = query.filter(models.Users.deleted_at.is_(None))
-    
-    users = query.order_by(desc(models.Users.created_at)).all()
-    
-    data = []
-    for user in users:
-        session_count = (
-            db.query(func.count(models.Sessions.id))
-            .filter(models.Sessions.user_hash == user.user_hash)
-            .scalar() or 0
-        )
-        
-        activity_count = (
-            db.query(func.count(models.ActivitySessions.id))
-            .filter(
-                models.ActivitySessions.user_hash == user.user_hash,
-                models.ActivitySessions.completed_at.isnot(None),
-            )
-            .scalar() or 0
-        )
-        
-        chills_count = 0
-        try:
-            chills_count = (
-                db.query(func.count(models.ChillsTimestamp.id))
-                .filter(models.ChillsTimestamp.user_hash == user.user_hash)
-                .scalar() or 0
-            )
-        except Exception:
-            pass
-        
-        data.append({
-            "id": user.id,
-            "user_hash": user.user_hash,
-            "name": user.name,
-            "email": user.email,
-            "provider": user.provider,
-            "journey_day": user.journey_day or 1,
-            "onboarding_complete": user.onboarding_complete,
-            "ml_questionnaire_complete": user.ml_questionnaire_complete,
-            "safety_flag": user.safety_flag,
-            "total_sessions": session_count,
-            "total_activities": activity_count,
-            "total_chills": chills_count,
-            "created_at": user.created_at.isoformat() if user.created_at else None,
-            "deleted_at": user.deleted_at.isoformat() if user.deleted_at else None,
-        })
-    
-    return _generate_csv(data, "rewire_users.csv")
+        stmt = stmt.where(U.deleted_at.is_(None))
+    stmt = _date_range(stmt, U.created_at, start, end)
+
+    return _stream_csv(stmt.order_by(desc(U.created_at), desc(U.id)), "rewire_users.csv")
 
 
 @r.get("/export/users/{user_id}")
 def export_user_complete_csv(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Export complete data for a single user as CSV."""
     user = db.query(models.Users).filter(models.Users.id == user_id).first()
@@ -1295,6 +1433,9 @@ def export_user_complete_csv(
         for c in chills:
             video_name = (c.video_name or '').replace('"', '""')
             output.write(f"{c.session_id},{c.video_time_seconds},\"{video_name}\",{c.intensity or ''},{c.created_at.isoformat() if c.created_at else ''}\n")
+        for c in _archived_for_user(db, "chills", user_hash):
+            video_name = (c["video_name"] or '').replace('"', '""')
+            output.write(f"{c['session_id']},{c['video_time_seconds']},\"{video_name}\",{c['intensity'] or ''},{_iso(c['created_at']) or ''}\n")
     except Exception:
         pass
     output.write("\n")
@@ -1307,9 +1448,11 @@ def export_user_complete_csv(
             models.BodyMapSpot.session_id.in_(
                 db.query(models.VideoSession.session_id).filter(models.VideoSession.user_hash == user_hash)
             )
-        ).all()
+        ).order_by(desc(models.BodyMapSpot.created_at)).all()
         for spot in spots:
             output.write(f"{spot.session_id},{spot.x_percent},{spot.y_percent},{spot.created_at.isoformat() if spot.created_at else ''}\n")
+        for spot in _archived_for_user(db, "body_map", user_hash):
+            output.write(f"{spot['session_id']},{spot['x_percent']},{spot['y_percent']},{_iso(spot['created_at']) or ''}\n")
     except Exception:
         pass
     output.write("\n")
@@ -1358,300 +1501,316 @@ def export_user_complete_csv(
 
 @r.get("/export/chills")
 def export_chills_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all chills data as CSV."""
-    data = []
-    
-    try:
-        chills = db.query(models.ChillsTimestamp).order_by(desc(models.ChillsTimestamp.created_at)).all()
-        for c in chills:
-            user = None
-            if c.user_hash:
-                user = db.query(models.Users).filter(models.Users.user_hash == c.user_hash).first()
-            
-            data.append({
-                "id": c.id,
-                "user_hash": c.user_hash,
-                "user_name": user.name if user else None,
-                "user_email": user.email if user else None,
-                "session_id": c.session_id,
-                "video_time_seconds": c.video_time_seconds,
-                "video_name": c.video_name,
-                "intensity": c.intensity,
-                "created_at": c.created_at.isoformat() if c.created_at else None,
-            })
-    except Exception as e:
-        print(f"[admin] Chills export error: {e}")
-    
-    return _generate_csv(data, "rewire_chills.csv")
+    C = models.ChillsTimestamp
+    fields = _export_fields({
+        "id": C.id,
+        "user_hash": C.user_hash,
+        **_user_fields(),
+        "session_id": C.session_id,
+        "video_time_seconds": C.video_time_seconds,
+        "video_name": C.video_name,
+        "intensity": C.intensity,
+        "created_at": C.created_at,
+    }, columns)
+
+    stmt = select(*fields).select_from(C).outerjoin(models.Users, models.Users.user_hash == C.user_hash)
+    stmt = _date_range(stmt, C.created_at, start, end)
+    return _stream_csv(
+        stmt.order_by(desc(C.created_at), desc(C.id)), "rewire_chills.csv",
+        archived=_archived_rows("chills", start, end),
+    )
 
 
 @r.get("/export/activities")
 def export_activities_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all activity completions as CSV."""
-    data = []
-    
-    activities = db.query(models.ActivitySessions).order_by(desc(models.ActivitySessions.created_at)).all()
-    for act in activities:
-        user = db.query(models.Users).filter(models.Users.user_hash == act.user_hash).first()
-        activity_info = db.query(models.Activities).filter(models.Activities.id == act.activity_id).first()
-        
-        data.append({
-            "id": act.id,
-            "user_hash": act.user_hash,
-            "user_name": user.name if user else None,
-            "user_email": user.email if user else None,
-            "activity_id": act.activity_id,
-            "activity_title": activity_info.title if activity_info else None,
-            "activity_description": activity_info.description if activity_info else None,
-            "life_area": activity_info.life_area if activity_info else None,
-            "effort_level": activity_info.effort_level if activity_info else None,
-            "location_label": activity_info.location_label if activity_info else None,
-            "status": act.status,
-            "started_at": act.started_at.isoformat() if act.started_at else None,
-            "completed_at": act.completed_at.isoformat() if act.completed_at else None,
-            "created_at": act.created_at.isoformat() if act.created_at else None,
-        })
-    
-    return _generate_csv(data, "rewire_activities.csv")
+    AS = models.ActivitySessions
+    A = models.Activities
+    fields = _export_fields({
+        "id": AS.id,
+        "user_hash": AS.user_hash,
+        **_user_fields(),
+        "activity_id": AS.activity_id,
+        "activity_title": A.title,
+        "activity_description": A.description,
+        "life_area": A.life_area,
+        "effort_level": A.effort_level,
+        "location_label": A.location_label,
+        "status": AS.status,
+        "started_at": AS.started_at,
+        "completed_at": AS.completed_at,
+        "created_at": AS.created_at,
+    }, columns)
+
+    stmt = (
+        select(*fields)
+        .select_from(AS)
+        .outerjoin(models.Users, models.Users.user_hash == AS.user_hash)
+        .outerjoin(A, A.id == AS.activity_id)
+    )
+    stmt = _date_range(stmt, AS.created_at, start, end)
+    return _stream_csv(stmt.order_by(desc(AS.created_at), desc(AS.id)), "rewire_activities.csv")
 
 
 @r.get("/export/journal")
 def export_journal_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Entry date on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Entry date on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all journal entries as CSV."""
-    data = []
-    
-    entries = db.query(models.JournalEntries).order_by(desc(models.JournalEntries.date)).all()
-    for e in entries:
-        user = db.query(models.Users).filter(models.Users.user_hash == e.user_hash).first()
-        
-        data.append({
-            "id": e.id,
-            "user_hash": e.user_hash,
-            "user_name": user.name if user else None,
-            "user_email": user.email if user else None,
-            "entry_type": e.entry_type,
-            "title": e.title,
-            "body": e.body,
-            "date": e.date.isoformat() if e.date else None,
-            "created_at": e.created_at.isoformat() if e.created_at else None,
-        })
-    
-    return _generate_csv(data, "rewire_journal.csv")
+    J = models.JournalEntries
+    fields = _export_fields({
+        "id": J.id,
+        "user_hash": J.user_hash,
+        **_user_fields(),
+        "entry_type": J.entry_type,
+        "title": J.title,
+        "body": J.body,
+        "date": J.date,
+        "created_at": J.created_at,
+    }, columns)
+
+    stmt = select(*fields).select_from(J).outerjoin(models.Users, models.Users.user_hash == J.user_hash)
+    stmt = _date_range(stmt, J.date, start, end)
+    return _stream_csv(stmt.order_by(desc(J.date), desc(J.id)), "rewire_journal.csv")
 
 
 @r.get("/export/intake")
 def export_intake_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all intake data as CSV."""
-    data = []
-    
-    intakes = db.query(models.ClinicalIntake).order_by(desc(models.ClinicalIntake.created_at)).all()
-    for intake in intakes:
-        user = db.query(models.Users).filter(models.Users.user_hash == intake.user_hash).first()
-        
-        data.append({
-            "id": intake.id,
-            "user_hash": intake.user_hash,
-            "user_name": user.name if user else None,
-            "user_email": user.email if user else None,
-            "age": intake.age,
-            "gender": intake.gender,
-            "postal_code": intake.postal_code,
-            "in_therapy": intake.in_therapy,
-            "therapy_type": intake.therapy_type,
-            "on_medication": intake.on_medication,
-            "medication_list": intake.medication_list,
-            "psychosis_history": intake.psychosis_history,
-            "pregnant_or_planning": intake.pregnant_or_planning,
-            "life_area": intake.life_area,
-            "life_focus": intake.life_focus,
-            "pre_intake_text": intake.pre_intake_text,
-            "good_life_answer": intake.good_life_answer,
-            "created_at": intake.created_at.isoformat() if intake.created_at else None,
-        })
-    
-    return _generate_csv(data, "rewire_intake.csv")
+    I = models.ClinicalIntake
+    fields = _export_fields({
+        "id": I.id,
+        "user_hash": I.user_hash,
+        **_user_fields(),
+        "age": I.age,
+        "gender": I.gender,
+        "postal_code": I.postal_code,
+        "in_therapy": I.in_therapy,
+        "therapy_type": I.therapy_type,
+        "on_medication": I.on_medication,
+        "medication_list": I.medication_list,
+        "psychosis_history": I.psychosis_history,
+        "pregnant_or_planning": I.pregnant_or_planning,
+        "life_area": I.life_area,
+        "life_focus": I.life_focus,
+        "pre_intake_text": I.pre_intake_text,
+        "good_life_answer": I.good_life_answer,
+        "created_at": I.created_at,
+    }, columns)
+
+    stmt = select(*fields).select_from(I).outerjoin(models.Users, models.Users.user_hash == I.user_hash)
+    stmt = _date_range(stmt, I.created_at, start, end)
+    return _stream_csv(stmt.order_by(desc(I.created_at), desc(I.id)), "rewire_intake.csv")
 
 
 @r.get("/export/ml-questionnaire")
 def export_ml_questionnaire_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all ML questionnaire responses as CSV."""
-    data = []
-    
-    try:
-        responses = db.query(models.MLQuestionnaireResponse).order_by(desc(models.MLQuestionnaireResponse.created_at)).all()
-        for ml_q in responses:
-            user = db.query(models.Users).filter(models.Users.user_hash == ml_q.user_hash).first()
-            
-            data.append({
-                "id": ml_q.id,
-                "user_hash": ml_q.user_hash,
-                "user_name": user.name if user else None,
-                "user_email": user.email if user else None,
-                "dpes_1": ml_q.dpes_1,
-                "dpes_4": ml_q.dpes_4,
-                "dpes_29": ml_q.dpes_29,
-                "neo_ffi_10": ml_q.neo_ffi_10,
-                "neo_ffi_14": ml_q.neo_ffi_14,
-                "neo_ffi_16": ml_q.neo_ffi_16,
-                "neo_ffi_45": ml_q.neo_ffi_45,
-                "neo_ffi_46": ml_q.neo_ffi_46,
-                "kamf_4_1": ml_q.kamf_4_1,
-                "age": ml_q.age,
-                "gender": ml_q.gender,
-                "ethnicity": ml_q.ethnicity,
-                "education": ml_q.education,
-                "depression_status": ml_q.depression_status,
-                "created_at": ml_q.created_at.isoformat() if ml_q.created_at else None,
-            })
-    except Exception as e:
-        print(f"[admin] ML questionnaire export error: {e}")
-    
-    return _generate_csv(data, "rewire_ml_questionnaire.csv")
+    M = models.MLQuestionnaireResponse
+    fields = _export_fields({
+        "id": M.id,
+        "user_hash": M.user_hash,
+        **_user_fields(),
+        "dpes_1": M.dpes_1,
+        "dpes_4": M.dpes_4,
+        "dpes_29": M.dpes_29,
+        "neo_ffi_10": M.neo_ffi_10,
+        "neo_ffi_14": M.neo_ffi_14,
+        "neo_ffi_16": M.neo_ffi_16,
+        "neo_ffi_45": M.neo_ffi_45,
+        "neo_ffi_46": M.neo_ffi_46,
+        "kamf_4_1": M.kamf_4_1,
+        "age": M.age,
+        "gender": M.gender,
+        "ethnicity": M.ethnicity,
+        "education": M.education,
+        "depression_status": M.depression_status,
+        "created_at": M.created_at,
+    }, columns)
+
+    stmt = select(*fields).select_from(M).outerjoin(models.Users, models.Users.user_hash == M.user_hash)
+    stmt = _date_range(stmt, M.created_at, start, end)
+    return _stream_csv(stmt.order_by(desc(M.created_at), desc(M.id)), "rewire_ml_questionnaire.csv")
 
 
 @r.get("/export/video-sessions")
 def export_video_sessions_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Started on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Started on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all video sessions as CSV."""
-    data = []
-    
-    try:
-        sessions = db.query(models.VideoSession).order_by(desc(models.VideoSession.started_at)).all()
-        for vs in sessions:
-            user = db.query(models.Users).filter(models.Users.user_hash == vs.user_hash).first()
-            
-            video = None
-            try:
-                video = db.query(models.VideoStimulus).filter(models.VideoStimulus.id == vs.video_id).first()
-            except Exception:
-                pass
-            
-            data.append({
-                "id": vs.id,
-                "session_id": vs.session_id,
-                "user_hash": vs.user_hash,
-                "user_name": user.name if user else None,
-                "user_email": user.email if user else None,
-                "video_id": vs.video_id,
-                "video_name": video.stimulus_name if video else None,
-                "started_at": vs.started_at.isoformat() if vs.started_at else None,
-                "completed_at": vs.completed_at.isoformat() if vs.completed_at else None,
-                "watched_duration_seconds": vs.watched_duration_seconds,
-                "completed": vs.completed,
-                "chills_count": vs.chills_count,
-                "body_map_spots": vs.body_map_spots,
-                "has_response": vs.has_response,
-            })
-    except Exception as e:
-        print(f"[admin] Video sessions export error: {e}")
-    
-    return _generate_csv(data, "rewire_video_sessions.csv")
+    VS = models.VideoSession
+    fields = _export_fields({
+        "id": VS.id,
+        "session_id": VS.session_id,
+        "user_hash": VS.user_hash,
+        **_user_fields(),
+        "video_id": VS.video_id,
+        "video_name": models.VideoStimulus.stimulus_name,
+        "started_at": VS.started_at,
+        "completed_at": VS.completed_at,
+        "watched_duration_seconds": VS.watched_duration_seconds,
+        "completed": VS.completed,
+        "chills_count": VS.chills_count,
+        "body_map_spots": VS.body_map_spots,
+        "has_response": VS.has_response,
+    }, columns)
+
+    stmt = (
+        select(*fields)
+        .select_from(VS)
+        .outerjoin(models.Users, models.Users.user_hash == VS.user_hash)
+        .outerjoin(models.VideoStimulus, models.VideoStimulus.id == VS.video_id)
+    )
+    stmt = _date_range(stmt, VS.started_at, start, end)
+    return _stream_csv(stmt.order_by(desc(VS.started_at), desc(VS.id)), "rewire_video_sessions.csv")
 
 
 @r.get("/export/feedback")
 def export_feedback_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all feedback as CSV."""
-    data = []
-    
-    feedbacks = db.query(models.Feedback).order_by(desc(models.Feedback.created_at)).all()
-    for f in feedbacks:
-        session = db.query(models.Sessions).filter(models.Sessions.id == f.session_id).first()
-        user = None
-        if session:
-            user = db.query(models.Users).filter(models.Users.user_hash == session.user_hash).first()
-        
-        data.append({
-            "id": f.id,
-            "session_id": f.session_id,
-            "user_hash": session.user_hash if session else None,
-            "user_name": user.name if user else None,
-            "user_email": user.email if user else None,
-            "chills": f.chills,
-            "relevance": f.relevance,
-            "emotion_word": f.emotion_word,
-            "chills_option": f.chills_option,
-            "chills_detail": f.chills_detail,
-            "session_insight": f.session_insight,
-            "created_at": f.created_at.isoformat() if f.created_at else None,
-        })
-    
-    return _generate_csv(data, "rewire_feedback.csv")
+    F = models.Feedback
+    fields = _export_fields({
+        "id": F.id,
+        "session_id": F.session_id,
+        "user_hash": models.Sessions.user_hash,
+        **_user_fields(),
+        "chills": F.chills,
+        "relevance": F.relevance,
+        "emotion_word": F.emotion_word,
+        "chills_option": F.chills_option,
+        "chills_detail": F.chills_detail,
+        "session_insight": F.session_insight,
+        "created_at": F.created_at,
+    }, columns)
+
+    stmt = (
+        select(*fields)
+        .select_from(F)
+        .outerjoin(models.Sessions, models.Sessions.id == F.session_id)
+        .outerjoin(models.Users, models.Users.user_hash == models.Sessions.user_hash)
+    )
+    stmt = _date_range(stmt, F.created_at, start, end)
+    return _stream_csv(stmt.order_by(desc(F.created_at), desc(F.id)), "rewire_feedback.csv")
 
 
 @r.get("/export/post-video-responses")
 def export_post_video_responses_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all post-video responses as CSV."""
-    data = []
-    
-    try:
-        responses = db.query(models.PostVideoResponse).order_by(desc(models.PostVideoResponse.created_at)).all()
-        for r_item in responses:
-            user = None
-            if r_item.user_hash:
-                user = db.query(models.Users).filter(models.Users.user_hash == r_item.user_hash).first()
-            
-            data.append({
-                "id": r_item.id,
-                "session_id": r_item.session_id,
-                "user_hash": r_item.user_hash,
-                "user_name": user.name if user else None,
-                "user_email": user.email if user else None,
-                "insights_text": r_item.insights_text,
-                "value_selected": r_item.value_selected,
-                "value_custom": r_item.value_custom,
-                "action_selected": r_item.action_selected,
-                "action_custom": r_item.action_custom,
-                "created_at": r_item.created_at.isoformat() if r_item.created_at else None,
-            })
-    except Exception as e:
-        print(f"[admin] Post-video responses export error: {e}")
-    
-    return _generate_csv(data, "rewire_post_video_responses.csv")
+    P = models.PostVideoResponse
+    fields = _export_fields({
+        "id": P.id,
+        "session_id": P.session_id,
+        "user_hash": P.user_hash,
+        **_user_fields(),
+        "insights_text": P.insights_text,
+        "value_selected": P.value_selected,
+        "value_custom": P.value_custom,
+        "action_selected": P.action_selected,
+        "action_custom": P.action_custom,
+        "created_at": P.created_at,
+    }, columns)
+
+    stmt = select(*fields).select_from(P).outerjoin(models.Users, models.Users.user_hash == P.user_hash)
+    stmt = _date_range(stmt, P.created_at, start, end)
+    return _stream_csv(stmt.order_by(desc(P.created_at), desc(P.id)), "rewire_post_video_responses.csv")
 
 
 @r.get("/export/body-map")
 def export_body_map_csv(
-    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
 ):
     """Export all body map spots as CSV."""
-    data = []
-    
+    B = models.BodyMapSpot
+    fields = _export_fields({
+        "id": B.id,
+        "session_id": B.session_id,
+        **_user_fields(),
+        "x_percent": B.x_percent,
+        "y_percent": B.y_percent,
+        "created_at": B.created_at,
+    }, columns)
+
+    stmt = (
+        select(*fields)
+        .select_from(B)
+        .outerjoin(models.VideoSession, models.VideoSession.session_id == B.session_id)
+        .outerjoin(models.Users, models.Users.user_hash == models.VideoSession.user_hash)
+    )
+    stmt = _date_range(stmt, B.created_at, start, end)
+    return _stream_csv(
+        stmt.order_by(desc(B.created_at), desc(B.id)), "rewire_body_map.csv",
+        archived=_archived_rows("body_map", start, end),
+    )
+
+
+@r.get("/export/research/{table}")
+def export_research_dataset(
+    table: str,
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    start: Optional[date] = Query(None, description="On or after (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="On or before (YYYY-MM-DD)"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Export a research table as a month-partitioned Parquet / Arrow IPC dataset,
+    zipped (month=YYYY-MM/part-0.<ext> entries). Unzip and load the directory
+    with pandas.read_parquet or pyarrow.dataset.
+    """
+    if table not in research_export.TABLES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown research table. Available: {', '.join(research_export.TABLES)}",
+        )
+
+    workdir = tempfile.mkdtemp(prefix="rewire-research-")
     try:
-        spots = db.query(models.BodyMapSpot).order_by(desc(models.BodyMapSpot.created_at)).all()
-        for spot in spots:
-            user = None
-            try:
-                video_session = db.query(models.VideoSession).filter(models.VideoSession.session_id == spot.session_id).first()
-                if video_session and video_session.user_hash:
-                    user = db.query(models.Users).filter(models.Users.user_hash == video_session.user_hash).first()
-            except Exception:
-                pass
-            
-            data.append({
-                "id": spot.id,
-                "session_id": spot.session_id,
-                "user_name": user.name if user else None,
-                "user_email": user.email if user else None,
-                "x_percent": spot.x_percent,
-                "y_percent": spot.y_percent,
-                "created_at": spot.created_at.isoformat() if spot.created_at else None,
-            })
+        files = research_export.export_table(db, table, workdir, fmt=format, start=start, end=end)
+        archive = os.path.join(workdir, f"rewire_{table}_{format}.zip")
+        root = os.path.join(workdir, table)
+        # Parquet pages are already compressed
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+            for path in files:
+                zf.write(path, os.path.relpath(path, root))
     except Exception as e:
-        print(f"[admin] Body map export error: {e}")
-    
-    return _generate_csv(data, "rewire_body_map.csv")
+        shutil.rmtree(workdir, ignore_errors=True)
+        print(f"[admin] Research export {table} failed: {e}")
+        raise HTTPException(status_code=500, detail="Research export failed")
+
+    print(f"[admin] Research export {table}: {sum(files.values())} rows in {len(files)} partitions")
+    return FileResponse(
+        archive,
+        media_type="application/zip",
+        filename=os.path.basename(archive),
+        background=BackgroundTask(shutil.rmtree, workdir, ignore_errors=True),
+    )
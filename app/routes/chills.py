@@ -15,21 +15,25 @@ that replaces the audio generation system.
 FIX Issue #2: Added VideoSession auto-creation to fix foreign key constraint
 """
 
+import os
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 
+from ..auth_utils import get_async_db
 from ..db import SessionLocal
+from ..services import chills_ingest, cold_archive
 from ..models import (
     Sessions,
     Users,
     ChillsTimestamp,
     BodyMapSpot,
     PostVideoResponse,
-    VideoSession,
-    VideoStimulus,
 )
 
 # ============================================================================
@@ -38,6 +42,8 @@ from ..models import (
 
 r = APIRouter()
 
+MAX_BATCH_TAPS = int(os.getenv("REWIRE_CHILLS_BATCH_MAX", "500"))
+
 
 def db():
     """Database session dependency."""
@@ -72,6 +78,14 @@ class ChillsTimestampIn(BaseModel):
     )
 
 
+class ChillsTimestampBatchIn(BaseModel):
+    """Request model for taps queued on the client and sent together."""
+    taps: List[ChillsTimestampIn] = Field(
+        min_length=1,
+        description="Taps, possibly for several sessions"
+    )
+
+
 class ChillsTimestampOut(BaseModel):
     """Response model for chills timestamp."""
     id: int
@@ -204,68 +218,17 @@ def _ensure_video_session(
     Returns:
         True if VideoSession exists or was created, False if creation failed
     """
-    # Check if VideoSession already exists
-    existing = (
-        db_session.query(VideoSession)
-        .filter(VideoSession.session_id == session_id)
-        .first()
-    )
-    
-    if existing:
-        print(f"[chills] VideoSession already exists for {session_id}")
-        return True
-    
-    # Try to find video_id by matching video_name to stimulus_name
-    video_id = None
-    if video_name:
-        video = (
-            db_session.query(VideoStimulus)
-            .filter(VideoStimulus.stimulus_name == video_name)
-            .first()
-        )
-        if video:
-            video_id = video.id
-            print(f"[chills] Found video_id={video_id} for '{video_name}'")
-        else:
-            # Try partial match
-            video = (
-                db_session.query(VideoStimulus)
-                .filter(VideoStimulus.stimulus_name.ilike(f"%{video_name}%"))
-                .first()
-            )
-            if video:
-                video_id = video.id
-                print(f"[chills] Found video_id={video_id} via partial match for '{video_name}'")
-    
-    # If no video_id found, try to get any video as fallback
-    if video_id is None:
-        fallback_video = db_session.query(VideoStimulus).first()
-        if fallback_video:
-            video_id = fallback_video.id
-            print(f"[chills] Using fallback video_id={video_id}")
-    
-    # If still no video_id, we can't create VideoSession (FK constraint)
-    if video_id is None:
-        print(f"[chills] No video found, cannot create VideoSession for {session_id}")
-        return False
-    
-    # Create VideoSession
+    # Known sessions and the stimulus catalog are cached (see chills_ingest)
     try:
-        new_session = VideoSession(
-            session_id=session_id,
-            user_hash=user_hash or "unknown",
-            video_id=video_id,
-            started_at=datetime.utcnow(),
-            completed=False,
-        )
-        db_session.add(new_session)
-        db_session.commit()
-        print(f"[chills] Created VideoSession for {session_id}, video_id={video_id}")
-        return True
+        created = chills_ingest.ensure_video_sessions(db_session, {session_id: (user_hash, video_name)})
+        if created:
+            db_session.commit()
+            chills_ingest.mark_known(created)
     except Exception as e:
         print(f"[chills] Failed to create VideoSession: {e}")
         db_session.rollback()
         return False
+    return chills_ingest.is_known(session_id)
 
 
 def _validate_session_optional(db_session: Session, session_id: str) -> Optional[Sessions]:
@@ -377,46 +340,52 @@ def record_chills_timestamp(x: ChillsTimestampIn, q: Session = Depends(db)):
     Returns:
         Created ChillsTimestamp record
     """
-    print(f"[chills] Recording timestamp: session={x.session_id}, time={x.video_time_seconds}, video={x.video_name}, user={x.user_hash}")
+    # One transaction: the VideoSession (only if this worker has not seen the
+    # session yet) and the tap
+    try:
+        row = chills_ingest.record_taps(q, [x])[0]
+    except Exception as e:
+        print(f"[chills] ERROR recording timestamp: {e}")
+        q.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to record chills timestamp: {str(e)}")
     
-    # FIX Issue #2: Ensure VideoSession exists before inserting ChillsTimestamp
-    # This fixes the foreign key constraint error
-    session_created = _ensure_video_session(
-        q,
-        session_id=x.session_id,
-        user_hash=x.user_hash,
-        video_name=x.video_name,
-    )
+    print(f"[chills] Recorded timestamp id={row['id']} for session {x.session_id} at {x.video_time_seconds}s")
+    return ChillsTimestampOut(**row)
+
+
+@r.post("/api/chills/timestamps/batch")
+def record_chills_timestamps_batch(x: ChillsTimestampBatchIn, q: Session = Depends(db)):
+    """
+    Record taps queued on the client (e.g. a burst at an emotional peak).
     
-    if not session_created:
-        print(f"[chills] Warning: Could not ensure VideoSession exists, attempting insert anyway")
+    All taps, and any VideoSessions they need, are written in one
+    transaction (see chills_ingest).
     
-    # Create timestamp record
-    try:
-        timestamp = ChillsTimestamp(
-            session_id=x.session_id,
-            video_time_seconds=x.video_time_seconds,
-            video_name=x.video_name,
-            user_hash=x.user_hash,  # FIX: Also store user_hash on the timestamp
-            created_at=datetime.utcnow(),
-        )
-        q.add(timestamp)
-        q.commit()
-        q.refresh(timestamp)
-        
-        print(f"[chills] Recorded timestamp id={timestamp.id} for session {x.session_id} at {x.video_time_seconds}s")
-        
-        return ChillsTimestampOut(
-            id=timestamp.id,
-            session_id=timestamp.session_id,
-            video_time_seconds=timestamp.video_time_seconds,
-            video_name=getattr(timestamp, 'video_name', None),
-            created_at=timestamp.created_at,
+    Args:
+        x: ChillsTimestampBatchIn with a list of taps
+        q: Database session
+    
+    Returns:
+        Count and ids of the created timestamps, in request order
+    """
+    if len(x.taps) > MAX_BATCH_TAPS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_TAPS} taps per batch",
         )
+    try:
+        rows = chills_ingest.record_taps(q, x.taps)
     except Exception as e:
-        print(f"[chills] ERROR recording timestamp: {e}")
+        print(f"[chills] ERROR recording timestamps batch: {e}")
         q.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to record chills timestamp: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to record chills timestamps: {str(e)}")
+    
+    print(f"[chills] Recorded {len(rows)} timestamps for {len({row['session_id'] for row in rows})} session(s)")
+    return {
+        "ok": True,
+        "count": len(rows),
+        "ids": [row["id"] for row in rows],
+    }
 
 
 @r.get("/api/chills/timestamps/{session_id}", response_model=List[ChillsTimestampOut])
@@ -728,7 +697,7 @@ def get_post_video_response(session_id: str, q: Session = Depends(db)):
 # ============================================================================
 
 @r.get("/api/chills/summary/{session_id}", response_model=SessionChillsSummary)
-def get_session_chills_summary(session_id: str, q: Session = Depends(db)):
+async def get_session_chills_summary(session_id: str, q: AsyncSession = Depends(get_async_db)):
     """
     Get complete chills summary for a session.
     
@@ -742,37 +711,41 @@ def get_session_chills_summary(session_id: str, q: Session = Depends(db)):
     
     Args:
         session_id: Session ID
-        q: Database session
+        q: Async database session
     
     Returns:
         Complete SessionChillsSummary
     """
     # Get timestamps
     timestamps = (
-        q.query(ChillsTimestamp)
-        .filter(ChillsTimestamp.session_id == session_id)
-        .order_by(ChillsTimestamp.video_time_seconds.asc())
-        .all()
-    )
+        await q.execute(
+            select(ChillsTimestamp.video_time_seconds)
+            .where(ChillsTimestamp.session_id == session_id)
+            .order_by(ChillsTimestamp.video_time_seconds.asc())
+        )
+    ).scalars().all()
     
     # Get body map spots
     spots = (
-        q.query(BodyMapSpot)
-        .filter(BodyMapSpot.session_id == session_id)
-        .all()
-    )
+        await q.execute(
+            select(BodyMapSpot.x_percent, BodyMapSpot.y_percent)
+            .where(BodyMapSpot.session_id == session_id)
+        )
+    ).all()
     
     # Get post-video response
     response = (
-        q.query(PostVideoResponse)
-        .filter(PostVideoResponse.session_id == session_id)
-        .first()
-    )
+        await q.execute(
+            select(PostVideoResponse)
+            .where(PostVideoResponse.session_id == session_id)
+            .limit(1)
+        )
+    ).scalars().first()
     
     return SessionChillsSummary(
         session_id=session_id,
         chills_count=len(timestamps),
-        chills_timestamps=[t.video_time_seconds for t in timestamps],
+        chills_timestamps=list(timestamps),
         body_map_spots=[
             {"x_percent": s.x_percent, "y_percent": s.y_percent}
             for s in spots
@@ -855,13 +828,13 @@ def get_chills_count(session_id: str, q: Session = Depends(db)):
         q: Database session
     
     Returns:
-        Chills count
+        Chills count, including taps moved to the cold archive
     """
     count = (
         q.query(ChillsTimestamp)
         .filter(ChillsTimestamp.session_id == session_id)
         .count()
-    )
+    ) + cold_archive.archived_count(q, "chills", session_id)
     
     return {
         "session_id": session_id,
@@ -1,38 +1,31 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-import json
+import os
+from typing import List
+
+from fastapi import APIRouter, HTTPException
 
-from ..db import SessionLocal
 from ..schemas import JourneyEventIn
-from ..models import JourneyEvent
+from ..services import event_buffer
 
 r = APIRouter()
 
-
-def db():
-    q = SessionLocal()
-    try:
-        yield q
-    finally:
-        q.close()
+MAX_BATCH_EVENTS = int(os.getenv("REWIRE_EVENT_BATCH_MAX", "1000"))
 
 
 @r.post("/api/journey/event")
-def log_event(x: JourneyEventIn, q: Session = Depends(db)):
-
-    payload_json = None
-    if x.payload is not None:
-        payload_json = json.dumps(x.payload, ensure_ascii=False)
-
-    row = JourneyEvent(
-        session_id=x.session_id,
-        user_hash=x.user_hash or "",
-        event_type=x.event_type,
-        t_ms=x.t_ms,
-        label=x.label or "",
-        payload_json=payload_json,
-    )
-    q.add(row)
-    q.commit()
-
+def log_event(x: JourneyEventIn):
+    # Queued and written by the event buffer's flush (see event_buffer for
+    # durability); committed inline when REWIRE_EVENT_BUFFER=off
+    event_buffer.log(x)
     return {"ok": True}
+
+
+@r.post("/api/journey/events")
+def log_events(events: List[JourneyEventIn]):
+    """Write an array of events in one transaction; durable once this returns."""
+    if len(events) > MAX_BATCH_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_EVENTS} events per batch",
+        )
+    event_buffer.write_rows([event_buffer.to_row(x) for x in events])
+    return {"ok": True, "count": len(events)}
@@ -1,7 +1,27 @@
-from fastapi import APIRouter
+import logging
+
+from fastapi import APIRouter, Depends
+
+from app.auth_utils import get_current_admin
+from app.services.ml_predictor import get_predictor
 
 r = APIRouter()
+logger = logging.getLogger(__name__)
 
 @r.get("/api/health")
 def health():
     return {"ok": True}
+
+@r.get("/api/health/ml")
+def health_ml():
+    """ML predictor readiness. The endpoint is unauthenticated, so details (model, error, timings) only go to the log and /api/health/ml/diagnostics."""
+    predictor = get_predictor()
+    if not predictor.is_initialized:
+        logger.warning("ML predictor not ready: %s", predictor.diagnostics())
+    return {"ok": predictor.is_initialized}
+
+@r.get("/api/health/ml/diagnostics")
+def health_ml_diagnostics(admin: dict = Depends(get_current_admin)):
+    """Admin-only ML predictor details: model, chills output, thread settings, load/warm-up timings, cache stats."""
+    predictor = get_predictor()
+    return {"ok": predictor.is_initialized, **predictor.diagnostics()}
@@ -13,7 +13,7 @@ from app import models, schemas
 from app.auth_utils import get_current_user
 
 # Import ML predictor service
-from app.services.ml_predictor import get_predictor, predict_videos_for_user
+from app.services.ml_predictor import get_predictor, predict_videos_for_user, answers_from_response
 
 r = APIRouter(prefix="/api/intake", tags=["intake"])
 
@@ -809,23 +809,8 @@ def submit_ml_questionnaire(
     # STEP 3: Run ML prediction
     # =========================================================================
     
-    # Build answers dict for ML predictor
-    answers = {
-        "DPES_1": payload.dpes_1,
-        "NEO-FFI_10": payload.neo_ffi_10,
-        "NEO-FFI_46": payload.neo_ffi_46,
-        "NEO-FFI_16": payload.neo_ffi_16,
-        "KAMF_4_1": payload.kamf_4_1,
-        "NEO-FFI_14": payload.neo_ffi_14,
-        "DPES_4": payload.dpes_4,
-        "NEO-FFI_45": payload.neo_ffi_45,
-        "DPES_29": payload.dpes_29,
-        "Age": age,
-        "Gender": gender,
-        "Ethnicity": payload.ethnicity,
-        "Education": payload.education,
-        "Depression": payload.depression_status,
-    }
+    # Build answers dict for ML predictor (same mapping the bulk re-score uses)
+    answers = answers_from_response(questionnaire)
     
     print(f"[intake] Calling ML predictor with answers: {answers}")
     
@@ -1025,6 +1010,32 @@ def get_video_for_today(
             .first()
         )
     
+    if not suggestion:
+        # No stored suggestions (e.g. cleared by a re-score): rank from the
+        # stored questionnaire. Identical answer vectors hit the predictor's
+        # ranking cache, so this rarely runs inference.
+        questionnaire = (
+            db.query(models.MLQuestionnaireResponse)
+            .filter(models.MLQuestionnaireResponse.user_hash == user_hash)
+            .first()
+        )
+        predictor = get_predictor() if questionnaire else None
+        if predictor is not None and predictor.is_initialized:
+            video = predictor.get_video_for_day(answers_from_response(questionnaire), effective_rank)
+            if video:
+                print(f"[intake] Returning predicted video: {video['stimulus_name']} (rank={effective_rank})")
+                return {
+                    "has_video": True,
+                    "journey_day": journey_day,
+                    "video": {
+                        "rank": effective_rank,
+                        "stimulus_name": video["stimulus_name"],
+                        "stimulus_url": video["stimulus_url"],
+                        "stimulus_description": video["stimulus_description"],
+                        "score": video["score"],
+                    },
+                }
+    
     if not suggestion:
         print(f"[intake] No video suggestions found for user {user_hash}")
         return {
@@ -1,13 +1,20 @@
 from __future__ import annotations
+import base64
+import hashlib
 import json
-from datetime import datetime, date, timedelta
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, date, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, or_
+from ..auth_utils import get_async_db
 from ..db import SessionLocal
-from ..models import JournalEntries, ActivitySessions
+from ..services import autosave, engagement_rollup
+from ..models import JournalEntries
 from ..schemas import (
     JournalEntryIn,
     JournalEntryOut,
@@ -33,11 +40,13 @@ def _row_to_schema(row: JournalEntries) -> JournalEntryOut:
             meta = None
     except Exception:
         meta = None
+    # A draft still held by the autosave coalescer is newer than the row
+    draft = autosave.pending_text("journal", row.id)
     return JournalEntryOut(
         id=row.id,
         user_hash=row.user_hash,
         entry_type=row.entry_type,
-        body=row.body,
+        body=row.body if draft is None else draft,
         title=row.title,
         session_id=row.session_id,
         meta=meta,
@@ -51,12 +60,19 @@ class JournalAutoSaveIn(BaseModel):
     user_hash: str
     body: str
     entry_date: Optional[date] = None
+    # Client's increasing draft version; older versions are rejected (409)
+    version: Optional[int] = None
+    # Explicit save: write to the database now instead of coalescing
+    flush: bool = False
 
 
 class JournalAutoSaveOut(BaseModel):
     id: int
     saved: bool
     date: date
+    version: int
+    # True while the draft is only held in memory (written within REWIRE_AUTOSAVE_FLUSH_S)
+    pending: bool = False
 
 
 # ---------- Existing endpoints ----------
@@ -86,37 +102,111 @@ def create_journal_entry(x: JournalEntryIn, q: Session = Depends(db)):
 
 
 @r.get("/api/journey/journal/timeline")
-def get_journal_timeline(
+async def get_journal_timeline(
+    request: Request,
     user_hash: str = Query(...),
-    q: Session = Depends(db),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    updated_since: Optional[datetime] = Query(None),
+    q: AsyncSession = Depends(get_async_db),
 ):
     """
     Get journal timeline with stats.
-    FIX Issues #1 & #4: Now returns stats (day_streak, activities_completed) from ActivitySessions table.
+    FIX Issues #1 & #4: Now returns stats (day_streak, activities_completed) for completed activities.
+    Async handler; the queries run on the async engine via run_sync.
+    
+    Past entries are newest first by (date, id). With limit they are paged:
+    pass the returned next_cursor as ?cursor= for the following page (future
+    and today entries come with the first page only). Without limit the
+    whole history is returned, as before.
+    
+    updated_since returns only entries created or edited at or after that
+    time (use the synced_at of the previous response). Responses carry an
+    ETag; a matching If-None-Match gets 304.
     """
-    today = datetime.utcnow().date()
-    rows: List[JournalEntries] = (
-        q.query(JournalEntries)
-        .filter(JournalEntries.user_hash == user_hash)
-        .order_by(JournalEntries.date.asc(), JournalEntries.id.asc())
-        .all()
-    )
+    if updated_since is not None and updated_since.tzinfo is not None:
+        updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+    after = _decode_cursor(cursor) if cursor else None
+    body = await q.run_sync(_journal_timeline, user_hash, limit, after, updated_since)
+    
+    # synced_at changes every call, so it is left out of the ETag
+    digest = hashlib.sha1(
+        json.dumps({k: v for k, v in body.items() if k != "synced_at"}, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder(body), headers=headers)
+
+
+def _encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(key[0]), int(key[1])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _journal_timeline(
+    q: Session,
+    user_hash: str,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None,
+    updated_since: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    synced_at = datetime.utcnow()
+    today = synced_at.date()
+    base = q.query(JournalEntries).filter(JournalEntries.user_hash == user_hash)
+    
+    if updated_since is not None:
+        # Incremental sync: the changed rows are few, so fetch them by
+        # updated_at alone and split / page them here
+        changed = base.filter(JournalEntries.updated_at >= updated_since).all()
+        upcoming = [row for row in changed if row.date >= today] if after is None else []
+        rows = [row for row in changed if row.date < today and (after is None or (row.date, row.id) < after)]
+        upcoming.sort(key=lambda row: (row.date, row.id))
+        rows.sort(key=lambda row: (row.date, row.id), reverse=True)
+        if limit:
+            rows = rows[:limit + 1]
+    else:
+        upcoming = []
+        if after is None:
+            upcoming = (
+                base.filter(JournalEntries.date >= today)
+                .order_by(JournalEntries.date.asc(), JournalEntries.id.asc())
+                .all()
+            )
+        past_q = base.filter(JournalEntries.date < today)
+        if after is not None:
+            after_date, after_id = after
+            past_q = past_q.filter(
+                or_(
+                    JournalEntries.date < after_date,
+                    and_(JournalEntries.date == after_date, JournalEntries.id < after_id),
+                )
+            )
+        past_q = past_q.order_by(JournalEntries.date.desc(), JournalEntries.id.desc())
+        rows = past_q.limit(limit + 1).all() if limit else past_q.all()
+    
     future: List[JournalEntryOut] = []
     today_list: List[JournalEntryOut] = []
-    past: List[JournalEntryOut] = []
-    for row in rows:
+    for row in upcoming:
         item = _row_to_schema(row)
-        if item.date > today:
-            future.append(item)
-        elif item.date == today:
-            today_list.append(item)
-        else:
-            past.append(item)
-    past.sort(key=lambda e: (e.date, e.id), reverse=True)
+        (future if item.date > today else today_list).append(item)
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1].date.isoformat(), rows[-1].id])
+    past = [_row_to_schema(row) for row in rows]
     
-    # FIX Issues #1 & #4: Calculate stats from ActivitySessions
-    day_streak = _calculate_day_streak(q, user_hash)
-    activities_completed = _calculate_activities_completed(q, user_hash)
+    # Stats from the user_daily_stats rollup (one row per active day)
+    day_streak, activities_completed = engagement_rollup.get_streak_and_total(q, user_hash, today)
     
     # FIX Issues #1 & #4: Log stats for debugging
     print(f"[journal] Timeline stats for user {user_hash}: day_streak={day_streak}, activities_completed={activities_completed}")
@@ -126,6 +216,8 @@ def get_journal_timeline(
         "future": [_entry_to_dict(e) for e in future],
         "today": [_entry_to_dict(e) for e in today_list],
         "past": [_entry_to_dict(e) for e in past],
+        "next_cursor": next_cursor,
+        "synced_at": synced_at.isoformat(),
         "stats": {
             "day_streak": day_streak,
             "activities_completed": activities_completed,
@@ -147,84 +239,14 @@ def _entry_to_dict(entry: JournalEntryOut) -> Dict[str, Any]:
     }
 
 
-def _calculate_day_streak(q: Session, user_hash: str) -> int:
-    """
-    Calculate consecutive days with completed activities.
-    FIX Issues #1 & #4: Counts from ActivitySessions where status='completed'.
-    """
-    # Get distinct dates with completed activities, ordered descending
-    completed_dates = (
-        q.query(func.date(ActivitySessions.completed_at))
-        .filter(
-            ActivitySessions.user_hash == user_hash,
-            ActivitySessions.status == "completed",
-            ActivitySessions.completed_at.isnot(None),
-        )
-        .distinct()
-        .order_by(func.date(ActivitySessions.completed_at).desc())
-        .all()
-    )
-    
-    if not completed_dates:
-        return 0
-    
-    # Convert to date objects
-    dates = [row[0] for row in completed_dates if row[0] is not None]
-    if not dates:
-        return 0
-    
-    # Handle case where dates might be datetime objects
-    date_set = set()
-    for d in dates:
-        if isinstance(d, datetime):
-            date_set.add(d.date())
-        elif isinstance(d, date):
-            date_set.add(d)
-    
-    if not date_set:
-        return 0
-    
-    today = datetime.utcnow().date()
-    yesterday = today - timedelta(days=1)
-    
-    # Streak must start from today or yesterday
-    if today not in date_set and yesterday not in date_set:
-        return 0
-    
-    # Start counting from the most recent day in streak
-    start_date = today if today in date_set else yesterday
-    streak = 0
-    current_date = start_date
-    
-    while current_date in date_set:
-        streak += 1
-        current_date -= timedelta(days=1)
-    
-    return streak
-
-
-def _calculate_activities_completed(q: Session, user_hash: str) -> int:
-    """
-    Count total completed activities for user.
-    FIX Issues #1 & #4: Counts from ActivitySessions where status='completed'.
-    """
-    count = (
-        q.query(func.count(ActivitySessions.id))
-        .filter(
-            ActivitySessions.user_hash == user_hash,
-            ActivitySessions.status == "completed",
-        )
-        .scalar()
-    )
-    return count or 0
-
-
 @r.patch("/api/journey/journal/{entry_id}", response_model=JournalEntryOut)
 def update_journal_entry(
     entry_id: int,
     x: JournalEntryUpdateIn,
     q: Session = Depends(db),
 ):
+    # Write any pending autosave first so this edit lands on top of it
+    autosave.release("journal", entry_id)
     row = q.query(JournalEntries).filter(JournalEntries.id == entry_id).first()
     if not row:
         raise HTTPException(status_code=404, detail="Journal entry not found")
@@ -244,47 +266,31 @@ def update_journal_entry(
 # ---------- CHANGE #1: Auto-save endpoint for typewriter journal ----------
 
 @r.post("/api/journey/journal/autosave", response_model=JournalAutoSaveOut)
-def autosave_journal_entry(x: JournalAutoSaveIn, q: Session = Depends(db)):
+def autosave_journal_entry(x: JournalAutoSaveIn):
     """
     Auto-save endpoint for the typewriter journal.
     Creates or updates a 'daily_reflection' entry for the given date.
     If an entry already exists for that user and date, it updates the body.
     Otherwise, it creates a new entry.
+    
+    Saves are coalesced (see services/autosave.py): the entry is written at
+    most every few seconds, or right away with flush=true.
     """
     entry_date: date = x.entry_date or datetime.utcnow().date()
     
-    # Look for existing daily_reflection entry for this user and date
-    existing = (
-        q.query(JournalEntries)
-        .filter(
-            JournalEntries.user_hash == x.user_hash,
-            JournalEntries.entry_type == "daily_reflection",
-            JournalEntries.date == entry_date,
+    try:
+        saved = autosave.save(
+            autosave.journal_key(x.user_hash, entry_date), x.body, version=x.version, flush=x.flush
         )
-        .first()
-    )
-    
-    if existing:
-        # Update existing entry
-        existing.body = x.body
-        q.commit()
-        q.refresh(existing)
-        return JournalAutoSaveOut(id=existing.id, saved=True, date=existing.date)
-    else:
-        # Create new entry
-        row = JournalEntries(
-            user_hash=x.user_hash,
-            session_id=None,
-            entry_type="daily_reflection",
-            title="Daily Reflection",
-            body=x.body,
-            meta_json=None,
-            date=entry_date,
+    except autosave.StaleDraft as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A newer draft (version {e.current_version}) was already saved",
+            headers={"X-Draft-Version": str(e.current_version)},
         )
-        q.add(row)
-        q.commit()
-        q.refresh(row)
-        return JournalAutoSaveOut(id=row.id, saved=True, date=row.date)
+    return JournalAutoSaveOut(
+        id=saved["id"], saved=True, date=saved["date"], version=saved["version"], pending=saved["pending"]
+    )
 
 
 @r.get("/api/journey/journal/today", response_model=Optional[JournalEntryOut])
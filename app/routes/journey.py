@@ -5,10 +5,12 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydub import AudioSegment
 
 from ..schemas import IntakeIn, GenerateOut
+from ..auth_utils import get_async_db
 from ..db import SessionLocal
 from ..models import Sessions, Scripts, Activities, ActivitySessions, Users, MiniCheckins, TherapistPatients, TherapistAIGuidance, PreGeneratedAudio, StimuliSuggestion
 from ..services import prompt as pr
@@ -624,9 +626,9 @@ def _extract_youtube_video_id(url: str) -> Optional[str]:
 
 
 @r.get("/api/journey/video-suggestion")
-def get_video_suggestion(
+async def get_video_suggestion(
     user_hash: str = Query(..., description="User hash to get video suggestion for"),
-    q: Session = Depends(db),
+    q: AsyncSession = Depends(get_async_db),
 ):
     """
     Get today's video suggestion based on ML predictions.
@@ -642,7 +644,14 @@ def get_video_suggestion(
         - journey_day: int - current journey day
         - video: dict with stimulus_name, stimulus_url, embed_url, description, etc.
         - session_id: str - new session ID for tracking this video session
+
+    Async handler; the lookups and the session insert run on the async engine
+    via run_sync.
     """
+    return await q.run_sync(_video_suggestion, user_hash)
+
+
+def _video_suggestion(q: Session, user_hash: str) -> dict:
     try:
         # Get user
         user = q.query(Users).filter(Users.user_hash == user_hash).first()
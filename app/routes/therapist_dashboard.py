@@ -11,13 +11,16 @@ from datetime import datetime, timedelta, date
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 
-from app.db import SessionLocal
+from app.db import async_read_session, read_session
 from app import models, schemas
+from app.services import caseload_metrics, dashboard_cache, therapist_summary
 from app.auth_utils import (
     get_current_therapist,
+    get_current_therapist_async,
     verify_therapist_patient_access,
     get_patient_by_id,
 )
@@ -28,129 +31,19 @@ r = APIRouter(prefix="/api/therapist/dashboard", tags=["therapist-dashboard"])
 
 
 def get_db():
-    db = SessionLocal()
+    # Dashboard views are read-mostly: reads go to the replica when configured
+    db = read_session()
     try:
         yield db
     finally:
         db.close()
 
 
-# =============================================================================
-# HELPER FUNCTIONS
-# =============================================================================
-
-
-def _get_patient_last_active(db: Session, user_id: int, user_hash: str) -> Optional[datetime]:
-    """Get the most recent activity timestamp for a patient."""
-    # Check multiple tables for last activity
-    
-    # Last journal entry
-    last_journal = (
-        db.query(func.max(models.JournalEntries.created_at))
-        .filter(models.JournalEntries.user_hash == user_hash)
-        .scalar()
-    )
-    
-    # Last activity session
-    last_activity = (
-        db.query(func.max(models.ActivitySessions.created_at))
-        .filter(models.ActivitySessions.user_hash == user_hash)
-        .scalar()
-    )
-    
-    # Last session (audio journey)
-    last_session = (
-        db.query(func.max(models.Sessions.created_at))
-        .filter(models.Sessions.user_hash == user_hash)
-        .scalar()
-    )
-    
-    # Return the most recent
-    timestamps = [t for t in [last_journal, last_activity, last_session] if t]
-    return max(timestamps) if timestamps else None
-
-
-def _get_activities_count(db: Session, user_hash: str, days: int = 7) -> int:
-    """Get count of activities completed in the last N days."""
-    cutoff = datetime.utcnow() - timedelta(days=days)
-    
-    count = (
-        db.query(func.count(models.ActivitySessions.id))
-        .filter(
-            models.ActivitySessions.user_hash == user_hash,
-            models.ActivitySessions.status == "completed",
-            models.ActivitySessions.completed_at >= cutoff,
-        )
-        .scalar()
-    )
-    
-    return count or 0
-
-
-def _get_activities_previous_period(db: Session, user_hash: str, days: int = 7) -> int:
-    """Get count of activities completed in the previous period (for comparison)."""
-    cutoff_end = datetime.utcnow() - timedelta(days=days)
-    cutoff_start = cutoff_end - timedelta(days=days)
-    
-    count = (
-        db.query(func.count(models.ActivitySessions.id))
-        .filter(
-            models.ActivitySessions.user_hash == user_hash,
-            models.ActivitySessions.status == "completed",
-            models.ActivitySessions.completed_at >= cutoff_start,
-            models.ActivitySessions.completed_at < cutoff_end,
-        )
-        .scalar()
-    )
-    
-    return count or 0
-
-
-def _get_latest_phq9_score(db: Session, user_hash: str) -> Optional[int]:
-    """Get the total PHQ-9 score from latest intake."""
-    intake = (
-        db.query(models.ClinicalIntake)
-        .filter(models.ClinicalIntake.user_hash == user_hash)
-        .order_by(models.ClinicalIntake.created_at.desc())
-        .first()
-    )
-    
-    if not intake:
-        return None
-    
-    total = (
-        db.query(func.sum(models.Phq9ItemResponse.score))
-        .filter(models.Phq9ItemResponse.intake_id == intake.id)
-        .scalar()
-    )
-    
-    return total
-
-
-def _get_latest_journal_quote(db: Session, user_hash: str) -> tuple[Optional[str], Optional[date]]:
-    """Get the most recent meaningful journal entry quote."""
-    # Look for journal or reflection entries
-    entry = (
-        db.query(models.JournalEntries)
-        .filter(
-            models.JournalEntries.user_hash == user_hash,
-            models.JournalEntries.entry_type.in_(["journal", "reflection"]),
-            models.JournalEntries.body.isnot(None),
-            func.length(models.JournalEntries.body) > 20,
-        )
-        .order_by(models.JournalEntries.created_at.desc())
-        .first()
-    )
-    
-    if not entry:
-        return None, None
-    
-    # Truncate if too long
-    quote = entry.body
-    if len(quote) > 200:
-        quote = quote[:197] + "..."
-    
-    return quote, entry.date
+async def get_async_db():
+    # Async views (stats, attention, heatmap): same replica routing, on the
+    # async engines
+    async with async_read_session() as db:
+        yield db
 
 
 # =============================================================================
@@ -159,9 +52,9 @@ def _get_latest_journal_quote(db: Session, user_hash: str) -> tuple[Optional[str
 
 
 @r.get("/stats", response_model=schemas.DashboardStatsOut)
-def get_dashboard_stats(
-    current_therapist: models.Therapists = Depends(get_current_therapist),
-    db: Session = Depends(get_db),
+async def get_dashboard_stats(
+    current_therapist: models.Therapists = Depends(get_current_therapist_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get quick stats for the therapist dashboard.
@@ -171,7 +64,18 @@ def get_dashboard_stats(
     - Total activities this week (across all patients)
     - Patients needing attention count
     - Pending invites count
+    
+    Served from the per-therapist snapshot cache when fresh.
     """
+    return await dashboard_cache.get_or_compute_async(
+        current_therapist.id,
+        "stats",
+        lambda: db.run_sync(_compute_dashboard_stats, current_therapist),
+        schemas.DashboardStatsOut,
+    )
+
+
+def _compute_dashboard_stats(db: Session, current_therapist: models.Therapists) -> schemas.DashboardStatsOut:
     # Active patients count
     active_patients = (
         db.query(func.count(models.TherapistPatients.id))
@@ -214,11 +118,15 @@ def get_dashboard_stats(
     need_attention = 0
     inactive_threshold = datetime.utcnow() - timedelta(days=3)
     
+    # All per-patient metrics in a fixed number of grouped queries
+    metrics = caseload_metrics.get_caseload_metrics(db, patient_hashes, days=7)
+    
     for link, user in patient_links:
-        last_active = _get_patient_last_active(db, user.id, user.user_hash)
-        activities = _get_activities_count(db, user.user_hash, days=7)
-        prev_activities = _get_activities_previous_period(db, user.user_hash, days=7)
-        phq9_score = _get_latest_phq9_score(db, user.user_hash)
+        m = metrics[user.user_hash]
+        last_active = m.last_active
+        activities = m.activities_this_period
+        prev_activities = m.activities_previous_period
+        phq9_score = m.phq9_score
         
         # Check for attention needed
         if last_active is None or last_active < inactive_threshold:
@@ -254,9 +162,9 @@ def get_dashboard_stats(
 
 
 @r.get("/attention", response_model=schemas.AttentionListOut)
-def get_attention_needed(
-    current_therapist: models.Therapists = Depends(get_current_therapist),
-    db: Session = Depends(get_db),
+async def get_attention_needed(
+    current_therapist: models.Therapists = Depends(get_current_therapist_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get list of patients needing attention.
@@ -264,7 +172,18 @@ def get_attention_needed(
     Returns two lists:
     - urgent: Low activity, inactive, high PHQ-9
     - positive: Milestones, achievements
+    
+    Served from the per-therapist snapshot cache when fresh.
     """
+    return await dashboard_cache.get_or_compute_async(
+        current_therapist.id,
+        "attention",
+        lambda: db.run_sync(_compute_attention_needed, current_therapist),
+        schemas.AttentionListOut,
+    )
+
+
+def _compute_attention_needed(db: Session, current_therapist: models.Therapists) -> schemas.AttentionListOut:
     # Get all active patients
     patient_links = (
         db.query(models.TherapistPatients, models.Users)
@@ -281,11 +200,18 @@ def get_attention_needed(
     
     inactive_threshold = datetime.utcnow() - timedelta(days=3)
     
+    # All per-patient metrics in a fixed number of grouped queries
+    patient_hashes = [user.user_hash for link, user in patient_links]
+    metrics = caseload_metrics.get_caseload_metrics(db, patient_hashes, days=7)
+    social = caseload_metrics.get_social_activity_map(db, patient_hashes)
+    streaks = caseload_metrics.get_recent_streak_map(db, patient_hashes, days=7)
+    
     for link, user in patient_links:
-        last_active = _get_patient_last_active(db, user.id, user.user_hash)
-        activities_this_week = _get_activities_count(db, user.user_hash, days=7)
-        activities_last_week = _get_activities_previous_period(db, user.user_hash, days=7)
-        phq9_score = _get_latest_phq9_score(db, user.user_hash)
+        m = metrics[user.user_hash]
+        last_active = m.last_active
+        activities_this_week = m.activities_this_period
+        activities_last_week = m.activities_previous_period
+        phq9_score = m.phq9_score
         
         # Calculate days since last active
         days_inactive = None
@@ -348,22 +274,11 @@ def get_attention_needed(
         # Check for POSITIVE conditions (milestones)
         
         # 1. First social activity
-        social_activities = (
-            db.query(models.ActivitySessions)
-            .join(models.Activities, models.Activities.id == models.ActivitySessions.activity_id)
-            .filter(
-                models.ActivitySessions.user_hash == user.user_hash,
-                models.ActivitySessions.status == "completed",
-                models.Activities.life_area.ilike("%social%"),
-            )
-            .order_by(models.ActivitySessions.completed_at.desc())
-            .limit(2)
-            .all()
-        )
+        social_stats = social.get(user.user_hash)
         
-        if len(social_activities) == 1:
+        if social_stats and social_stats.count == 1:
             # First social activity ever!
-            completed_at = social_activities[0].completed_at
+            completed_at = social_stats.last_completed_at
             if completed_at and (datetime.utcnow() - completed_at).days <= 3:
                 positive.append(schemas.AttentionItemOut(
                     patient_id=user.id,
@@ -382,24 +297,7 @@ def get_attention_needed(
                 continue
         
         # 2. Activity streak (5+ days in a row)
-        streak_count = 0
-        today = date.today()
-        for i in range(7):
-            check_date = today - timedelta(days=i)
-            has_activity = (
-                db.query(models.ActivitySessions)
-                .filter(
-                    models.ActivitySessions.user_hash == user.user_hash,
-                    models.ActivitySessions.status == "completed",
-                    func.date(models.ActivitySessions.completed_at) == check_date,
-                )
-                .first()
-            ) is not None
-            
-            if has_activity:
-                streak_count += 1
-            else:
-                break
+        streak_count = streaks.get(user.user_hash, 0)
         
         if streak_count >= 5:
             positive.append(schemas.AttentionItemOut(
@@ -460,141 +358,23 @@ def get_patient_ai_summary(
     - What's working well
     - Potential focus areas for next session
     - Recent journal insight
+    
+    Served from the materialized summary (therapist_summary.get_patient_summary),
+    regenerated only when the patient's data has changed since it was stored.
     """
     # Verify access
     link = verify_therapist_patient_access(current_therapist, patient_id, db)
     patient = get_patient_by_id(patient_id, db)
     
-    # Gather data for summary
-    activities_this_week = _get_activities_count(db, patient.user_hash, days=7)
-    activities_last_week = _get_activities_previous_period(db, patient.user_hash, days=7)
-    
-    # Get activity details for this week
-    cutoff = datetime.utcnow() - timedelta(days=7)
-    recent_activities = (
-        db.query(models.ActivitySessions, models.Activities)
-        .join(models.Activities, models.Activities.id == models.ActivitySessions.activity_id)
-        .filter(
-            models.ActivitySessions.user_hash == patient.user_hash,
-            models.ActivitySessions.status == "completed",
-            models.ActivitySessions.completed_at >= cutoff,
-        )
-        .order_by(models.ActivitySessions.completed_at.desc())
-        .all()
-    )
-    
-    # Get life areas distribution
-    life_areas = {}
-    for activity_session, activity in recent_activities:
-        area = activity.life_area or "Other"
-        life_areas[area] = life_areas.get(area, 0) + 1
-    
-    # Get journal entries
-    recent_journals = (
-        db.query(models.JournalEntries)
-        .filter(
-            models.JournalEntries.user_hash == patient.user_hash,
-            models.JournalEntries.created_at >= cutoff,
-        )
-        .order_by(models.JournalEntries.created_at.desc())
-        .all()
-    )
-    
-    # Get clinical intake for context
-    intake = (
-        db.query(models.ClinicalIntake)
-        .filter(models.ClinicalIntake.user_hash == patient.user_hash)
-        .order_by(models.ClinicalIntake.created_at.desc())
-        .first()
-    )
-    
-    # Build weekly summary
-    activity_trend = "stable"
-    if activities_last_week > 0:
-        if activities_this_week > activities_last_week:
-            activity_trend = "up"
-        elif activities_this_week < activities_last_week:
-            activity_trend = "down"
-    
-    patient_name = patient.name.split()[0] if patient.name else "Patient"
-    
-    if activity_trend == "up":
-        weekly_summary = f"{patient_name} completed {activities_this_week} activities this week, up from {activities_last_week} last week. "
-    elif activity_trend == "down":
-        weekly_summary = f"{patient_name} completed {activities_this_week} activities this week, down from {activities_last_week} last week. "
-    else:
-        weekly_summary = f"{patient_name} completed {activities_this_week} activities this week. "
-    
-    # Add life area insights
-    if life_areas:
-        top_area = max(life_areas, key=life_areas.get)
-        avoided_areas = []
-        
-        if intake and intake.life_area:
-            target_area = intake.life_area
-            if target_area not in life_areas or life_areas.get(target_area, 0) == 0:
-                avoided_areas.append(target_area)
-        
-        weekly_summary += f"Most active in {top_area.lower()} activities. "
-        
-        if avoided_areas:
-            weekly_summary += f"No activities logged in {avoided_areas[0].lower()} (their stated focus area)."
-    
-    # Build "what's working"
-    whats_working = ""
-    
-    # Check for consistent activities
-    consistent_types = [area for area, count in life_areas.items() if count >= 3]
-    if consistent_types:
-        whats_working = f"{consistent_types[0]} activities remain consistent. "
-    
-    # Check for positive journal sentiment
-    positive_journals = [j for j in recent_journals if j.body and any(
-        word in j.body.lower() for word in ["better", "good", "helped", "progress", "happy", "proud"]
-    )]
-    
-    if positive_journals:
-        whats_working += f"Positive reflections noted in {len(positive_journals)} journal entries. "
-    
-    if not whats_working:
-        whats_working = "Building foundation with initial activities. Engagement with the app shows commitment to the process."
-    
-    # Build focus areas
-    focus_areas = ""
-    
-    if activity_trend == "down" and activities_last_week > 0:
-        drop_pct = int((1 - activities_this_week / activities_last_week) * 100)
-        focus_areas = f"Activity dropped {drop_pct}%. Explore what changed this week. "
-    
-    if avoided_areas:
-        focus_areas += f"Avoidance pattern around {avoided_areas[0].lower()} activities. Consider smaller steps in this area. "
-    
-    # Check for schema patterns
-    if intake:
-        schema_items = (
-            db.query(models.SchemaItemResponse)
-            .filter(models.SchemaItemResponse.intake_id == intake.id)
-            .order_by(models.SchemaItemResponse.score.desc())
-            .limit(2)
-            .all()
-        )
-        
-        if schema_items and schema_items[0].score >= 4:
-            focus_areas += f"High score on '{schema_items[0].schema_key}' schema - may be influencing avoidance."
-    
-    if not focus_areas:
-        focus_areas = "Maintain current momentum. Consider introducing slightly more challenging activities as confidence builds."
-    
-    # Get journal insight
-    journal_insight, journal_date = _get_latest_journal_quote(db, patient.user_hash)
+    summary = therapist_summary.get_patient_summary(db, patient.user_hash, patient.name)
     
     return schemas.PatientAISummaryOut(
-        weekly_summary=weekly_summary.strip(),
-        whats_working=whats_working.strip(),
-        focus_areas=focus_areas.strip(),
-        journal_insight=journal_insight,
-        journal_insight_date=journal_date,
-        generated_at=datetime.utcnow(),
+        weekly_summary=summary.weekly_summary,
+        whats_working=summary.whats_working,
+        focus_areas=summary.focus_areas,
+        journal_insight=summary.journal_insight,
+        journal_insight_date=summary.journal_insight_date,
+        generated_at=summary.generated_at,
     )
 
 
@@ -604,17 +384,23 @@ def get_patient_ai_summary(
 
 
 @r.get("/patients/{patient_id}/activity-heatmap", response_model=schemas.ActivityHeatmapOut)
-def get_activity_heatmap(
+async def get_activity_heatmap(
     patient_id: int,
     days: int = 14,
-    current_therapist: models.Therapists = Depends(get_current_therapist),
-    db: Session = Depends(get_db),
+    current_therapist: models.Therapists = Depends(get_current_therapist_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get activity heatmap data for a patient.
     
     Returns activity level for each day in the specified period.
     """
+    return await db.run_sync(_activity_heatmap, current_therapist, patient_id, days)
+
+
+def _activity_heatmap(
+    db: Session, current_therapist: models.Therapists, patient_id: int, days: int
+) -> schemas.ActivityHeatmapOut:
     # Verify access
     link = verify_therapist_patient_access(current_therapist, patient_id, db)
     patient = get_patient_by_id(patient_id, db)
@@ -625,19 +411,25 @@ def get_activity_heatmap(
     heatmap_days = []
     total_activities = 0
     
+    # One range query over the period (served by the user_hash/status/completed_at
+    # index), bucketed per day here
+    completed = (
+        db.query(models.ActivitySessions.completed_at)
+        .filter(
+            models.ActivitySessions.user_hash == patient.user_hash,
+            models.ActivitySessions.status == "completed",
+            models.ActivitySessions.completed_at >= datetime.combine(period_start, datetime.min.time()),
+            models.ActivitySessions.completed_at < datetime.combine(today + timedelta(days=1), datetime.min.time()),
+        )
+        .all()
+    )
+    counts_by_day = {}
+    for (completed_at,) in completed:
+        counts_by_day[completed_at.date()] = counts_by_day.get(completed_at.date(), 0) + 1
+    
     for i in range(days):
         check_date = period_start + timedelta(days=i)
-        
-        # Count activities on this date
-        activity_count = (
-            db.query(func.count(models.ActivitySessions.id))
-            .filter(
-                models.ActivitySessions.user_hash == patient.user_hash,
-                models.ActivitySessions.status == "completed",
-                func.date(models.ActivitySessions.completed_at) == check_date,
-            )
-            .scalar()
-        ) or 0
+        activity_count = counts_by_day.get(check_date, 0)
         
         total_activities += activity_count
         
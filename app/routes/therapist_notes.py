@@ -15,6 +15,7 @@ from sqlalchemy import func
 
 from app.db import SessionLocal
 from app import models, schemas
+from app.services import autosave
 from app.auth_utils import (
     get_current_therapist,
     verify_therapist_patient_access,
@@ -34,6 +35,21 @@ def get_db():
         db.close()
 
 
+def _note_out(note: models.TherapistNotes) -> schemas.TherapistNoteOut:
+    # A draft still held by the autosave coalescer is newer than the row
+    draft = autosave.pending_text("note", note.id)
+    return schemas.TherapistNoteOut(
+        id=note.id,
+        therapist_id=note.therapist_id,
+        patient_user_id=note.patient_user_id,
+        note_text=note.note_text if draft is None else draft,
+        session_date=note.session_date,
+        note_type=note.note_type,
+        created_at=note.created_at,
+        updated_at=note.updated_at,
+    )
+
+
 # =============================================================================
 # LIST NOTES FOR A PATIENT
 # =============================================================================
@@ -75,16 +91,7 @@ def list_patient_notes(
     
     return schemas.TherapistNoteListOut(
         notes=[
-            schemas.TherapistNoteOut(
-                id=note.id,
-                therapist_id=note.therapist_id,
-                patient_user_id=note.patient_user_id,
-                note_text=note.note_text,
-                session_date=note.session_date,
-                note_type=note.note_type,
-                created_at=note.created_at,
-                updated_at=note.updated_at,
-            )
+            _note_out(note)
             for note in notes
         ]
     )
@@ -124,16 +131,7 @@ def get_note(
             detail="Note not found",
         )
     
-    return schemas.TherapistNoteOut(
-        id=note.id,
-        therapist_id=note.therapist_id,
-        patient_user_id=note.patient_user_id,
-        note_text=note.note_text,
-        session_date=note.session_date,
-        note_type=note.note_type,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
-    )
+    return _note_out(note)
 
 
 # =============================================================================
@@ -180,16 +178,7 @@ def create_note(
     db.commit()
     db.refresh(note)
     
-    return schemas.TherapistNoteOut(
-        id=note.id,
-        therapist_id=note.therapist_id,
-        patient_user_id=note.patient_user_id,
-        note_text=note.note_text,
-        session_date=note.session_date,
-        note_type=note.note_type,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
-    )
+    return _note_out(note)
 
 
 # =============================================================================
@@ -236,6 +225,10 @@ def update_note(
             detail="Note not found",
         )
     
+    # Write any pending autosave first so this edit lands on top of it
+    if autosave.release("note", note.id):
+        db.refresh(note)
+    
     # Update fields
     if payload.note_text is not None:
         note.note_text = payload.note_text.strip()
@@ -255,16 +248,7 @@ def update_note(
     db.commit()
     db.refresh(note)
     
-    return schemas.TherapistNoteOut(
-        id=note.id,
-        therapist_id=note.therapist_id,
-        patient_user_id=note.patient_user_id,
-        note_text=note.note_text,
-        session_date=note.session_date,
-        note_type=note.note_type,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
-    )
+    return _note_out(note)
 
 
 # =============================================================================
@@ -303,6 +287,7 @@ def delete_note(
             detail="Note not found",
         )
     
+    autosave.release("note", note.id, write=False)
     db.delete(note)
     db.commit()
     
@@ -349,16 +334,7 @@ def get_latest_note(
     if not note:
         return None
     
-    return schemas.TherapistNoteOut(
-        id=note.id,
-        therapist_id=note.therapist_id,
-        patient_user_id=note.patient_user_id,
-        note_text=note.note_text,
-        session_date=note.session_date,
-        note_type=note.note_type,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
-    )
+    return _note_out(note)
 
 
 # =============================================================================
@@ -370,9 +346,19 @@ class AutoSaveNoteIn(schemas.BaseModel):
     """Schema for auto-save functionality."""
     note_text: str
     session_date: Optional[date] = None
+    # Client's increasing draft version; older versions are rejected (409)
+    version: Optional[int] = None
+    # Explicit save: write to the database now instead of coalescing
+    flush: bool = False
+
 
+class AutoSaveNoteOut(schemas.TherapistNoteOut):
+    """Saved note plus the draft version; pending while only held in memory."""
+    version: int
+    pending: bool = False
 
-@r.put("/{patient_id}/notes/autosave", response_model=schemas.TherapistNoteOut)
+
+@r.put("/{patient_id}/notes/autosave", response_model=AutoSaveNoteOut)
 def autosave_note(
     patient_id: int,
     payload: AutoSaveNoteIn,
@@ -385,7 +371,9 @@ def autosave_note(
     If a session_note for the given date exists, it will be updated.
     Otherwise, a new note will be created.
     
-    This is designed to support auto-save functionality in the UI.
+    This is designed to support auto-save functionality in the UI. Saves are
+    coalesced (see services/autosave.py): the note is written at most every
+    few seconds, or right away with flush=true.
     """
     # Verify access
     verify_therapist_patient_access(current_therapist, patient_id, db)
@@ -393,44 +381,29 @@ def autosave_note(
     # Use today if no date provided
     note_date = payload.session_date or date.today()
     
-    # Look for existing note for this date
-    existing = (
-        db.query(models.TherapistNotes)
-        .filter(
-            models.TherapistNotes.therapist_id == current_therapist.id,
-            models.TherapistNotes.patient_user_id == patient_id,
-            models.TherapistNotes.note_type == "session_note",
-            models.TherapistNotes.session_date == note_date,
+    try:
+        saved = autosave.save(
+            autosave.note_key(current_therapist.id, patient_id, note_date),
+            payload.note_text.strip(),
+            version=payload.version,
+            flush=payload.flush,
         )
-        .first()
-    )
-    
-    if existing:
-        # Update existing note
-        existing.note_text = payload.note_text.strip()
-        db.commit()
-        db.refresh(existing)
-        note = existing
-    else:
-        # Create new note
-        note = models.TherapistNotes(
-            therapist_id=current_therapist.id,
-            patient_user_id=patient_id,
-            note_text=payload.note_text.strip(),
-            session_date=note_date,
-            note_type="session_note",
+    except autosave.StaleDraft as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A newer draft (version {e.current_version}) was already saved",
+            headers={"X-Draft-Version": str(e.current_version)},
         )
-        db.add(note)
-        db.commit()
-        db.refresh(note)
     
-    return schemas.TherapistNoteOut(
-        id=note.id,
-        therapist_id=note.therapist_id,
-        patient_user_id=note.patient_user_id,
-        note_text=note.note_text,
-        session_date=note.session_date,
-        note_type=note.note_type,
-        created_at=note.created_at,
-        updated_at=note.updated_at,
+    return AutoSaveNoteOut(
+        id=saved["id"],
+        therapist_id=saved["therapist_id"],
+        patient_user_id=saved["patient_user_id"],
+        note_text=saved["text"],
+        session_date=saved["session_date"],
+        note_type=saved["note_type"],
+        created_at=saved["created_at"],
+        updated_at=saved["updated_at"],
+        version=saved["version"],
+        pending=saved["pending"],
     )
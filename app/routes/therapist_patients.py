@@ -6,6 +6,7 @@ Handles patient list, patient detail, invite patients, and manage patient relati
 
 from __future__ import annotations
 
+import base64
 import hashlib
 import uuid
 import json
@@ -14,10 +15,11 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select
 
 from app.db import SessionLocal
 from app import models, schemas
+from app.services import caseload_metrics, dashboard_cache
 from app.auth_utils import (
     get_current_therapist,
     verify_therapist_patient_access,
@@ -107,47 +109,39 @@ def _get_activities_count(db: Session, user_hash: str, days: int = 7) -> int:
         return 0
 
 
-def _get_activity_streak(db: Session, user_hash: str, days: int = 7) -> List[bool]:
-    """Get activity streak for last N days (list of bools, most recent first)."""
-    if not user_hash:
-        return [False] * days
-    
-    today = date.today()
-    streak = []
-    
-    for i in range(days):
-        check_date = today - timedelta(days=i)
-        
-        try:
-            # Check if any activity was completed on this date
-            has_activity = (
-                db.query(models.ActivitySessions)
-                .filter(
-                    models.ActivitySessions.user_hash == user_hash,
-                    models.ActivitySessions.status == "completed",
-                    func.date(models.ActivitySessions.completed_at) == check_date,
-                )
-                .first()
-            ) is not None
-        except Exception:
-            has_activity = False
-        
-        streak.append(has_activity)
+def _build_patient_summaries(
+    db: Session,
+    rows: List[tuple],
+) -> List[schemas.PatientSummaryOut]:
+    """
+    Build list-view summaries for many (link, patient) rows at once.
     
-    # Reverse so oldest is first (matches UI expectation)
-    return list(reversed(streak))
+    Uses a fixed number of grouped queries regardless of how many rows.
+    """
+    hashes = [patient.user_hash for link, patient in rows if patient.user_hash]
+    last_active = caseload_metrics.get_last_active_map(db, hashes, sources=("journal", "activity", "feedback"))
+    counts = caseload_metrics.get_activity_counts_map(db, hashes, days=7)
+    streaks = caseload_metrics.get_activity_days_map(db, hashes, days=7)
+    
+    return [
+        _summary_out(
+            patient,
+            link,
+            last_active=last_active.get(patient.user_hash),
+            activities_this_week=counts.get(patient.user_hash, (0, 0))[0],
+            activity_streak=streaks.get(patient.user_hash, [False] * 7),
+        )
+        for link, patient in rows
+    ]
 
 
-def _build_patient_summary(
-    db: Session,
+def _summary_out(
     patient: models.Users,
     link: models.TherapistPatients,
+    last_active: Optional[datetime],
+    activities_this_week: int,
+    activity_streak: List[bool],
 ) -> schemas.PatientSummaryOut:
-    """Build a patient summary for list views."""
-    last_active = _get_patient_last_active(db, patient.id)
-    activities_this_week = _get_activities_count(db, patient.user_hash, days=7)
-    activity_streak = _get_activity_streak(db, patient.user_hash, days=7)
-    
     return schemas.PatientSummaryOut(
         id=patient.id,
         user_hash=patient.user_hash,
@@ -165,6 +159,100 @@ def _build_patient_summary(
     )
 
 
+def _build_patient_summary(
+    db: Session,
+    patient: models.Users,
+    link: models.TherapistPatients,
+) -> schemas.PatientSummaryOut:
+    """Build a patient summary for list views."""
+    return _build_patient_summaries(db, [(link, patient)])[0]
+
+
+# =============================================================================
+# CURSOR PAGINATION
+# =============================================================================
+
+
+# Sources behind PatientSummaryOut.last_active (see _build_patient_summaries)
+_LAST_ACTIVE_SOURCES = ("journal", "activity", "feedback")
+
+
+def _sort_value(db: Session, query, sort: str):
+    """
+    (query, value column) for a sort field. last_active and activities come
+    from grouped subqueries over the caseload, outer-joined so patients with
+    no rows keep a NULL / 0 value.
+    """
+    if sort == "linked_at":
+        return query, models.TherapistPatients.linked_at
+    caseload = query.with_entities(models.Users.user_hash).subquery()
+    hashes = select(caseload.c.user_hash)
+    if sort == "last_active":
+        sub = caseload_metrics.last_active_subquery(db, hashes, sources=_LAST_ACTIVE_SOURCES)
+        value = sub.c.last_active
+    else:
+        sub = caseload_metrics.activity_count_subquery(hashes, days=7)
+        value = func.coalesce(sub.c.n, 0)
+    return query.outerjoin(sub, sub.c.user_hash == models.Users.user_hash), value
+
+
+def _after_cursor(db: Session, query, sort: str, value, patient_id: int, descending: bool):
+    """
+    Keyset condition for rows after the cursor patient in list order. As in
+    the admin user list, the anchor is read from the database rather than
+    the cursor, so the comparison uses the stored representation of the
+    value. The patient id breaks ties; rows with no value (never active /
+    never linked) sort as the smallest.
+    """
+    anchor_query, anchor_value = _sort_value(db, query, sort)
+    anchor = (
+        anchor_query.with_entities(anchor_value)
+        .filter(models.Users.id == patient_id)
+        .scalar_subquery()
+        .correlate(None)
+    )
+    pid = models.Users.id
+    if descending:
+        return or_(
+            value < anchor,
+            and_(value == anchor, pid < patient_id),
+            and_(anchor.isnot(None), value.is_(None)),
+            and_(anchor.is_(None), value.is_(None), pid < patient_id),
+        )
+    return or_(
+        value > anchor,
+        and_(value == anchor, pid > patient_id),
+        and_(anchor.is_(None), value.isnot(None)),
+        and_(anchor.is_(None), value.is_(None), pid > patient_id),
+    )
+
+
+def _encode_cursor(sort: str, order: str, patient_id: int) -> str:
+    key = [sort, order, patient_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> int:
+    """Patient id after which the page starts; 400 if the cursor is bad or was issued for another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(key, list) or len(key) != 3:
+            raise ValueError("bad cursor shape")
+        cursor_sort, cursor_order, patient_id = key[0], key[1], int(key[2])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match sort",
+        )
+    return patient_id
+
+
 # =============================================================================
 # LIST PATIENTS
 # =============================================================================
@@ -173,6 +261,10 @@ def _build_patient_summary(
 @r.get("", response_model=schemas.PatientListOut)
 def list_patients(
     status_filter: Optional[str] = Query(None, alias="status"),
+    sort: str = Query("linked_at", pattern="^(linked_at|last_active|activities)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
     current_therapist: models.Therapists = Depends(get_current_therapist),
     db: Session = Depends(get_db),
 ):
@@ -180,7 +272,36 @@ def list_patients(
     Get list of all patients for the current therapist.
     
     Optional filter by status: active, paused, discharged
+    
+    Sorting: sort=linked_at (default) | last_active | activities (this week),
+    order=desc (default) | asc. With limit, results are paged; pass the
+    returned next_cursor as ?cursor= to fetch the following page with the
+    same sort and order (a cursor from another sort is rejected with 400).
+    Without limit the whole caseload is returned, as before.
+    
+    Sorting and paging happen in SQL, and summaries for the returned rows
+    come from a fixed number of grouped queries, so the cost does not grow
+    per patient. Each page is served from the per-therapist snapshot cache
+    when fresh.
     """
+    view = f"patients:{status_filter or ''}:{sort}:{order}:{limit or ''}:{cursor or ''}"
+    return dashboard_cache.get_or_compute(
+        current_therapist.id,
+        view,
+        lambda: _compute_patient_list(db, current_therapist, status_filter, sort, order, limit, cursor),
+        schemas.PatientListOut,
+    )
+
+
+def _compute_patient_list(
+    db: Session,
+    current_therapist: models.Therapists,
+    status_filter: Optional[str],
+    sort: str,
+    order: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> schemas.PatientListOut:
     query = (
         db.query(models.TherapistPatients, models.Users)
         .join(models.Users, models.Users.id == models.TherapistPatients.patient_user_id)
@@ -190,24 +311,40 @@ def list_patients(
     if status_filter:
         query = query.filter(models.TherapistPatients.status == status_filter)
     
-    # Order by most recently linked
-    query = query.order_by(models.TherapistPatients.linked_at.desc())
+    total = query.count()
+    
+    # Sort and page in SQL; summaries are built for the page only
+    caseload = query
+    query, value = _sort_value(db, caseload, sort)
+    descending = order == "desc"
+    if cursor:
+        after_id = _decode_cursor(cursor, sort, order)
+        query = query.filter(_after_cursor(db, caseload, sort, value, after_id, descending))
+    if descending:
+        query = query.order_by(value.desc().nulls_last(), models.Users.id.desc())
+    else:
+        query = query.order_by(value.asc().nulls_first(), models.Users.id.asc())
+    
+    rows = query.limit(limit + 1).all() if limit is not None else query.all()
     
-    results = query.all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(sort, order, rows[-1][1].id)
     
-    patients = []
-    for link, patient in results:
-        try:
-            summary = _build_patient_summary(db, patient, link)
-            patients.append(summary)
-        except Exception as e:
-            # Log error but continue with other patients
-            print(f"Error building patient summary for patient {patient.id}: {e}")
-            continue
+    try:
+        summaries = _build_patient_summaries(db, rows)
+    except Exception as e:
+        print(f"Error building patient summaries for therapist {current_therapist.id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build patient list",
+        )
     
     return schemas.PatientListOut(
-        patients=patients,
-        total=len(patients),
+        patients=summaries,
+        total=total,
+        next_cursor=next_cursor,
     )
 
 
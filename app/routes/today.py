@@ -1,71 +1,29 @@
 from __future__ import annotations
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta, date
-from app.auth_utils import get_current_user
-from app.db import SessionLocal
+from app.auth_utils import get_async_db, get_current_user_async
 from app import models, schemas
-from app.services import narrative
+from app.services import narrative, engagement_rollup
 
 r = APIRouter()
 
 
-def db():
-    session = SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-
-
 def calculate_day_streak(q: Session, user_hash: str) -> int:
     """
     Calculate consecutive days with at least one completed activity.
     Counts backwards from today/yesterday.
     FIX Issue #6: Calculate day streak for timeline stats.
     
-    Uses: models.ActivitySessions with user_hash, status, completed_at
+    Uses: models.UserDailyStats (engagement rollup)
     """
     if not user_hash:
         return 0
     
     try:
-        # Query distinct dates with completed activities for this user
-        completed_dates_query = q.query(
-            func.date(models.ActivitySessions.completed_at).label('activity_date')
-        ).filter(
-            models.ActivitySessions.user_hash == user_hash,
-            models.ActivitySessions.status == "completed",
-            models.ActivitySessions.completed_at.isnot(None)
-        ).distinct().order_by(
-            func.date(models.ActivitySessions.completed_at).desc()
-        )
-        
-        completed_dates = [row.activity_date for row in completed_dates_query.all() if row.activity_date]
-        
-        if not completed_dates:
-            return 0
-        
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        
-        # Streak only counts if most recent activity was today or yesterday
-        most_recent = completed_dates[0]
-        if most_recent != today and most_recent != yesterday:
-            return 0
-        
-        # Count consecutive days
-        streak = 1
-        for i in range(1, len(completed_dates)):
-            expected_date = completed_dates[i-1] - timedelta(days=1)
-            if completed_dates[i] == expected_date:
-                streak += 1
-            else:
-                break
-        
-        return streak
-        
+        return engagement_rollup.current_streak(q, user_hash)
     except Exception as e:
         print(f"[today.py] Error calculating day streak: {e}")
         return 0
@@ -95,10 +53,16 @@ def calculate_activities_completed(q: Session, user_hash: str) -> int:
 
 
 @r.get("/api/today", response_model=schemas.TodaySummaryOut)
-def get_today_summary(
-    current_user: models.Users = Depends(get_current_user),
-    q: Session = Depends(db),
+async def get_today_summary(
+    current_user: models.Users = Depends(get_current_user_async),
+    q: AsyncSession = Depends(get_async_db),
 ):
+    # Async handler: the summary queries run on the async engine, holding no
+    # threadpool thread while they wait
+    return await q.run_sync(_today_summary, current_user)
+
+
+def _today_summary(q: Session, current_user: models.Users):
     # Get base summary from narrative service (existing behavior - unchanged)
     summary = narrative.build_today_summary(q, current_user)
     
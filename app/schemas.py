@@ -85,7 +85,7 @@ class JourneyEventIn(BaseModel):
     session_id: str
     user_hash: str | None = None
     event_type: str  # "chills", "insight", "note", etc.
-    t_ms: int = Field(ge=0)  # timestamp within audio in milliseconds
+    t_ms: int = Field(ge=0, le=2**63 - 1)  # timestamp within audio in milliseconds (fits a BIGINT)
     label: str | None = None
     payload: Dict[str, Any] | None = None  # optional extra data (e.g. note text)
 
@@ -597,6 +597,7 @@ class PatientListOut(BaseModel):
     """List of patients for therapist dashboard."""
     patients: List[PatientSummaryOut]
     total: int
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page; None on the last page
 
 
 # --- Invite Schemas ---
@@ -0,0 +1,395 @@
+"""
+Autosave Coalescer
+
+Editors autosave while the user types: the typewriter journal
+(POST /api/journey/journal/autosave) and therapist session notes
+(PUT /api/therapist/patients/{id}/notes/autosave). Each call used to look the
+entry up, UPDATE (or INSERT) it and commit. Instead the latest draft per
+entry is kept in memory and written at most once every FLUSH_SECONDS per
+entry:
+
+- The first save of an entry, or the first after a quiet period, is written
+  immediately, so the caller gets the row id and a save after a pause is
+  durable right away.
+- Later saves inside the window only replace the in-memory draft. A
+  background thread writes the newest draft when the window closes.
+- An explicit save (flush=true), an edit or delete through the regular
+  endpoints, and app shutdown write or drop pending drafts immediately.
+
+Reads of an entry with a pending draft (journal timeline/today, note list/get)
+see the draft text through pending_text().
+
+Versions: every accepted draft has a version. A client may send its own
+increasing version (e.g. an edit counter); a save older than the newest
+accepted one raises StaleDraft (409), so a delayed request cannot overwrite
+newer text. Without a version, saves are last-write-wins.
+
+Drafts are per worker process. A worker that dies without a clean shutdown
+loses at most FLUSH_SECONDS of typing per open entry, and with several
+workers the version check only covers saves that reach the same worker.
+REWIRE_AUTOSAVE_FLUSH_S=0 writes every save through (the old behaviour).
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import SessionLocal
+
+
+FLUSH_SECONDS = float(os.getenv("REWIRE_AUTOSAVE_FLUSH_S", "5"))
+IDLE_SECONDS = float(os.getenv("REWIRE_AUTOSAVE_IDLE_S", "600"))
+
+Key = Tuple[Hashable, ...]
+
+
+class StaleDraft(Exception):
+    """A save carried an older version than the newest accepted draft."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Draft version is older than {current_version}")
+        self.current_version = current_version
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+
+
+def _write_journal(db: Session, key: Key, text: str, row_id: Optional[int]) -> Dict[str, Any]:
+    _, user_hash, entry_date = key
+    row = db.get(models.JournalEntries, row_id) if row_id else None
+    if row is None:
+        row = (
+            db.query(models.JournalEntries)
+            .filter(
+                models.JournalEntries.user_hash == user_hash,
+                models.JournalEntries.entry_type == "daily_reflection",
+                models.JournalEntries.date == entry_date,
+            )
+            .first()
+        )
+    if row is None:
+        row = models.JournalEntries(
+            user_hash=user_hash,
+            session_id=None,
+            entry_type="daily_reflection",
+            title="Daily Reflection",
+            body=text,
+            meta_json=None,
+            date=entry_date,
+        )
+        db.add(row)
+    else:
+        row.body = text
+    db.commit()
+    return {"id": row.id, "date": row.date}
+
+
+def _write_note(db: Session, key: Key, text: str, row_id: Optional[int]) -> Dict[str, Any]:
+    _, therapist_id, patient_id, session_date = key
+    note = db.get(models.TherapistNotes, row_id) if row_id else None
+    if note is None:
+        note = (
+            db.query(models.TherapistNotes)
+            .filter(
+                models.TherapistNotes.therapist_id == therapist_id,
+                models.TherapistNotes.patient_user_id == patient_id,
+                models.TherapistNotes.note_type == "session_note",
+                models.TherapistNotes.session_date == session_date,
+            )
+            .first()
+        )
+    if note is None:
+        note = models.TherapistNotes(
+            therapist_id=therapist_id,
+            patient_user_id=patient_id,
+            note_text=text,
+            session_date=session_date,
+            note_type="session_note",
+        )
+        db.add(note)
+    else:
+        note.note_text = text
+    db.commit()
+    db.refresh(note)
+    return {
+        "id": note.id,
+        "therapist_id": note.therapist_id,
+        "patient_user_id": note.patient_user_id,
+        "session_date": note.session_date,
+        "note_type": note.note_type,
+        "created_at": note.created_at,
+        "updated_at": note.updated_at,
+    }
+
+
+_WRITERS: Dict[str, Callable[[Session, Key, str, Optional[int]], Dict[str, Any]]] = {
+    "journal": _write_journal,
+    "note": _write_note,
+}
+
+
+def journal_key(user_hash: str, entry_date: date) -> Key:
+    return ("journal", user_hash, entry_date)
+
+
+def note_key(therapist_id: int, patient_id: int, session_date: date) -> Key:
+    return ("note", therapist_id, patient_id, session_date)
+
+
+# =============================================================================
+# DRAFTS
+# =============================================================================
+
+
+@dataclass
+class _Draft:
+    key: Key
+    text: str = ""
+    version: int = 0
+    # Accepted saves, and how many of them the database has seen
+    seq: int = 0
+    written_seq: int = 0
+    row_id: Optional[int] = None
+    row: Dict[str, Any] = field(default_factory=dict)
+    written_at: float = 0.0
+    touched_at: float = 0.0
+    write_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def dirty(self) -> bool:
+        return self.seq > self.written_seq
+
+
+class _Coalescer:
+    def __init__(self, flush_seconds: float, idle_seconds: float):
+        self.flush_seconds = flush_seconds
+        self.idle_seconds = idle_seconds
+        self._drafts: Dict[Key, _Draft] = {}
+        self._by_row: Dict[Tuple[str, int], Key] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.saves = 0
+        self.writes = 0
+        self.failures = 0
+
+    # -- saving ---------------------------------------------------------------
+
+    def save(self, key: Key, text: str, version: Optional[int], flush: bool) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._cond:
+            draft = self._drafts.get(key)
+            fresh = draft is None
+            if fresh:
+                draft = self._drafts[key] = _Draft(key=key)
+            if version is None:
+                version = draft.version + 1
+            elif not fresh and (version < draft.version or (version == draft.version and text != draft.text)):
+                raise StaleDraft(draft.version)
+            if fresh or text != draft.text:
+                draft.seq += 1
+            draft.text = text
+            draft.version = version
+            draft.touched_at = now
+            self.saves += 1
+            due = (
+                flush
+                or draft.row_id is None
+                or self.flush_seconds <= 0
+                or now - draft.written_at >= self.flush_seconds
+            )
+            if not due:
+                self._ensure_thread()
+                self._cond.notify()
+        if due:
+            try:
+                self._write(draft)
+            except Exception:
+                if draft.row_id is None:
+                    # Nothing was ever stored; the caller sees the error and retries
+                    with self._cond:
+                        self._forget(draft)
+                raise
+        return self._snapshot(draft)
+
+    def _snapshot(self, draft: _Draft) -> Dict[str, Any]:
+        with self._cond:
+            return {**draft.row, "text": draft.text, "version": draft.version, "pending": draft.dirty}
+
+    def _write(self, draft: _Draft) -> None:
+        with draft.write_lock:
+            with self._cond:
+                text, seq, row_id = draft.text, draft.seq, draft.row_id
+                if seq <= draft.written_seq:
+                    return
+            db = SessionLocal()
+            try:
+                row = _WRITERS[draft.key[0]](db, draft.key, text, row_id)
+            except Exception:
+                db.rollback()
+                with self._cond:
+                    self.failures += 1
+                raise
+            finally:
+                db.close()
+            with self._cond:
+                draft.row = row
+                draft.row_id = row["id"]
+                draft.written_seq = max(draft.written_seq, seq)
+                draft.written_at = time.monotonic()
+                self._by_row[(draft.key[0], row["id"])] = draft.key
+                self.writes += 1
+
+    # -- background flush -----------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="autosave-coalescer", daemon=True)
+            self._thread.start()
+
+    def _due(self, now: float) -> Tuple[List[_Draft], Optional[float]]:
+        """Drafts whose window has closed, and when the next one closes."""
+        due, next_at = [], None
+        for key, draft in list(self._drafts.items()):
+            if draft.dirty:
+                at = draft.written_at + self.flush_seconds
+                if at <= now:
+                    due.append(draft)
+                else:
+                    next_at = at if next_at is None else min(next_at, at)
+            elif now - draft.touched_at > self.idle_seconds:
+                self._forget(draft)
+        return due, next_at
+
+    def _forget(self, draft: _Draft) -> None:
+        self._drafts.pop(draft.key, None)
+        if draft.row_id is not None:
+            self._by_row.pop((draft.key[0], draft.row_id), None)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                due, next_at = self._due(time.monotonic())
+                if not due and not self._stopping:
+                    self._cond.wait(None if next_at is None else max(0.0, next_at - time.monotonic()))
+                    continue
+                stopping = self._stopping
+            self._write_all(due)
+            if stopping:
+                return
+
+    def _write_all(self, drafts: List[_Draft]) -> int:
+        written = 0
+        for draft in drafts:
+            try:
+                self._write(draft)
+                written += 1
+            except Exception as e:
+                # Stays dirty; retried when its window next closes
+                with self._cond:
+                    draft.written_at = time.monotonic()
+                print(f"[autosave] Failed to write draft {draft.key}: {e}")
+        return written
+
+    # -- explicit flush / release ---------------------------------------------
+
+    def flush(self, prefix: Key = ()) -> int:
+        """Write every pending draft whose key starts with `prefix`."""
+        with self._cond:
+            drafts = [d for k, d in self._drafts.items() if d.dirty and k[:len(prefix)] == prefix]
+        return self._write_all(drafts)
+
+    def release(self, kind: str, row_id: int, write: bool = True) -> bool:
+        """
+        Before a regular edit or delete of a row: write its pending draft
+        (or drop it when write=False) and forget the draft, so a later
+        autosave looks the row up again. True if a draft was written.
+        """
+        with self._cond:
+            key = self._by_row.get((kind, row_id))
+            draft = self._drafts.get(key) if key else None
+        if draft is None:
+            return False
+        written = write and draft.dirty
+        if written:
+            self._write(draft)
+        with self._cond:
+            self._forget(draft)
+        return written
+
+    def pending_text(self, kind: str, row_id: int) -> Optional[str]:
+        with self._cond:
+            key = self._by_row.get((kind, row_id))
+            draft = self._drafts.get(key) if key else None
+            return draft.text if draft is not None and draft.dirty else None
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "drafts": len(self._drafts),
+                "pending": sum(1 for d in self._drafts.values() if d.dirty),
+                "saves": self.saves,
+                "writes": self.writes,
+                "failures": self.failures,
+                "flush_seconds": self.flush_seconds,
+            }
+
+
+_coalescer = _Coalescer(FLUSH_SECONDS, IDLE_SECONDS)
+atexit.register(_coalescer.stop)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+
+def save(key: Key, text: str, version: Optional[int] = None, flush: bool = False) -> Dict[str, Any]:
+    """
+    Accept a draft for `key` (journal_key / note_key). Returns the row fields
+    from the last write plus text, version and pending (True while the draft
+    is only in memory). Raises StaleDraft for an out-of-date version.
+    """
+    return _coalescer.save(key, text, version, flush)
+
+
+def flush(prefix: Key = ()) -> int:
+    return _coalescer.flush(prefix)
+
+
+def release(kind: str, row_id: int, write: bool = True) -> bool:
+    return _coalescer.release(kind, row_id, write)
+
+
+def pending_text(kind: str, row_id: int) -> Optional[str]:
+    return _coalescer.pending_text(kind, row_id)
+
+
+def stop() -> None:
+    _coalescer.stop()
+
+
+def stats() -> Dict[str, Any]:
+    return _coalescer.stats()
@@ -0,0 +1,317 @@
+"""
+Caseload Metrics Service
+
+Set-based per-patient metrics for therapist views. Every function takes the
+whole list of a therapist's patient user_hashes and answers with a fixed
+number of GROUP BY user_hash queries, so the query count does not grow with
+the size of the caseload:
+- Last active timestamp (max over journal / activity / audio session / feedback)
+- Completed activities this period vs previous period
+- Latest PHQ-9 total
+- Social-activity milestones and recent activity streaks
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select, union_all
+
+from app import models
+
+
+# =============================================================================
+# DATA CLASSES
+# =============================================================================
+
+
+@dataclass
+class PatientMetrics:
+    """Dashboard metrics for one patient."""
+    user_hash: str
+    last_active: Optional[datetime] = None
+    activities_this_period: int = 0
+    activities_previous_period: int = 0
+    phq9_score: Optional[int] = None
+
+
+@dataclass
+class SocialActivityStats:
+    """Completed social activities for one patient."""
+    count: int
+    last_completed_at: Optional[datetime]
+
+
+# =============================================================================
+# LAST ACTIVE
+# =============================================================================
+
+
+def _last_active_query(db: Session, source: str, user_hashes: Sequence[str]):
+    if source == "journal":
+        col = models.JournalEntries.user_hash
+        return db.query(col, func.max(models.JournalEntries.created_at).label("ts")).filter(col.in_(user_hashes)).group_by(col)
+    if source == "activity":
+        col = models.ActivitySessions.user_hash
+        return db.query(col, func.max(models.ActivitySessions.created_at).label("ts")).filter(col.in_(user_hashes)).group_by(col)
+    if source == "session":
+        col = models.Sessions.user_hash
+        return db.query(col, func.max(models.Sessions.created_at).label("ts")).filter(col.in_(user_hashes)).group_by(col)
+    if source == "feedback":
+        col = models.Sessions.user_hash
+        return (
+            db.query(col, func.max(models.Feedback.created_at).label("ts"))
+            .join(models.Sessions, models.Sessions.id == models.Feedback.session_id)
+            .filter(col.in_(user_hashes))
+            .group_by(col)
+        )
+    raise ValueError(f"Unknown last-active source: {source}")
+
+
+def get_last_active_map(
+    db: Session,
+    user_hashes: Sequence[str],
+    sources: Iterable[str] = ("journal", "activity", "session"),
+) -> Dict[str, datetime]:
+    """Most recent timestamp per user across the given sources (one query per source)."""
+    user_hashes = [h for h in set(user_hashes) if h]
+    last_active: Dict[str, datetime] = {}
+    if not user_hashes:
+        return last_active
+
+    for source in sources:
+        for user_hash, ts in _last_active_query(db, source, user_hashes).all():
+            if ts and (user_hash not in last_active or ts > last_active[user_hash]):
+                last_active[user_hash] = ts
+    return last_active
+
+
+def last_active_subquery(
+    db: Session,
+    user_hashes,
+    sources: Iterable[str] = ("journal", "activity", "session"),
+):
+    """
+    (user_hash, last_active) subquery: get_last_active_map in SQL, for
+    sorting and paging on it. user_hashes may be a list or a SELECT.
+    """
+    parts = union_all(*[_last_active_query(db, source, user_hashes).statement for source in sources]).subquery()
+    return (
+        select(parts.c.user_hash, func.max(parts.c.ts).label("last_active"))
+        .group_by(parts.c.user_hash)
+        .subquery()
+    )
+
+
+# =============================================================================
+# ACTIVITY COUNTS
+# =============================================================================
+
+
+def get_activity_counts_map(
+    db: Session,
+    user_hashes: Sequence[str],
+    days: int = 7,
+    now: Optional[datetime] = None,
+) -> Dict[str, Tuple[int, int]]:
+    """
+    (this_period, previous_period) completed activity counts per user.
+
+    This period is completed_at >= now - days; the previous period is the
+    `days` before that. One query for all users.
+    """
+    user_hashes = [h for h in set(user_hashes) if h]
+    if not user_hashes:
+        return {}
+
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+    cutoff_start = cutoff - timedelta(days=days)
+    AS = models.ActivitySessions
+
+    rows = (
+        db.query(
+            AS.user_hash,
+            func.sum(case((AS.completed_at >= cutoff, 1), else_=0)),
+            func.sum(case((AS.completed_at < cutoff, 1), else_=0)),
+        )
+        .filter(
+            AS.user_hash.in_(user_hashes),
+            AS.status == "completed",
+            AS.completed_at >= cutoff_start,
+        )
+        .group_by(AS.user_hash)
+        .all()
+    )
+    return {user_hash: (int(cur or 0), int(prev or 0)) for user_hash, cur, prev in rows}
+
+
+def activity_count_subquery(user_hashes, days: int = 7, now: Optional[datetime] = None):
+    """
+    (user_hash, n) subquery of activities completed in the last `days`: the
+    this-period count of get_activity_counts_map in SQL. user_hashes may be a
+    list or a SELECT.
+    """
+    now = now or datetime.utcnow()
+    AS = models.ActivitySessions
+    return (
+        select(AS.user_hash, func.count(AS.id).label("n"))
+        .where(
+            AS.user_hash.in_(user_hashes),
+            AS.status == "completed",
+            AS.completed_at >= now - timedelta(days=days),
+        )
+        .group_by(AS.user_hash)
+        .subquery()
+    )
+
+
+# =============================================================================
+# PHQ-9
+# =============================================================================
+
+
+def get_latest_phq9_map(db: Session, user_hashes: Sequence[str]) -> Dict[str, Optional[int]]:
+    """PHQ-9 total from each user's latest clinical intake (two queries for all users)."""
+    user_hashes = [h for h in set(user_hashes) if h]
+    if not user_hashes:
+        return {}
+
+    intakes = (
+        db.query(models.ClinicalIntake.id, models.ClinicalIntake.user_hash)
+        .filter(models.ClinicalIntake.user_hash.in_(user_hashes))
+        .order_by(models.ClinicalIntake.created_at.asc(), models.ClinicalIntake.id.asc())
+        .all()
+    )
+    latest_intake = {user_hash: intake_id for intake_id, user_hash in intakes}
+    if not latest_intake:
+        return {}
+
+    totals = dict(
+        db.query(models.Phq9ItemResponse.intake_id, func.sum(models.Phq9ItemResponse.score))
+        .filter(models.Phq9ItemResponse.intake_id.in_(list(latest_intake.values())))
+        .group_by(models.Phq9ItemResponse.intake_id)
+        .all()
+    )
+    return {user_hash: totals.get(intake_id) for user_hash, intake_id in latest_intake.items()}
+
+
+# =============================================================================
+# MILESTONES
+# =============================================================================
+
+
+def get_social_activity_map(db: Session, user_hashes: Sequence[str]) -> Dict[str, SocialActivityStats]:
+    """Count and latest completion of social-life-area activities per user."""
+    user_hashes = [h for h in set(user_hashes) if h]
+    if not user_hashes:
+        return {}
+
+    AS = models.ActivitySessions
+    rows = (
+        db.query(AS.user_hash, func.count(AS.id), func.max(AS.completed_at))
+        .join(models.Activities, models.Activities.id == AS.activity_id)
+        .filter(
+            AS.user_hash.in_(user_hashes),
+            AS.status == "completed",
+            models.Activities.life_area.ilike("%social%"),
+        )
+        .group_by(AS.user_hash)
+        .all()
+    )
+    return {user_hash: SocialActivityStats(count=n, last_completed_at=ts) for user_hash, n, ts in rows}
+
+
+def _active_days_map(
+    db: Session,
+    user_hashes: Sequence[str],
+    days: int,
+    today: date,
+) -> Dict[str, set]:
+    """Days in (today - days, today] with a completed activity, per user (one rollup query)."""
+    user_hashes = [h for h in set(user_hashes) if h]
+    if not user_hashes:
+        return {}
+
+    rows = (
+        db.query(models.UserDailyStats.user_hash, models.UserDailyStats.date)
+        .filter(
+            models.UserDailyStats.user_hash.in_(user_hashes),
+            models.UserDailyStats.date > today - timedelta(days=days),
+            models.UserDailyStats.date <= today,
+            models.UserDailyStats.activities_completed > 0,
+        )
+        .all()
+    )
+    active: Dict[str, set] = {}
+    for user_hash, day in rows:
+        active.setdefault(user_hash, set()).add(day)
+    return active
+
+
+def get_recent_streak_map(
+    db: Session,
+    user_hashes: Sequence[str],
+    days: int = 7,
+    today: Optional[date] = None,
+) -> Dict[str, int]:
+    """
+    Consecutive days with a completed activity counting back from today,
+    capped at `days`. Reads the user_daily_stats rollup in one query.
+    """
+    today = today or datetime.utcnow().date()
+    streaks = {}
+    for user_hash, dates in _active_days_map(db, user_hashes, days, today).items():
+        streak = 0
+        while streak < days and today - timedelta(days=streak) in dates:
+            streak += 1
+        streaks[user_hash] = streak
+    return streaks
+
+
+def get_activity_days_map(
+    db: Session,
+    user_hashes: Sequence[str],
+    days: int = 7,
+    today: Optional[date] = None,
+) -> Dict[str, List[bool]]:
+    """Whether each of the last N days had a completed activity, oldest first, per user."""
+    today = today or datetime.utcnow().date()
+    active = _active_days_map(db, user_hashes, days, today)
+    start = today - timedelta(days=days - 1)
+    return {
+        user_hash: [start + timedelta(days=i) in active.get(user_hash, ()) for i in range(days)]
+        for user_hash in user_hashes
+    }
+
+
+# =============================================================================
+# COMBINED
+# =============================================================================
+
+
+def get_caseload_metrics(
+    db: Session,
+    user_hashes: Sequence[str],
+    days: int = 7,
+    last_active_sources: Iterable[str] = ("journal", "activity", "session"),
+) -> Dict[str, PatientMetrics]:
+    """Last active, activity counts and PHQ-9 for every patient in a fixed number of queries."""
+    last_active = get_last_active_map(db, user_hashes, last_active_sources)
+    counts = get_activity_counts_map(db, user_hashes, days=days)
+    phq9 = get_latest_phq9_map(db, user_hashes)
+
+    metrics = {}
+    for user_hash in user_hashes:
+        cur, prev = counts.get(user_hash, (0, 0))
+        metrics[user_hash] = PatientMetrics(
+            user_hash=user_hash,
+            last_active=last_active.get(user_hash),
+            activities_this_period=cur,
+            activities_previous_period=prev,
+            phq9_score=phq9.get(user_hash),
+        )
+    return metrics
@@ -0,0 +1,240 @@
+"""
+Chills Tap Ingestion
+
+Fast path for "I feel chills!" taps (POST /api/chills/timestamp and
+/api/chills/timestamps/batch). Taps arrive in bursts at emotional peaks, so
+the per-tap work is kept to the insert itself:
+
+- VideoSession ids known to exist are kept in an in-process LRU, so a tap
+  for a session this worker has seen does not look it up again.
+- Stimulus names -> video ids come from an in-process copy of the (small)
+  video_stimuli catalog, refreshed every STIMULUS_TTL seconds, instead of up
+  to three VideoStimulus queries per unknown session.
+- A batch of taps (and any missing VideoSessions) is written in one
+  transaction: one flush and one commit. On PostgreSQL SQLAlchemy sends the
+  flush as a single multi-row INSERT ... RETURNING; SQLite has no way to
+  match RETURNING rows to parameters, so there it is one INSERT per tap, but
+  still a single commit (which is what costs on SQLite).
+
+Rows go through the ORM session, so the engagement rollup and platform
+counter hooks still see every tap.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+SESSION_CACHE_SIZE = int(os.getenv("REWIRE_CHILLS_SESSION_CACHE", "10000"))
+STIMULUS_TTL = float(os.getenv("REWIRE_STIMULUS_CACHE_TTL", "300"))
+
+
+# =============================================================================
+# CACHES
+# =============================================================================
+
+
+class _KnownSessions:
+    """Thread-safe bounded LRU of video_sessions.session_id values that exist."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id in self._ids:
+                self._ids.move_to_end(session_id)
+                return True
+            return False
+
+    def add(self, session_ids: Iterable[str]) -> None:
+        with self._lock:
+            for session_id in session_ids:
+                self._ids[session_id] = None
+                self._ids.move_to_end(session_id)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+class _StimulusCatalog:
+    """(id, stimulus_name) for every stimulus, reloaded after STIMULUS_TTL."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._rows: List[Tuple[int, str]] = []
+        self._by_name: Dict[str, int] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session) -> None:
+        rows = db.execute(
+            select(models.VideoStimulus.id, models.VideoStimulus.stimulus_name).order_by(models.VideoStimulus.id)
+        ).all()
+        by_name: Dict[str, int] = {}
+        for stimulus_id, name in rows:
+            by_name.setdefault(name, stimulus_id)
+        with self._lock:
+            self._rows = [(i, n or "") for i, n in rows]
+            self._by_name = by_name
+            self._loaded_at = time.monotonic()
+
+    def video_id(self, db: Session, video_name: Optional[str]) -> Optional[int]:
+        """
+        Same resolution as the old per-tap queries: exact name, then
+        case-insensitive substring, then the first stimulus as a fallback.
+        """
+        if not self._rows or time.monotonic() - self._loaded_at > self.ttl:
+            self._load(db)
+        with self._lock:
+            rows, by_name = self._rows, self._by_name
+        if not rows:
+            return None
+        if video_name:
+            if video_name in by_name:
+                return by_name[video_name]
+            needle = video_name.lower()
+            for stimulus_id, name in rows:
+                if needle in name.lower():
+                    return stimulus_id
+        return rows[0][0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows, self._by_name, self._loaded_at = [], {}, 0.0
+
+
+_known = _KnownSessions(SESSION_CACHE_SIZE)
+_catalog = _StimulusCatalog(STIMULUS_TTL)
+
+
+def clear_caches() -> None:
+    _known.clear()
+    _catalog.clear()
+
+
+# =============================================================================
+# VIDEO SESSIONS
+# =============================================================================
+
+
+def ensure_video_sessions(
+    db: Session, wanted: Dict[str, Tuple[Optional[str], Optional[str]]]
+) -> Set[str]:
+    """
+    Add a VideoSession for every session_id in `wanted` ({session_id:
+    (user_hash, video_name)}) that does not exist yet, and flush them.
+    Does not commit. Returns the session_ids that were added; call
+    mark_known() with them once the transaction commits.
+    """
+    unknown = [sid for sid in wanted if sid not in _known]
+    if not unknown:
+        return set()
+
+    existing = set(db.execute(
+        select(models.VideoSession.session_id).where(models.VideoSession.session_id.in_(unknown))
+    ).scalars())
+    _known.add(existing)
+
+    created = set()
+    now = datetime.utcnow()
+    for sid in unknown:
+        if sid in existing:
+            continue
+        user_hash, video_name = wanted[sid]
+        video_id = _catalog.video_id(db, video_name)
+        if video_id is None:
+            print(f"[chills] No video found, cannot create VideoSession for {sid}")
+            continue
+        db.add(models.VideoSession(
+            session_id=sid,
+            user_hash=user_hash or "unknown",
+            video_id=video_id,
+            started_at=now,
+            completed=False,
+        ))
+        created.add(sid)
+    if created:
+        # Parent rows first, so the taps' foreign key holds on every backend
+        db.flush()
+        print(f"[chills] Created {len(created)} VideoSession(s): {', '.join(sorted(created))}")
+    return created
+
+
+def mark_known(session_ids: Iterable[str]) -> None:
+    _known.add(session_ids)
+
+
+def is_known(session_id: str) -> bool:
+    return session_id in _known
+
+
+# =============================================================================
+# TAPS
+# =============================================================================
+
+
+def record_taps(db: Session, taps: Sequence) -> List[Dict]:
+    """
+    Insert chills taps (ChillsTimestampIn-like objects) and any VideoSessions
+    they need in one transaction, and commit. Returns one dict per tap with
+    id, session_id, video_time_seconds, video_name and created_at.
+
+    If a concurrent request creates one of the VideoSessions first, the
+    transaction is retried once, finding the session this time.
+    """
+    wanted: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    for tap in taps:
+        wanted.setdefault(tap.session_id, (tap.user_hash, tap.video_name))
+
+    for attempt in range(2):
+        try:
+            created = ensure_video_sessions(db, wanted)
+            now = datetime.utcnow()
+            rows = [
+                models.ChillsTimestamp(
+                    session_id=tap.session_id,
+                    video_time_seconds=tap.video_time_seconds,
+                    video_name=tap.video_name,
+                    user_hash=tap.user_hash,
+                    created_at=now,
+                )
+                for tap in taps
+            ]
+            db.add_all(rows)
+            db.flush()
+            out = [
+                {
+                    "id": row.id,
+                    "session_id": row.session_id,
+                    "video_time_seconds": row.video_time_seconds,
+                    "video_name": row.video_name,
+                    "created_at": row.created_at,
+                }
+                for row in rows
+            ]
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+            continue
+        mark_known(created)
+        return out
+    return []
@@ -0,0 +1,431 @@
+"""
+Cold Archive Service
+
+journey_events, chills_timestamps and body_map_spots are append-only
+telemetry. Rows older than REWIRE_ARCHIVE_AFTER_DAYS are moved out of the
+live database into zstd-compressed Parquet files, one Hive-style month
+partition per table (the same layout as research_export):
+
+    <REWIRE_ARCHIVE_DIR>/<source>/month=2024-03/part-<run>-0.parquet
+
+Only whole months before the cutoff are archived. For each month:
+1. The month's rows are streamed into a new Parquet file.
+2. In one transaction the file is recorded in archive_files, per-session /
+   per-day counts are added to archived_session_counts, and the archived
+   rows are deleted by id.
+A file without an archive_files row (a run that died between 1 and 2) is
+never read, and the next run deletes it. Runs hold a lock (pg_try_advisory_lock
+on Postgres, a flock on <REWIRE_ARCHIVE_DIR>/.archive.lock otherwise), so a
+second concurrent run fails with ArchiveBusy instead of archiving the same
+month twice.
+
+What still sees archived rows:
+- The admin chills / body-map CSV exports, the per-user detail view and
+  complete CSV, and /api/admin/export/research/* append archived rows
+  (iter_archived_rows).
+- /api/chills/count/{session_id}, the admin users list and users CSV,
+  platform counter recompute and the user_daily_stats rebuild add
+  archived_session_counts.
+
+The archive directory must be backed up with the database; the live tables
+no longer hold the rows.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import research_export
+
+
+ARCHIVE_DIR = Path(os.getenv("REWIRE_ARCHIVE_DIR", str(Path(__file__).resolve().parents[2] / "archive")))
+ARCHIVE_AFTER_DAYS = int(os.getenv("REWIRE_ARCHIVE_AFTER_DAYS", "180"))
+DELETE_CHUNK = 500
+_PG_LOCK_KEY = 0x52574152  # "RWAR"
+
+
+class ArchiveBusy(Exception):
+    """Another archive run holds the archive lock."""
+
+
+# =============================================================================
+# SOURCES
+# =============================================================================
+
+
+def _sources() -> Dict[str, research_export.ExportTable]:
+    J = models.JourneyEvent
+    C = models.ChillsTimestamp
+    B = models.BodyMapSpot
+    VS = models.VideoSession
+
+    tables = [
+        research_export.ExportTable(
+            name="journey_events",
+            model=J,
+            columns={
+                "id": J.id,
+                "session_id": J.session_id,
+                "user_hash": J.user_hash,
+                "event_type": J.event_type,
+                "t_ms": J.t_ms,
+                "label": J.label,
+                "payload_json": J.payload_json,
+                "created_at": J.created_at,
+            },
+            partition_column=J.created_at,
+            categorical=("session_id", "user_hash", "event_type", "label"),
+        ),
+        research_export.ExportTable(
+            name="chills",
+            model=C,
+            columns={
+                "id": C.id,
+                "user_hash": func.coalesce(C.user_hash, VS.user_hash),
+                "session_id": C.session_id,
+                "video_time_seconds": C.video_time_seconds,
+                "video_name": C.video_name,
+                "intensity": C.intensity,
+                "created_at": C.created_at,
+            },
+            partition_column=C.created_at,
+            categorical=("user_hash", "session_id", "video_name"),
+            joins=[(VS, VS.session_id == C.session_id)],
+        ),
+        research_export.ExportTable(
+            name="body_map",
+            model=B,
+            columns={
+                "id": B.id,
+                "session_id": B.session_id,
+                "user_hash": VS.user_hash,
+                "x_percent": B.x_percent,
+                "y_percent": B.y_percent,
+                "created_at": B.created_at,
+            },
+            partition_column=B.created_at,
+            categorical=("session_id", "user_hash"),
+            joins=[(VS, VS.session_id == B.session_id)],
+        ),
+    ]
+    return {t.name: t for t in tables}
+
+
+SOURCES = _sources()
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def cutoff_date(older_than_days: int = ARCHIVE_AFTER_DAYS, today: Optional[date] = None) -> date:
+    """First day of the month containing today - older_than_days; rows before it are archivable."""
+    today = today or datetime.utcnow().date()
+    return _month_start(today - timedelta(days=older_than_days))
+
+
+# =============================================================================
+# ARCHIVING
+# =============================================================================
+
+
+@dataclass
+class MonthResult:
+    source: str
+    month: str
+    rows: int
+    path: Optional[str]
+
+
+def _archivable_months(db: Session, table: research_export.ExportTable, cutoff: date) -> List[date]:
+    part = table.partition_column
+    first = db.execute(
+        select(func.min(part)).select_from(table.model).where(
+            part < datetime.combine(cutoff, datetime.min.time())
+        )
+    ).scalar()
+    if first is None:
+        return []
+    if isinstance(first, str):
+        first = datetime.fromisoformat(first)
+    months, month = [], _month_start(first.date() if isinstance(first, datetime) else first)
+    while month < cutoff:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def _add_session_counts(db: Session, source: str, counts: Dict[Tuple, List]) -> None:
+    """Merge {(session_id, day): [user_hash, n, first_at, last_at]} into archived_session_counts."""
+    A = models.ArchivedSessionCounts
+    days = {day for _, day in counts}
+    existing = {
+        (row.session_id, row.date): row
+        for row in db.query(A).filter(A.source == source, A.date >= min(days), A.date <= max(days))
+    }
+    for (session_id, day), (user_hash, n, first_at, last_at) in counts.items():
+        row = existing.get((session_id, day))
+        if row is None:
+            db.add(A(
+                source=source, session_id=session_id, user_hash=user_hash, date=day,
+                row_count=n, first_at=first_at, last_at=last_at,
+            ))
+            continue
+        row.row_count += n
+        row.user_hash = row.user_hash or user_hash
+        row.first_at = min(filter(None, (row.first_at, first_at)), default=None)
+        row.last_at = max(filter(None, (row.last_at, last_at)), default=None)
+
+
+def archive_month(
+    db: Session,
+    source: str,
+    month: date,
+    archive_dir: Optional[Path] = None,
+    dry_run: bool = False,
+) -> MonthResult:
+    """Move one month of one source into a Parquet file (see module docstring)."""
+    table = SOURCES[source]
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    month_key = f"{month.year:04d}-{month.month:02d}"
+    run = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    names = list(table.columns)
+    i_id, i_session, i_user, i_created = (names.index(n) for n in ("id", "session_id", "user_hash", "created_at"))
+
+    writer = research_export._PartitionWriter(
+        archive_dir / source, research_export.arrow_schema(table), "parquet", part=f"part-{run}"
+    )
+    ids: List[int] = []
+    counts: Dict[Tuple, List] = {}
+    try:
+        end = _next_month(month) - timedelta(days=1)
+        for _, rows in research_export.iter_month_rows(db, table, month, end):
+            if dry_run:
+                ids.extend(row[i_id] for row in rows)
+                continue
+            writer.write(month_key, rows)
+            for row in rows:
+                ids.append(row[i_id])
+                created = row[i_created]
+                if isinstance(created, str):
+                    created = datetime.fromisoformat(created)
+                entry = counts.setdefault((row[i_session], created.date()), [row[i_user], 0, created, created])
+                entry[1] += 1
+                entry[2] = min(entry[2], created)
+                entry[3] = max(entry[3], created)
+    finally:
+        writer.close()
+    if dry_run or not ids:
+        return MonthResult(source, month_key, len(ids), None)
+
+    (path, written), = writer.files.items()
+    relative = os.path.relpath(path, archive_dir)
+    try:
+        db.add(models.ArchiveFile(
+            source=source, month=month_key, path=relative, row_count=written,
+            min_id=min(ids), max_id=max(ids), archived_at=datetime.utcnow(),
+        ))
+        _add_session_counts(db, source, counts)
+        id_col = table.model.__table__.c.id
+        for i in range(0, len(ids), DELETE_CHUNK):
+            db.execute(delete(table.model.__table__).where(id_col.in_(ids[i:i + DELETE_CHUNK])))
+        db.commit()
+    except Exception:
+        db.rollback()
+        os.remove(path)
+        raise
+    print(f"[cold_archive] {source} {month_key}: {written} rows -> {relative}")
+    return MonthResult(source, month_key, written, relative)
+
+
+@contextmanager
+def archive_lock(db: Session, archive_dir: Optional[Path] = None):
+    """Hold the cross-process archive lock; raises ArchiveBusy if another run has it."""
+    engine = db.get_bind()
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _PG_LOCK_KEY}).scalar():
+                raise ArchiveBusy("Another archive run is in progress")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _PG_LOCK_KEY})
+        return
+
+    import fcntl
+
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    with open(archive_dir / ".archive.lock", "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ArchiveBusy("Another archive run is in progress")
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def remove_orphans(db: Session, archive_dir: Optional[Path] = None) -> List[str]:
+    """Delete archive files that were written but never recorded (interrupted runs)."""
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    known = {row[0] for row in db.execute(select(models.ArchiveFile.path))}
+    removed = []
+    for path in archive_dir.glob("*/month=*/*.parquet"):
+        relative = os.path.relpath(path, archive_dir)
+        if relative not in known:
+            path.unlink()
+            removed.append(relative)
+    return removed
+
+
+def archive_old_rows(
+    db: Session,
+    sources: Sequence[str] = tuple(SOURCES),
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    archive_dir: Optional[Path] = None,
+    dry_run: bool = False,
+) -> List[MonthResult]:
+    """
+    Archive every whole month before cutoff_date() for each source, under the
+    archive lock, after removing files left by an interrupted run. Empty
+    months are left out of the result.
+    """
+    for source in sources:
+        if source not in SOURCES:
+            raise ValueError(f"Unknown archive source: {source}")
+    cutoff = cutoff_date(older_than_days)
+    results = []
+    with archive_lock(db, archive_dir):
+        if not dry_run:
+            for path in remove_orphans(db, archive_dir):
+                print(f"[cold_archive] Removed unrecorded file {path}")
+        for source in sources:
+            for month in _archivable_months(db, SOURCES[source], cutoff):
+                res = archive_month(db, source, month, archive_dir, dry_run)
+                if res.rows:
+                    results.append(res)
+    return results
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+
+def archived_files(
+    db: Session,
+    source: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_hash: Optional[str] = None,
+) -> List[models.ArchiveFile]:
+    """
+    Recorded files for a source whose month overlaps start..end, oldest month
+    first. With user_hash, only months where archived_session_counts has rows
+    for that user.
+    """
+    A = models.ArchiveFile
+    q = db.query(A).filter(A.source == source)
+    if start:
+        q = q.filter(A.month >= f"{start.year:04d}-{start.month:02d}")
+    if end:
+        q = q.filter(A.month <= f"{end.year:04d}-{end.month:02d}")
+    files = q.order_by(A.month, A.id).all()
+    if user_hash is not None:
+        S = models.ArchivedSessionCounts
+        days = db.query(S.date).filter(S.source == source, S.user_hash == user_hash).distinct()
+        months = {f"{d.year:04d}-{d.month:02d}" for (d,) in days}
+        files = [f for f in files if f.month in months]
+    return files
+
+
+def _row_mask(batch, start: Optional[date], end: Optional[date], user_hash: Optional[str]):
+    mask = None
+    if start:
+        lower = datetime.combine(start, datetime.min.time())
+        mask = pc.greater_equal(batch.column("created_at"), pa.scalar(lower, pa.timestamp("us")))
+    if end:
+        upper = datetime.combine(end + timedelta(days=1), datetime.min.time())
+        below = pc.less(batch.column("created_at"), pa.scalar(upper, pa.timestamp("us")))
+        mask = below if mask is None else pc.and_(mask, below)
+    if user_hash is not None:
+        users = batch.column("user_hash")
+        if pa.types.is_dictionary(users.type):
+            users = users.dictionary_decode()
+        same = pc.fill_null(pc.equal(users, user_hash), False)
+        mask = same if mask is None else pc.and_(mask, same)
+    return mask
+
+
+def iter_archived_rows(
+    db: Session,
+    source: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    newest_first: bool = False,
+    archive_dir: Optional[Path] = None,
+    user_hash: Optional[str] = None,
+    batch_size: int = research_export.BATCH_SIZE,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Yield (month, rows) for archived rows with start <= created_at < end + 1 day
+    (and the given user_hash), at most batch_size rows at a time. Rows are
+    dicts keyed by the source's column names, in (created_at, id) order within
+    each file, or reversed with newest_first.
+
+    Files are read one record batch / row group at a time; archive_month
+    writes one row group per research_export batch, so memory stays bounded
+    by the batch size in both directions.
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    files = archived_files(db, source, start, end, user_hash)
+    if newest_first:
+        files.reverse()
+    for f in files:
+        pf = pq.ParquetFile(archive_dir / f.path)
+        if newest_first:
+            batches = (
+                batch
+                for i in reversed(range(pf.num_row_groups))
+                for batch in reversed(pf.read_row_group(i).to_batches(max_chunksize=batch_size))
+            )
+        else:
+            batches = pf.iter_batches(batch_size=batch_size)
+        for batch in batches:
+            mask = _row_mask(batch, start, end, user_hash)
+            if mask is not None:
+                batch = batch.filter(mask)
+            if not batch.num_rows:
+                continue
+            rows = batch.to_pylist()
+            if newest_first:
+                rows.reverse()
+            yield f.month, rows
+
+
+def archived_count(db: Session, source: str, session_id: str) -> int:
+    """Archived rows for one session, from archived_session_counts."""
+    A = models.ArchivedSessionCounts
+    return int(
+        db.query(func.coalesce(func.sum(A.row_count), 0))
+        .filter(A.source == source, A.session_id == session_id)
+        .scalar()
+    )
@@ -0,0 +1,359 @@
+"""
+Dashboard Snapshot Cache
+
+Per-therapist cache for the computed therapist views (/stats, /attention,
+patient list). Entries are dropped as soon as a linked patient writes
+something those views depend on, and expire after a TTL as a safety net for
+time-based changes (e.g. a patient becoming "inactive" after 3 days).
+
+Backends (REWIRE_DASHBOARD_CACHE):
+- "memory" (default): in-process LRU; invalidated on commit of the write.
+- "kv": snapshots stored as JSON in the shared `kv` table, so several
+  workers share them; invalidation deletes the rows and bumps the
+  therapist's generation row inside the writer's transaction. A snapshot
+  carries the generation it was computed under and is neither stored nor
+  served once the generation has moved on.
+- "off": always recompute.
+
+Invalidating writes (detected by an after_flush hook on SessionLocal):
+new activities and activity (un)completions, new or deleted audio sessions,
+journal entries, feedback, PHQ-9 item responses, and changes to the
+therapist's own patient links and invites.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import Integer, Text, cast, delete, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.db import engine
+
+
+BACKEND = os.getenv("REWIRE_DASHBOARD_CACHE", "memory").lower()
+TTL_SECONDS = float(os.getenv("REWIRE_DASHBOARD_CACHE_TTL", "300"))
+MAX_ENTRIES = int(os.getenv("REWIRE_DASHBOARD_CACHE_SIZE", "1024"))
+
+_KV_PREFIX = "dash:"
+_KV_GEN_PREFIX = "dashgen:"
+_SESSION_KEY = "dashboard_cache_therapists"
+
+
+# =============================================================================
+# IN-PROCESS LRU
+# =============================================================================
+
+
+class _SnapshotLRU:
+    """
+    Thread-safe bounded LRU of (therapist_id, view) -> snapshot.
+
+    Each therapist has a generation number that invalidate() bumps; a value
+    computed under an older generation is not stored, so a write that commits
+    while a snapshot is being computed cannot leave a stale entry behind.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Tuple[int, str], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, therapist_id: int) -> int:
+        with self._lock:
+            return self._generations.get(therapist_id, 0)
+
+    def get(self, therapist_id: int, view: str) -> Optional[Any]:
+        key = (therapist_id, view)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, therapist_id: int, view: str, value: Any, generation: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if self._generations.get(therapist_id, 0) != generation:
+                return
+            self._data[(therapist_id, view)] = (time.monotonic(), value)
+            self._data.move_to_end((therapist_id, view))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, therapist_ids: Set[int]) -> None:
+        with self._lock:
+            for tid in therapist_ids:
+                self._generations[tid] = self._generations.get(tid, 0) + 1
+            for key in [k for k in self._data if k[0] in therapist_ids]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_lru = _SnapshotLRU(MAX_ENTRIES, TTL_SECONDS)
+
+
+# =============================================================================
+# SHARED KV BACKEND
+# =============================================================================
+
+
+def _kv_key(therapist_id: int, view: str) -> str:
+    return f"{_KV_PREFIX}{therapist_id}:{view}"
+
+
+def _kv_generation(conn, therapist_id: int) -> int:
+    kv = models.KV.__table__
+    raw = conn.execute(select(kv.c.v).where(kv.c.k == f"{_KV_GEN_PREFIX}{therapist_id}")).scalar()
+    return int(raw) if raw else 0
+
+
+def _kv_get(therapist_id: int, view: str, schema: Type[BaseModel]) -> Tuple[Optional[BaseModel], int]:
+    """(snapshot or None, current generation)."""
+    kv = models.KV.__table__
+    with engine.connect() as conn:
+        generation = _kv_generation(conn, therapist_id)
+        raw = conn.execute(select(kv.c.v).where(kv.c.k == _kv_key(therapist_id, view))).scalar()
+    if not raw:
+        return None, generation
+    try:
+        snap = json.loads(raw)
+        if snap.get("g", 0) != generation or time.time() - snap["t"] > TTL_SECONDS:
+            return None, generation
+        return schema.model_validate(snap["v"]), generation
+    except Exception:
+        return None, generation
+
+
+def _kv_put(therapist_id: int, view: str, value: BaseModel, generation: int) -> None:
+    kv = models.KV.__table__
+    key = _kv_key(therapist_id, view)
+    payload = json.dumps({"t": time.time(), "g": generation, "v": value.model_dump(mode="json")})
+    with engine.begin() as conn:
+        # Invalidated while computing: the value may predate the write
+        if _kv_generation(conn, therapist_id) != generation:
+            return
+        conn.execute(delete(kv).where(kv.c.k == key))
+        conn.execute(kv.insert().values(k=key, v=payload))
+
+
+def _kv_bump(conn, therapist_id: int) -> None:
+    kv = models.KV.__table__
+    key = f"{_KV_GEN_PREFIX}{therapist_id}"
+    next_value = cast(cast(kv.c.v, Integer) + 1, Text)
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        conn.execute(
+            dialect_insert(kv).values(k=key, v="1").on_conflict_do_update(index_elements=["k"], set_={"v": next_value})
+        )
+        return
+
+    result = conn.execute(update(kv).where(kv.c.k == key).values(v=next_value))
+    if not result.rowcount:
+        conn.execute(insert(kv).values(k=key, v="1"))
+
+
+def _kv_delete(conn, therapist_ids: Set[int]) -> None:
+    kv = models.KV.__table__
+    for tid in therapist_ids:
+        _kv_bump(conn, tid)
+        conn.execute(delete(kv).where(kv.c.k.like(f"{_KV_PREFIX}{tid}:%")))
+
+
+def _kv_lookup(therapist_id: int, view: str, schema: Type[BaseModel]) -> Tuple[Optional[BaseModel], int]:
+    try:
+        return _kv_get(therapist_id, view, schema)
+    except Exception as e:
+        print(f"[dashboard_cache] KV read failed: {e}")
+        return None, -1
+
+
+def _kv_store(therapist_id: int, view: str, value: BaseModel, generation: int) -> None:
+    if generation < 0:
+        return
+    try:
+        _kv_put(therapist_id, view, value, generation)
+    except Exception as e:
+        print(f"[dashboard_cache] KV write failed: {e}")
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+
+def get_or_compute(
+    therapist_id: int,
+    view: str,
+    compute: Callable[[], BaseModel],
+    schema: Type[BaseModel],
+) -> BaseModel:
+    """Return the cached snapshot for (therapist, view), computing and storing it on a miss."""
+    if BACKEND == "off":
+        return compute()
+
+    if BACKEND == "kv":
+        cached, generation = _kv_lookup(therapist_id, view, schema)
+        if cached is not None:
+            return cached
+        value = compute()
+        _kv_store(therapist_id, view, value, generation)
+        return value
+
+    cached = _lru.get(therapist_id, view)
+    if cached is not None:
+        return cached
+    generation = _lru.generation(therapist_id)
+    value = compute()
+    _lru.put(therapist_id, view, value, generation)
+    return value
+
+
+async def get_or_compute_async(
+    therapist_id: int,
+    view: str,
+    compute: Callable[[], Awaitable[BaseModel]],
+    schema: Type[BaseModel],
+) -> BaseModel:
+    """
+    get_or_compute for async handlers: `compute` is awaited (e.g. an
+    AsyncSession.run_sync call), and the kv backend's blocking reads and
+    writes on the sync engine run in the threadpool, not on the event loop.
+    """
+    if BACKEND == "off":
+        return await compute()
+
+    if BACKEND == "kv":
+        cached, generation = await run_in_threadpool(_kv_lookup, therapist_id, view, schema)
+        if cached is not None:
+            return cached
+        value = await compute()
+        await run_in_threadpool(_kv_store, therapist_id, view, value, generation)
+        return value
+
+    cached = _lru.get(therapist_id, view)
+    if cached is not None:
+        return cached
+    generation = _lru.generation(therapist_id)
+    value = await compute()
+    _lru.put(therapist_id, view, value, generation)
+    return value
+
+
+def invalidate(therapist_ids) -> None:
+    """Drop every snapshot for these therapists (in-process backend)."""
+    ids = {int(t) for t in therapist_ids if t is not None}
+    if ids:
+        _lru.invalidate(ids)
+
+
+def stats() -> Dict[str, Any]:
+    return {"backend": BACKEND, "ttl_seconds": TTL_SECONDS, **_lru.stats()}
+
+
+# =============================================================================
+# WRITE DETECTION (after_flush / after_commit hooks)
+# =============================================================================
+
+
+def _patient_hash(conn, obj) -> Optional[str]:
+    """user_hash of the patient behind a dashboard-relevant new/changed row."""
+    if isinstance(obj, (models.ActivitySessions, models.Sessions, models.JournalEntries, models.Phq9ItemResponse)):
+        return obj.user_hash
+    if isinstance(obj, models.Feedback) and obj.session_id:
+        return conn.execute(
+            select(models.Sessions.user_hash).where(models.Sessions.id == obj.session_id).limit(1)
+        ).scalar()
+    return None
+
+
+def _affected_therapists(session: Session, conn) -> Set[int]:
+    therapist_ids: Set[int] = set()
+    user_hashes: Set[str] = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (models.TherapistPatients, models.PatientInvites)):
+            therapist_ids.add(obj.therapist_id)
+            continue
+        # last_active is the newest activity / audio session of any status;
+        # an edit only matters when it (un)completes an activity
+        if isinstance(obj, models.ActivitySessions) and obj in session.dirty:
+            if not inspect(obj).attrs.status.history.has_changes():
+                continue
+        if isinstance(obj, models.Sessions) and obj in session.dirty:
+            continue
+        user_hash = _patient_hash(conn, obj)
+        if user_hash:
+            user_hashes.add(user_hash)
+
+    if user_hashes:
+        rows = conn.execute(
+            select(models.TherapistPatients.therapist_id)
+            .join(models.Users, models.Users.id == models.TherapistPatients.patient_user_id)
+            .where(models.Users.user_hash.in_(user_hashes))
+        ).all()
+        therapist_ids.update(r[0] for r in rows)
+
+    therapist_ids.discard(None)
+    return therapist_ids
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    if BACKEND == "off":
+        return
+    try:
+        conn = session.connection()
+        therapist_ids = _affected_therapists(session, conn)
+        if not therapist_ids:
+            return
+        if BACKEND == "kv":
+            _kv_delete(conn, therapist_ids)
+        session.info.setdefault(_SESSION_KEY, set()).update(therapist_ids)
+    except Exception as e:
+        print(f"[dashboard_cache] Failed to collect invalidations: {e}")
+
+
+def _after_commit(session: Session) -> None:
+    invalidate(session.info.pop(_SESSION_KEY, ()))
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def install(session_factory) -> None:
+    """Register the invalidation hooks on a sessionmaker (idempotent)."""
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(session_factory, name, fn):
+            event.listen(session_factory, name, fn)
@@ -0,0 +1,424 @@
+"""
+Engagement Rollup Service
+
+Maintains the user_daily_stats table (one row per user per UTC day) and
+answers the engagement questions the dashboards keep asking:
+- Daily activity counts (heatmaps)
+- Current / longest streak of days with a completed activity
+- Weekly totals for trends
+
+The table is kept current by an after_flush hook on SessionLocal, so every
+write site that goes through the ORM (activity completion, journal entries,
+audio/video sessions, chills taps, feedback) bumps its counter in the same
+transaction. Bulk statements bypass the hook; rebuild_daily_stats() recomputes
+rows from the raw tables and is used for the initial backfill (migration 014)
+and as a catch-up job (scripts/backfill_user_daily_stats.py).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, date, time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+COUNTERS = (
+    "activities_completed",
+    "journal_entries",
+    "audio_sessions",
+    "video_sessions",
+    "chills_taps",
+    "feedback_count",
+)
+
+_table = models.UserDailyStats.__table__
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _as_date(value) -> Optional[date]:
+    """Normalise datetimes, dates and SQLite date strings to a date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+# =============================================================================
+# INCREMENTAL MAINTENANCE (after_flush hook)
+# =============================================================================
+
+
+_TRACKED = (
+    models.ActivitySessions,
+    models.JournalEntries,
+    models.Sessions,
+    models.VideoSession,
+    models.ChillsTimestamp,
+    models.Feedback,
+)
+
+
+def _lookup_user_hash(conn, column, key_column, key) -> Optional[str]:
+    if key is None:
+        return None
+    return conn.execute(select(column).where(key_column == key).limit(1)).scalar()
+
+
+def _activity_completed_delta(obj) -> Tuple[int, object]:
+    """+1/-1 if a flushed ActivitySessions row entered/left status 'completed'."""
+    state = inspect(obj)
+    hist = state.attrs.status.history
+    if not hist.has_changes():
+        return 0, None
+    was = hist.deleted[0] if hist.deleted else None
+    if obj.status == "completed" and was != "completed":
+        return 1, obj.completed_at
+    if was == "completed" and obj.status != "completed":
+        done = state.attrs.completed_at.history
+        return -1, (done.deleted[0] if done.deleted else obj.completed_at)
+    return 0, None
+
+
+def _row_delta(conn, obj) -> Optional[Tuple[str, str, object]]:
+    """(user_hash, counter, timestamp) for a new (+1) or deleted (-1) row."""
+    if isinstance(obj, models.ActivitySessions):
+        if obj.status != "completed":
+            return None
+        return obj.user_hash, "activities_completed", obj.completed_at
+    if isinstance(obj, models.JournalEntries):
+        return obj.user_hash, "journal_entries", obj.created_at
+    if isinstance(obj, models.Sessions):
+        return obj.user_hash, "audio_sessions", obj.created_at
+    if isinstance(obj, models.VideoSession):
+        return obj.user_hash, "video_sessions", obj.created_at
+    if isinstance(obj, models.ChillsTimestamp):
+        user_hash = obj.user_hash or _lookup_user_hash(
+            conn, models.VideoSession.user_hash, models.VideoSession.session_id, obj.session_id
+        )
+        return user_hash, "chills_taps", obj.created_at
+    if isinstance(obj, models.Feedback):
+        user_hash = _lookup_user_hash(
+            conn, models.Sessions.user_hash, models.Sessions.id, obj.session_id
+        )
+        return user_hash, "feedback_count", obj.created_at
+    return None
+
+
+def _collect_deltas(session: Session, conn) -> Dict[Tuple[str, date], Dict[str, int]]:
+    deltas: Dict[Tuple[str, date], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(user_hash, counter, when, n):
+        if user_hash and n:
+            deltas[(user_hash, _as_date(when) or _today())][counter] += n
+
+    for sign, objs in ((1, session.new), (-1, session.deleted)):
+        for obj in objs:
+            hit = _row_delta(conn, obj)
+            if hit:
+                add(hit[0], hit[1], hit[2], sign)
+
+    for obj in session.dirty:
+        if isinstance(obj, models.ActivitySessions):
+            n, when = _activity_completed_delta(obj)
+            add(obj.user_hash, "activities_completed", when, n)
+
+    return deltas
+
+
+def _upsert(conn, user_hash: str, day: date, counts: Dict[str, int]) -> None:
+    now = datetime.utcnow()
+    values = {c: max(counts.get(c, 0), 0) for c in COUNTERS}
+    increments = {c: _table.c[c] + n for c, n in counts.items()}
+    increments["updated_at"] = now
+
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = (
+            dialect_insert(_table)
+            .values(user_hash=user_hash, date=day, updated_at=now, **values)
+            .on_conflict_do_update(index_elements=["user_hash", "date"], set_=increments)
+        )
+        conn.execute(stmt)
+        return
+
+    result = conn.execute(
+        update(_table)
+        .where(and_(_table.c.user_hash == user_hash, _table.c.date == day))
+        .values(**increments)
+    )
+    if not result.rowcount:
+        conn.execute(insert(_table).values(user_hash=user_hash, date=day, updated_at=now, **values))
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    if not any(isinstance(obj, _TRACKED) for objs in (session.new, session.dirty, session.deleted) for obj in objs):
+        return
+    conn = session.connection()
+    # Never fail the user's write over the rollup; the catch-up job repairs it.
+    # The savepoint keeps a failed upsert from aborting the whole transaction
+    # (Postgres refuses every later statement until it is rolled back).
+    savepoint = conn.begin_nested()
+    try:
+        for (user_hash, day), counts in _collect_deltas(session, conn).items():
+            counts = {c: n for c, n in counts.items() if n}
+            if counts:
+                _upsert(conn, user_hash, day, counts)
+        savepoint.commit()
+    except Exception:
+        savepoint.rollback()
+        logger.exception("Failed to update user_daily_stats")
+
+
+def _noop(target, value, oldvalue, initiator):
+    return value
+
+
+def install(session_factory) -> None:
+    """Register the rollup hook on a sessionmaker (idempotent)."""
+    if not event.contains(session_factory, "after_flush", _after_flush):
+        event.listen(session_factory, "after_flush", _after_flush)
+    # Load the previous status on assignment so a completed -> completed
+    # re-save is not counted twice.
+    if not event.contains(models.ActivitySessions.status, "set", _noop):
+        event.listen(models.ActivitySessions.status, "set", _noop, retval=True, active_history=True)
+
+
+# =============================================================================
+# REBUILD / BACKFILL
+# =============================================================================
+
+
+def _source_queries(db: Session, user_hash: Optional[str], since: Optional[date]):
+    """One GROUP BY (user_hash, day) query per counter."""
+    VS = models.VideoSession
+    CT = models.ChillsTimestamp
+
+    sources = [
+        (
+            "activities_completed",
+            models.ActivitySessions.user_hash,
+            models.ActivitySessions.completed_at,
+            lambda q: q.filter(
+                models.ActivitySessions.status == "completed",
+                models.ActivitySessions.completed_at.isnot(None),
+            ),
+        ),
+        ("journal_entries", models.JournalEntries.user_hash, models.JournalEntries.created_at, None),
+        ("audio_sessions", models.Sessions.user_hash, models.Sessions.created_at, None),
+        ("video_sessions", VS.user_hash, VS.created_at, None),
+        (
+            "chills_taps",
+            func.coalesce(CT.user_hash, VS.user_hash),
+            CT.created_at,
+            lambda q: q.select_from(CT).outerjoin(VS, VS.session_id == CT.session_id),
+        ),
+        (
+            "feedback_count",
+            models.Sessions.user_hash,
+            models.Feedback.created_at,
+            lambda q: q.select_from(models.Feedback).join(
+                models.Sessions, models.Sessions.id == models.Feedback.session_id
+            ),
+        ),
+    ]
+
+    for counter, user_col, ts_col, shape in sources:
+        day = func.date(ts_col)
+        q = db.query(user_col, day, func.count())
+        if shape:
+            q = shape(q)
+        q = q.filter(user_col.isnot(None))
+        if user_hash:
+            q = q.filter(user_col == user_hash)
+        if since:
+            q = q.filter(ts_col >= datetime.combine(since, time.min))
+        yield counter, q.group_by(user_col, day)
+
+    # Taps moved to the cold archive keep per-session daily counts
+    A = models.ArchivedSessionCounts
+    q = db.query(A.user_hash, A.date, func.sum(A.row_count)).filter(A.source == "chills", A.user_hash.isnot(None))
+    if user_hash:
+        q = q.filter(A.user_hash == user_hash)
+    if since:
+        q = q.filter(A.date >= since)
+    yield "chills_taps", q.group_by(A.user_hash, A.date)
+
+
+def rebuild_daily_stats(
+    db: Session,
+    user_hash: Optional[str] = None,
+    since: Optional[date] = None,
+) -> int:
+    """
+    Recompute user_daily_stats from the raw tables.
+
+    Scoped to one user and/or to days >= since when given; rows in scope are
+    replaced. Returns the number of rollup rows written. The caller commits.
+    """
+    totals: Dict[Tuple[str, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for counter, q in _source_queries(db, user_hash, since):
+        for uh, day, n in q.all():
+            d = _as_date(day)
+            if uh and d:
+                totals[(uh, d)][counter] += n
+
+    stale = db.query(models.UserDailyStats)
+    if user_hash:
+        stale = stale.filter(models.UserDailyStats.user_hash == user_hash)
+    if since:
+        stale = stale.filter(models.UserDailyStats.date >= since)
+    stale.delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    rows = [
+        {"user_hash": uh, "date": d, "updated_at": now, **counts}
+        for (uh, d), counts in totals.items()
+    ]
+    if rows:
+        db.bulk_insert_mappings(models.UserDailyStats, rows)
+    return len(rows)
+
+
+# =============================================================================
+# READERS
+# =============================================================================
+
+
+def get_daily_stats(
+    db: Session,
+    user_hash: str,
+    start: date,
+    end: date,
+) -> Dict[date, models.UserDailyStats]:
+    """Rollup rows for start..end inclusive, keyed by date (missing days have no row)."""
+    rows = (
+        db.query(models.UserDailyStats)
+        .filter(
+            models.UserDailyStats.user_hash == user_hash,
+            models.UserDailyStats.date >= start,
+            models.UserDailyStats.date <= end,
+        )
+        .all()
+    )
+    return {row.date: row for row in rows}
+
+
+def get_window_totals(db: Session, user_hash: str, start: date, end: date) -> Dict[str, int]:
+    """Summed counters for start..end inclusive."""
+    row = (
+        db.query(*[func.coalesce(func.sum(_table.c[c]), 0) for c in COUNTERS])
+        .filter(
+            models.UserDailyStats.user_hash == user_hash,
+            models.UserDailyStats.date >= start,
+            models.UserDailyStats.date <= end,
+        )
+        .one()
+    )
+    return {c: int(v or 0) for c, v in zip(COUNTERS, row)}
+
+
+def get_activity_dates(db: Session, user_hash: str) -> List[date]:
+    """Days with at least one completed activity, oldest first."""
+    if not user_hash:
+        return []
+    rows = (
+        db.query(models.UserDailyStats.date)
+        .filter(
+            models.UserDailyStats.user_hash == user_hash,
+            models.UserDailyStats.activities_completed > 0,
+        )
+        .order_by(models.UserDailyStats.date.asc())
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def get_activity_days(db: Session, user_hash: str, days: int = 7, today: Optional[date] = None) -> List[bool]:
+    """Whether each of the last N days had a completed activity, oldest first."""
+    today = today or _today()
+    start = today - timedelta(days=days - 1)
+    if not user_hash:
+        return [False] * days
+    stats = get_daily_stats(db, user_hash, start, today)
+    active = {d for d, row in stats.items() if row.activities_completed}
+    return [start + timedelta(days=i) in active for i in range(days)]
+
+
+def streaks_from_dates(dates: Sequence[date], today: Optional[date] = None) -> Tuple[int, int]:
+    """
+    (current, longest) streak from ascending, distinct activity dates in one pass.
+
+    The current streak ends today or yesterday (today not being done yet
+    does not break it).
+    """
+    today = today or _today()
+    longest = run = 0
+    prev = None
+    for d in dates:
+        run = run + 1 if prev is not None and d - prev == timedelta(days=1) else 1
+        longest = max(longest, run)
+        prev = d
+    current = run if prev is not None and today - prev <= timedelta(days=1) and prev <= today else 0
+    return current, longest
+
+
+def current_streak(db: Session, user_hash: str, today: Optional[date] = None) -> int:
+    """
+    Consecutive days with a completed activity, ending today or yesterday
+    (today not being done yet does not break the streak).
+    """
+    today = today or _today()
+    dates = [d for d in get_activity_dates(db, user_hash) if d <= today]
+    return streaks_from_dates(dates, today)[0]
+
+
+def get_streak_and_total(db: Session, user_hash: str, today: Optional[date] = None) -> Tuple[int, int]:
+    """
+    (current streak, lifetime completed activities) from one read of the
+    user's active rollup days, instead of counting ActivitySessions.
+    """
+    today = today or _today()
+    if not user_hash:
+        return 0, 0
+    rows = (
+        db.query(models.UserDailyStats.date, models.UserDailyStats.activities_completed)
+        .filter(
+            models.UserDailyStats.user_hash == user_hash,
+            models.UserDailyStats.activities_completed > 0,
+        )
+        .order_by(models.UserDailyStats.date.asc())
+        .all()
+    )
+    current = streaks_from_dates([d for d, _ in rows if d <= today], today)[0]
+    return current, sum(n for _, n in rows)
+
+
+def longest_streak(db: Session, user_hash: str) -> int:
+    """Longest run of consecutive days with a completed activity."""
+    return streaks_from_dates(get_activity_dates(db, user_hash))[1]
@@ -0,0 +1,250 @@
+"""
+Journey Event Buffer
+
+Write-behind buffer for POST /api/journey/event. Playback events are small,
+frequent and append-only, so instead of one INSERT + COMMIT per event they
+are queued in memory and written by a background thread as one multi-row
+INSERT per flush. A flush happens every FLUSH_MS milliseconds or as soon as
+FLUSH_MAX events are queued, whichever comes first.
+
+Durability (REWIRE_EVENT_BUFFER):
+- "on" (default): an event is acknowledged once it is queued. Events still
+  in the buffer are lost if the process dies without a clean shutdown, i.e.
+  at most FLUSH_MS worth (or FLUSH_MAX events) per worker. The app's shutdown
+  hook calls stop(), which flushes everything queued; atexit does the same
+  as a fallback.
+- "off": every event is inserted and committed before the response (the
+  old behaviour).
+
+POST /api/journey/events (batch) does not use the buffer: the whole array
+is written in one transaction before the response, so a client that needs
+durability can batch instead.
+
+If a batch fails it is retried one row at a time. Rows that still fail on
+their own (a value the database rejects) are moved to a small in-memory
+dead-letter list (the newest DEAD_LETTER_MAX, counted in stats()) so they
+cannot block the rows behind them. If the database itself is unavailable
+(connection or lock errors) the remaining rows are put back and retried on
+the next flush; the buffer holds at most MAX_QUEUED events, beyond which the
+oldest are dropped and counted in stats(). created_at is stamped when the
+event is queued, not when it is flushed.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+
+from app import models
+from app.db import engine
+
+
+ENABLED = os.getenv("REWIRE_EVENT_BUFFER", "on").lower() not in ("0", "off", "false", "no")
+FLUSH_MS = int(os.getenv("REWIRE_EVENT_FLUSH_MS", "200"))
+FLUSH_MAX = int(os.getenv("REWIRE_EVENT_FLUSH_MAX", "500"))
+MAX_QUEUED = int(os.getenv("REWIRE_EVENT_BUFFER_MAX", "50000"))
+DEAD_LETTER_MAX = int(os.getenv("REWIRE_EVENT_DEAD_LETTER_MAX", "100"))
+
+# Errors that mean the database is unavailable rather than that a row is bad
+_TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError)
+
+_table = models.JourneyEvent.__table__
+
+
+# =============================================================================
+# ROWS
+# =============================================================================
+
+
+def to_row(event) -> Dict[str, Any]:
+    """A journey_events row (dict) from a JourneyEventIn."""
+    return {
+        "session_id": event.session_id,
+        "user_hash": event.user_hash or "",
+        "event_type": event.event_type,
+        "t_ms": event.t_ms,
+        "label": event.label or "",
+        "payload_json": json.dumps(event.payload, ensure_ascii=False) if event.payload is not None else None,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def write_rows(rows: List[Dict[str, Any]]) -> None:
+    """Insert rows in one transaction (one executemany, one commit)."""
+    if rows:
+        with engine.begin() as conn:
+            conn.execute(insert(_table), rows)
+
+
+# =============================================================================
+# BUFFER
+# =============================================================================
+
+
+class _EventBuffer:
+    def __init__(self, flush_ms: int, flush_max: int, max_queued: int):
+        self.flush_interval = flush_ms / 1000
+        self.flush_max = flush_max
+        self.max_queued = max_queued
+        self._rows: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self.dead_letter: Deque[Tuple[Dict[str, Any], str]] = deque(maxlen=DEAD_LETTER_MAX)
+        self.flushed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._start()
+            self._rows.extend(rows)
+            self._trim()
+            if len(self._rows) >= self.flush_max:
+                self._cond.notify()
+
+    def _start(self) -> None:
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="journey-event-buffer", daemon=True)
+        self._thread.start()
+
+    def _trim(self) -> None:
+        excess = len(self._rows) - self.max_queued
+        if excess > 0:
+            del self._rows[:excess]
+            self.dropped += excess
+            print(f"[event_buffer] Buffer full; dropped {excess} oldest events")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._rows and not self._stopping:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._rows) < self.flush_max and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> int:
+        """Write everything queued now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            written = 0
+            pos = 0  # rows before pos are written or dead-lettered
+            try:
+                while pos < len(rows):
+                    chunk = rows[pos:pos + self.flush_max]
+                    try:
+                        write_rows(chunk)
+                    except _TRANSIENT_ERRORS:
+                        raise
+                    except Exception as e:
+                        # Some row in the batch is bad: retry singly so only that row is lost
+                        self.failures += 1
+                        print(f"[event_buffer] Batch of {len(chunk)} events failed, retrying one by one: {e}")
+                        for row in chunk:
+                            if self._write_one(row):
+                                written += 1
+                            pos += 1
+                        continue
+                    written += len(chunk)
+                    pos += len(chunk)
+            except _TRANSIENT_ERRORS as e:
+                self.failures += 1
+                print(f"[event_buffer] Flush failed, {len(rows) - pos} events requeued: {e}")
+                with self._cond:
+                    self._rows[:0] = rows[pos:]
+                    self._trim()
+            self.flushed += written
+            self.batches += 1 if written else 0
+            return written
+
+    def _write_one(self, row: Dict[str, Any]) -> bool:
+        """Write one row; a row the database rejects is dead-lettered (False)."""
+        try:
+            write_rows([row])
+            return True
+        except _TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            self.dead_letter.append((row, str(e)))
+            self.dead_lettered += 1
+            print(f"[event_buffer] Dead-lettered event for session {row.get('session_id')}: {e}")
+            return False
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is queued and stop the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._rows)
+        return {
+            "enabled": ENABLED,
+            "queued": queued,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "flush_ms": int(self.flush_interval * 1000),
+            "flush_max": self.flush_max,
+        }
+
+
+_buffer = _EventBuffer(FLUSH_MS, FLUSH_MAX, MAX_QUEUED)
+atexit.register(_buffer.stop)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+
+def log(event) -> None:
+    """Record one event: queued when the buffer is on, committed right away otherwise."""
+    if ENABLED:
+        _buffer.add([to_row(event)])
+    else:
+        write_rows([to_row(event)])
+
+
+def flush() -> int:
+    return _buffer.flush()
+
+
+def stop() -> None:
+    _buffer.stop()
+
+
+def stats() -> Dict[str, Any]:
+    return _buffer.stats()
@@ -16,15 +16,18 @@ verifying against the original.
 
 import os
 import re
+import csv
 import json
+import hashlib
 import logging
+import threading
+import time
 import unicodedata
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 
 import numpy as np
-import pandas as pd
-import joblib
 import onnxruntime as rt
 
 # Setup logging
@@ -42,6 +45,10 @@ ML_MODELS_DIR = os.path.join(BASE_DIR, "ml_models")
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
 ONNX_MODEL_PATH = os.path.join(ML_MODELS_DIR, "final_global_mlp.onnx")
+# Preprocessor + MLP in one graph, built by scripts/build_fused_model.py.
+# Used when present; otherwise the joblib preprocessor + MLP path is used.
+FUSED_MODEL_PATH = os.path.join(ML_MODELS_DIR, "final_global_mlp_fused.onnx")
+USE_FUSED_ENV = os.getenv("REWIRE_ML_USE_FUSED", "1").lower() not in ("0", "false", "no")
 PREPROCESSOR_PATH = os.path.join(ML_MODELS_DIR, "preprocessor_minimal.joblib")
 FEATURES_PATH = os.path.join(ML_MODELS_DIR, "minimal_features.json")
 STIMULI_CSV_PATH = os.path.join(DATA_DIR, "Stimuli.csv")
@@ -127,6 +134,37 @@ HARD_MAP = {
 CHILLS_HEAD_ENV = os.getenv("REWIRE_CHILLS_HEAD_INDEX")
 CHILLS_NAME_HINTS = ("chills", "chills_bin", "prob_chills", "head0")
 
+# Users per ONNX call in predict_top_k_batch (each user is 40 model rows)
+DEFAULT_BATCH_USERS = int(os.getenv("REWIRE_ML_BATCH_USERS", "256"))
+
+# ============================================================================
+# RANKING CACHE
+# ============================================================================
+
+# Max distinct feature vectors whose full 40-way ranking is kept (0 = off).
+# The questionnaire has few discrete items, so many users share a vector.
+RANKING_CACHE_SIZE = int(os.getenv("REWIRE_ML_CACHE_SIZE", "4096"))
+# How often get_predictor() re-checks the model files for changes
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("REWIRE_ML_RELOAD_CHECK_SECONDS", "30"))
+
+# ============================================================================
+# ONNX RUNTIME SESSION TUNING
+# ============================================================================
+
+# 0 = let onnxruntime decide. The model is tiny, so 1-2 intra-op threads per
+# worker usually beat the default of one per core under uvicorn workers.
+ORT_INTRA_OP_THREADS = int(os.getenv("REWIRE_ML_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS = int(os.getenv("REWIRE_ML_INTER_OP_THREADS", "0"))
+# disable | basic | extended | all
+ORT_GRAPH_OPT_LEVEL = os.getenv("REWIRE_ML_GRAPH_OPT_LEVEL", "all").lower()
+
+_GRAPH_OPT_LEVELS = {
+    "disable": rt.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": rt.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": rt.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": rt.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
 # ============================================================================
 # TEXT NORMALIZATION UTILITIES (from original app.py)
 # ============================================================================
@@ -208,13 +246,106 @@ def _choose_chills_head_index(outs: List[str]) -> int:
     return 0
 
 
-def _extract_from_probabilities_struct(prob_output: Any) -> Optional[np.ndarray]:
+def _apply_chills_layout(y: Any, layout: Optional[str], n_rows: int) -> Optional[np.ndarray]:
+    """
+    Decode a chills output whose layout was resolved at warm-up.
+    Returns None if the output no longer has that layout.
+    """
+    if layout in ("seq_col1", "seq_1d"):
+        if not isinstance(y, (list, tuple)) or not y:
+            return None
+        y = y[0]
+    if layout == "struct":
+        return _extract_from_probabilities_struct(y, n_rows)
+    arr = np.asarray(y)
+    if layout in ("seq_col1", "col1") and arr.ndim == 2 and arr.shape[0] == n_rows and arr.shape[1] >= 2:
+        return arr[:, 1].astype(np.float32)
+    if layout in ("seq_1d", "1d") and arr.ndim == 1 and arr.shape[0] == n_rows:
+        return arr.astype(np.float32)
+    return None
+
+
+def _model_fingerprint(paths: List[str]) -> str:
+    """Short hash of the model files' size + mtime, used as the model version."""
+    h = hashlib.sha1()
+    for path in paths:
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{path}:missing;".encode())
+    return h.hexdigest()[:12]
+
+
+class _RankingCache:
+    """
+    Thread-safe bounded LRU of full 40-way rankings.
+    
+    Keys are a canonical hash of (model version, mapped feature vector);
+    values are the ranked result dicts for all stimuli. Callers get copies,
+    so mutating a returned dict never touches the cache.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Dict[str, Any], ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(model_version: str, vector: List[float]) -> str:
+        canon_vec = [round(float(x), 6) for x in vector]
+        return hashlib.sha1(json.dumps([model_version, canon_vec]).encode()).hexdigest()
+    
+    def get(self, key: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            ranking = self._data.get(key)
+            if ranking is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return [dict(r) for r in ranking[:k]]
+    
+    def put(self, key: str, ranking: List[Dict[str, Any]]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = tuple(dict(r) for r in ranking)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+def _session_options() -> "rt.SessionOptions":
+    """Build onnxruntime SessionOptions from the REWIRE_ML_* settings."""
+    so = rt.SessionOptions()
+    if ORT_INTRA_OP_THREADS > 0:
+        so.intra_op_num_threads = ORT_INTRA_OP_THREADS
+    if ORT_INTER_OP_THREADS > 0:
+        so.inter_op_num_threads = ORT_INTER_OP_THREADS
+    so.graph_optimization_level = _GRAPH_OPT_LEVELS.get(
+        ORT_GRAPH_OPT_LEVEL, rt.GraphOptimizationLevel.ORT_ENABLE_ALL
+    )
+    return so
+
+
+def _extract_from_probabilities_struct(prob_output: Any, n_rows: int = len(STIM)) -> Optional[np.ndarray]:
     """
     Extract chills probabilities from various output structures.
-    Exact copy from original app.py.
+    Exact copy from original app.py, generalized to ``n_rows`` model rows so
+    batched (N x 40) inputs can be parsed with the same rules.
     """
     try:
-        if not hasattr(prob_output, "__len__") or len(prob_output) != len(STIM):
+        if not hasattr(prob_output, "__len__") or len(prob_output) != n_rows:
             return None
         
         # Handle list of dicts
@@ -249,9 +380,9 @@ def _extract_from_probabilities_struct(prob_output: Any) -> Optional[np.ndarray]
         # Handle list/tuple/array
         if isinstance(prob_output[0], (list, tuple, np.ndarray)):
             arr = np.asarray(prob_output)
-            if arr.ndim == 2 and arr.shape[0] == len(STIM):
+            if arr.ndim == 2 and arr.shape[0] == n_rows:
                 return arr[:, 1].astype(np.float32)
-            if arr.ndim == 3 and arr.shape[:2] == (len(STIM), 2):
+            if arr.ndim == 3 and arr.shape[:2] == (n_rows, 2):
                 return arr[:, 1, 0].astype(np.float32)
         
         return None
@@ -273,8 +404,14 @@ class MLPredictor:
     Follows the exact same methodology as original app.py from rewire-ml-app-main.
     """
     
-    def __init__(self):
-        """Initialize the predictor by loading all required model files."""
+    def __init__(self, use_fused: bool = USE_FUSED_ENV, fused_path: str = FUSED_MODEL_PATH):
+        """
+        Initialize the predictor by loading all required model files.
+        
+        Args:
+            use_fused: Prefer the fused preprocessor+MLP ONNX model if it exists
+            fused_path: Location of the fused model
+        """
         self._initialized = False
         self._error_message = None
         
@@ -284,14 +421,32 @@ class MLPredictor:
         self.session = None
         self.input_name = None
         
+        # Fused model: one graph input per raw column, (name, is_string)
+        self.use_fused = use_fused
+        self.fused_path = fused_path
+        self.fused_inputs: List[Tuple[str, bool]] = []
+        
+        # Chills output head + layout, resolved once by warm_up()
+        self._chills_output: Optional[str] = None
+        self._chills_layout: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        
+        # Full rankings keyed by (model_version, feature vector)
+        self.model_version: str = ""
+        self._cache = _RankingCache(RANKING_CACHE_SIZE)
+        
         # Stimuli data
-        self.stimuli_df = None
+        self.stimuli_rows: List[Dict[str, str]] = []  # url / name / desc per CSV row
         self.csv_idx: Dict[str, int] = {}
         self.csv_canon_rows: List[Tuple[int, str]] = []
         self.stim_to_csv_idx: Dict[int, int] = {}  # Maps STIM index to CSV row index
         
         try:
+            t0 = time.perf_counter()
             self._load_all()
+            self.timings["load_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            self.model_version = _model_fingerprint(self.model_files())
+            self.warm_up()
             self._initialized = True
             logger.info("MLPredictor initialized successfully")
         except Exception as e:
@@ -301,11 +456,45 @@ class MLPredictor:
     def _load_all(self):
         """Load all model components."""
         self._load_features()
-        self._load_preprocessor()
-        self._load_onnx_model()
+        if not self._load_fused_model():
+            self._load_preprocessor()
+            self._load_onnx_model()
         self._load_stimuli_csv()
         self._build_stimulus_mapping()
     
+    def _load_fused_model(self) -> bool:
+        """
+        Load the fused preprocessor+MLP ONNX model if available.
+        
+        Returns False (caller falls back to joblib preprocessor + MLP) when
+        the fused model is disabled, missing or fails to load.
+        """
+        if not self.use_fused or not os.path.exists(self.fused_path):
+            return False
+        
+        try:
+            session = rt.InferenceSession(
+                self.fused_path,
+                sess_options=_session_options(),
+                providers=["CPUExecutionProvider"]
+            )
+        except Exception as e:
+            logger.warning(f"Fused model failed to load, using preprocessor path: {e}")
+            return False
+        
+        self.session = session
+        self.fused_inputs = [
+            (i.name, i.type == "tensor(string)") for i in session.get_inputs()
+        ]
+        self.input_name = None
+        logger.info(f"Fused ONNX model loaded: inputs={[n for n, _ in self.fused_inputs]}")
+        return True
+    
+    @property
+    def uses_fused_model(self) -> bool:
+        """True when inference runs through the fused ONNX graph."""
+        return bool(self.fused_inputs)
+    
     def _load_features(self):
         """Load feature configuration from JSON."""
         if not os.path.exists(FEATURES_PATH):
@@ -322,6 +511,9 @@ class MLPredictor:
         if not os.path.exists(PREPROCESSOR_PATH):
             raise FileNotFoundError(f"Preprocessor file not found: {PREPROCESSOR_PATH}")
         
+        # Imported here so the fused-model path never pulls in joblib/sklearn
+        import joblib
+        
         self.preprocessor = joblib.load(PREPROCESSOR_PATH)
         
         # Ensure required attributes exist (compatibility fix from original app.py)
@@ -341,6 +533,7 @@ class MLPredictor:
         
         self.session = rt.InferenceSession(
             ONNX_MODEL_PATH,
+            sess_options=_session_options(),
             providers=["CPUExecutionProvider"]
         )
         self.input_name = self.session.get_inputs()[0].name
@@ -352,22 +545,24 @@ class MLPredictor:
         if not os.path.exists(STIMULI_CSV_PATH):
             raise FileNotFoundError(f"Stimuli CSV not found: {STIMULI_CSV_PATH}")
         
-        # Try utf-8 first, fallback to latin-1 (same as original)
+        # Try utf-8 first, fallback to latin-1 (same as original). Read with
+        # the csv module so the fused inference path does not need pandas.
         try:
-            self.stimuli_df = pd.read_csv(STIMULI_CSV_PATH, encoding="utf-8")
-        except Exception:
-            self.stimuli_df = pd.read_csv(STIMULI_CSV_PATH, encoding="latin-1")
+            with open(STIMULI_CSV_PATH, newline="", encoding="utf-8-sig") as f:
+                raw = list(csv.reader(f))
+        except UnicodeDecodeError:
+            with open(STIMULI_CSV_PATH, newline="", encoding="latin-1") as f:
+                raw = list(csv.reader(f))
         
         # Clean column names (same as original)
-        self.stimuli_df = self.stimuli_df.rename(
-            columns={str(c).strip(): str(c).strip() for c in self.stimuli_df.columns}
-        )
+        columns = [str(c).strip() for c in raw[0]] if raw else []
+        records = [dict(zip(columns, row)) for row in raw[1:] if row]
         
         # Find columns by pattern matching (same logic as original loadG)
         def nn(x):
             return re.sub(r"[^a-z0-9]+", "", str(x).lower())
         
-        m = {nn(c): c for c in self.stimuli_df.columns}
+        m = {nn(c): c for c in columns}
         
         def pick(eq, ct):
             for k in eq:
@@ -384,12 +579,6 @@ class MLPredictor:
                   ["train_name", "stimulusname", "title", "name", "stimulus"])
         cd = pick(["description", "desc"], ["description", "desc"])
         
-        # Build standardized dataframe
-        x = pd.DataFrame()
-        x["url"] = self.stimuli_df[cu].astype(str) if cu else ""
-        x["name"] = self.stimuli_df[cn].astype(str) if cn else ""
-        x["desc"] = self.stimuli_df[cd].astype(str) if cd else ""
-        
         # Fix URLs (same as original)
         def fx(u):
             u = (u or "").strip()
@@ -397,12 +586,19 @@ class MLPredictor:
                 return "https://" + u
             return u
         
-        x["url"] = x["url"].apply(fx)
-        x = x.fillna({"url": "", "name": "", "desc": ""})
-        x = x[x["url"].astype(str).str.len() > 0].reset_index(drop=True)
+        # Standardized rows; rows without a URL are dropped
+        rows = []
+        for rec in records:
+            row = {
+                "url": fx(rec.get(cu) or "") if cu else "",
+                "name": (rec.get(cn) or "") if cn else "",
+                "desc": (rec.get(cd) or "") if cd else "",
+            }
+            if row["url"]:
+                rows.append(row)
         
-        self.stimuli_df = x
-        logger.info(f"Loaded {len(self.stimuli_df)} stimuli from CSV")
+        self.stimuli_rows = rows
+        logger.info(f"Loaded {len(self.stimuli_rows)} stimuli from CSV")
     
     def _try_match_name(self, cn: str) -> Optional[int]:
         """
@@ -456,8 +652,8 @@ class MLPredictor:
     def _build_stimulus_mapping(self):
         """Build mapping from STIM indices to CSV rows. Same as original app.py."""
         # Build CSV index by canonical name
-        for i in range(len(self.stimuli_df)):
-            name = self.stimuli_df.iloc[i].get("name", "")
+        for i, row in enumerate(self.stimuli_rows):
+            name = row.get("name", "")
             c = canon(name)
             if c:
                 self.csv_idx[c] = i
@@ -521,29 +717,43 @@ class MLPredictor:
         Convert feature vector to 40-row matrix (one per stimulus).
         Exact copy of to40X from original app.py.
         """
+        return self._to_batch_matrix([v])
+    
+    def _to_batch_matrix(self, vectors: List[List[float]]) -> np.ndarray:
+        """
+        Convert N feature vectors to one (N*40, F) matrix.
+        
+        Rows are laid out user-major: rows [u*40, (u+1)*40) belong to
+        vectors[u], one row per stimulus in STIM order. The preprocessor is
+        applied once to the whole frame.
+        """
         # Get expected column names from preprocessor
         if hasattr(self.preprocessor, "feature_names_in_"):
             z = list(self.preprocessor.feature_names_in_)
         else:
             z = list(self.features) + ["Stimulus"]
         
-        # Build a row for each stimulus
+        # Build a row for each (user, stimulus) pair
         rows = []
-        for i in range(len(STIM)):
-            h = {}
-            for fi, fk in enumerate(self.features):
-                h[fk] = v[fi] if fi < len(v) else 0
-            for stim_key in ("Stimulus", "stimulus", "item"):
-                if stim_key in z:
-                    h[stim_key] = STIM[i]
-            rows.append(h)
+        for v in vectors:
+            for i in range(len(STIM)):
+                h = {}
+                for fi, fk in enumerate(self.features):
+                    h[fk] = v[fi] if fi < len(v) else 0
+                for stim_key in ("Stimulus", "stimulus", "item"):
+                    if stim_key in z:
+                        h[stim_key] = STIM[i]
+                rows.append(h)
+        
+        # Imported here, like joblib: only the unfused path needs pandas
+        import pandas as pd
         
         df = pd.DataFrame(rows)
         
         # Ensure stimulus column exists
         for stim_key in ("Stimulus", "stimulus", "item"):
             if stim_key in z and stim_key not in df.columns:
-                df[stim_key] = [STIM[i] for i in range(len(STIM))]
+                df[stim_key] = [STIM[i % len(STIM)] for i in range(len(df))]
         
         # Transform with preprocessor
         try:
@@ -563,18 +773,67 @@ class MLPredictor:
         
         return np.asarray(X, dtype=np.float32)
     
-    def _topk(self, v: List[float], k: int = 1) -> List[Dict[str, Any]]:
+    def _to_fused_feeds(self, vectors: List[List[float]]) -> Dict[str, np.ndarray]:
         """
-        Get top K predictions.
-        Exact copy of topk logic from original app.py.
+        Build fused-model inputs for N feature vectors: one (N*40, 1) column
+        per raw preprocessor column, rows laid out like _to_batch_matrix.
+        """
+        n = len(vectors)
+        # Converters sanitize input names (e.g. NEO-FFI_10 -> NEO_FFI_10)
+        feature_idx = {nkey(fk): fi for fi, fk in enumerate(self.features)}
+        feeds = {}
+        for name, is_string in self.fused_inputs:
+            if name.lower() in ("stimulus", "item"):
+                col = np.tile(np.asarray(STIM, dtype=object), n)
+            else:
+                fi = feature_idx.get(nkey(name))
+                per_user = [v[fi] if fi is not None and fi < len(v) else 0 for v in vectors]
+                col = np.repeat(np.asarray(per_user, dtype=np.float64), len(STIM))
+            if is_string:
+                # Same values the DataFrame path hands the OneHotEncoder
+                feeds[name] = np.asarray([str(x) for x in col], dtype=object).reshape(-1, 1)
+            else:
+                feeds[name] = col.astype(np.float32).reshape(-1, 1)
+        return feeds
+    
+    def _to_batch_feeds(self, vectors: List[List[float]]) -> Dict[str, np.ndarray]:
+        """ONNX input feeds for N feature vectors (fused or preprocessor path)."""
+        if self.uses_fused_model:
+            return self._to_fused_feeds(vectors)
+        return {self.input_name: self._to_batch_matrix(vectors)}
+    
+    def _chills_probabilities(self, feeds: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Run the ONNX session on feeds and return one chills probability per row.
+        
+        Once warm_up() has resolved the chills output and its layout, only
+        that output is fetched and decoded directly. Otherwise the full
+        original head-resolution heuristic runs on every output.
+        """
+        n_rows = len(next(iter(feeds.values())))
+        if self._chills_output is not None:
+            y = self.session.run([self._chills_output], feeds)[0]
+            p = _apply_chills_layout(y, self._chills_layout, n_rows)
+            if p is not None:
+                return p
+        
+        p, _, _ = self._locate_chills_probabilities(feeds, n_rows)
+        return p
+    
+    def _locate_chills_probabilities(
+        self, feeds: Dict[str, np.ndarray], n_rows: int
+    ) -> Tuple[np.ndarray, str, str]:
+        """
+        Run every output and find the chills probabilities.
+        
+        Same head-resolution logic as the original topk, with the row count
+        taken from the inputs so single-user (40 rows) and batched (N*40
+        rows) inputs share one code path. Returns (probabilities, output
+        name, layout) so the choice can be reused by later calls.
         """
-        X = self._to_40x_matrix(v)
         out_defs = self.session.get_outputs()
         outs = [o.name for o in out_defs]
-        yl = self.session.run(outs, {self.input_name: X})
-        
-        # Extract probabilities - same logic as original
-        p = None
+        yl = self.session.run(outs, feeds)
         
         # Look for 'probabilities' output first
         prob_idx = None
@@ -592,40 +851,59 @@ class MLPredictor:
                 except Exception as ex:
                     raise RuntimeError(f"'probabilities' is a sequence but empty/invalid: type={type(y)}") from ex
                 arr = np.asarray(head0)
-                if arr.ndim == 2 and arr.shape[0] == len(STIM) and arr.shape[1] >= 2:
-                    p = arr[:, 1].astype(np.float32)
-                elif arr.ndim == 1 and arr.shape[0] == len(STIM):
-                    p = arr.astype(np.float32)
+                if arr.ndim == 2 and arr.shape[0] == n_rows and arr.shape[1] >= 2:
+                    return arr[:, 1].astype(np.float32), outs[prob_idx], "seq_col1"
+                elif arr.ndim == 1 and arr.shape[0] == n_rows:
+                    return arr.astype(np.float32), outs[prob_idx], "seq_1d"
                 else:
-                    raise RuntimeError(f"Unexpected shape for CHILLS head0: {arr.shape}; expected (40,2) or (40,).")
+                    raise RuntimeError(f"Unexpected shape for CHILLS head0: {arr.shape}; expected ({n_rows},2) or ({n_rows},).")
             else:
-                p = _extract_from_probabilities_struct(y)
-                if p is None:
-                    arr = np.asarray(y)
-                    if arr.ndim == 2 and arr.shape[0] == len(STIM) and arr.shape[1] >= 2:
-                        p = arr[:, 1].astype(np.float32)
-                    elif arr.ndim == 1 and arr.shape[0] == len(STIM):
-                        p = arr.astype(np.float32)
-                    else:
-                        raise RuntimeError(f"Could not parse 'probabilities' output. shape={getattr(y, 'shape', None)}")
+                p = _extract_from_probabilities_struct(y, n_rows)
+                if p is not None:
+                    return p, outs[prob_idx], "struct"
+                arr = np.asarray(y)
+                if arr.ndim == 2 and arr.shape[0] == n_rows and arr.shape[1] >= 2:
+                    return arr[:, 1].astype(np.float32), outs[prob_idx], "col1"
+                elif arr.ndim == 1 and arr.shape[0] == n_rows:
+                    return arr.astype(np.float32), outs[prob_idx], "1d"
+                else:
+                    raise RuntimeError(f"Could not parse 'probabilities' output. shape={getattr(y, 'shape', None)}")
         
         # Fallback: use _choose_chills_head_index
+        hi = _choose_chills_head_index(outs)
+        y = yl[hi]
+        arr = np.asarray(y)
+        if arr.ndim == 2 and arr.shape[0] == n_rows and arr.shape[1] >= 2:
+            return arr[:, 1].astype(np.float32), outs[hi], "col1"
+        elif arr.ndim == 1 and arr.shape[0] == n_rows:
+            return arr.astype(np.float32), outs[hi], "1d"
+        p = _extract_from_probabilities_struct(y, n_rows)
         if p is None:
-            hi = _choose_chills_head_index(outs)
-            y = yl[hi]
-            arr = np.asarray(y)
-            if arr.ndim == 2 and arr.shape[0] == len(STIM) and arr.shape[1] >= 2:
-                p = arr[:, 1].astype(np.float32)
-            elif arr.ndim == 1 and arr.shape[0] == len(STIM):
-                p = arr.astype(np.float32)
-            else:
-                p = _extract_from_probabilities_struct(y)
-                if p is None:
-                    raise RuntimeError(
-                        f"Could not resolve CHILLS probabilities. chosen_head_idx={hi}, "
-                        f"head_shape={getattr(y, 'shape', None)}, outs={outs}"
-                    )
-        
+            raise RuntimeError(
+                f"Could not resolve CHILLS probabilities. chosen_head_idx={hi}, "
+                f"head_shape={getattr(y, 'shape', None)}, outs={outs}"
+            )
+        return p, outs[hi], "struct"
+    
+    def warm_up(self) -> None:
+        """
+        Run one inference so onnxruntime allocates its buffers before the
+        first real request, and pin the chills output head + layout so
+        later calls skip the resolution heuristic.
+        """
+        t0 = time.perf_counter()
+        feeds = self._to_batch_feeds([[0.0] * len(self.features)])
+        _, name, layout = self._locate_chills_probabilities(feeds, len(STIM))
+        self._chills_output = name
+        self._chills_layout = layout
+        self.timings["warmup_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        logger.info(f"MLPredictor warm-up done: chills output={name} layout={layout} in {self.timings['warmup_ms']}ms")
+    
+    def _rank(self, p: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """
+        Turn one user's 40 chills probabilities into the top K result dicts.
+        Exact copy of the sorting/result logic from original app.py topk.
+        """
         # Add epsilon for stable sorting (same as original)
         eps = (np.arange(len(STIM)) * 1e-9).astype(np.float32)
         p = p + eps
@@ -643,8 +921,8 @@ class MLPredictor:
             j = int(j)
             n0 = STIM[j]
             
-            if j in self.stim_to_csv_idx and 0 <= self.stim_to_csv_idx[j] < len(self.stimuli_df):
-                r = self.stimuli_df.iloc[self.stim_to_csv_idx[j]]
+            if j in self.stim_to_csv_idx and 0 <= self.stim_to_csv_idx[j] < len(self.stimuli_rows):
+                r = self.stimuli_rows[self.stim_to_csv_idx[j]]
                 u0 = str(r.get("url", "")).strip()
                 n1 = str(r.get("name", n0)).strip()
                 d0 = str(r.get("desc", ""))
@@ -668,6 +946,24 @@ class MLPredictor:
         
         return o
     
+    def _topk(self, v: List[float], k: int = 1) -> List[Dict[str, Any]]:
+        """
+        Get top K predictions.
+        Exact copy of topk logic from original app.py.
+        """
+        p = self._chills_probabilities(self._to_batch_feeds([v]))
+        return self._rank(p, k)
+    
+    @staticmethod
+    def _with_rank_keys(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add rank and the standardized stimulus_* keys to topk results."""
+        for i, r in enumerate(results, start=1):
+            r["rank"] = i
+            r["stimulus_name"] = r["name"]
+            r["stimulus_url"] = r["url"]
+            r["stimulus_description"] = r["desc"]
+        return results
+    
     def predict_top_k(
         self,
         answers: Dict[str, Any],
@@ -702,15 +998,72 @@ class MLPredictor:
         # Map answers to feature vector
         feature_vector = self._map_answers_to_features(answers)
         
-        # Get predictions using original topk logic
-        results = self._topk(feature_vector, k=k)
+        # Identical vectors (and model) always rank the same: serve from cache
+        key = _RankingCache.key(self.model_version, feature_vector)
+        cached = self._cache.get(key, k)
+        if cached is not None:
+            return cached
         
-        # Add rank and standardize output keys
-        for i, r in enumerate(results, start=1):
-            r["rank"] = i
-            r["stimulus_name"] = r["name"]
-            r["stimulus_url"] = r["url"]
-            r["stimulus_description"] = r["desc"]
+        # Get the full ranking using original topk logic, cache it, return top K
+        ranking = self._with_rank_keys(self._topk(feature_vector, k=len(STIM)))
+        self._cache.put(key, ranking)
+        return ranking[:k]
+    
+    def predict_top_k_batch(
+        self,
+        answers_list: List[Dict[str, Any]],
+        k: int = 5,
+        batch_size: int = DEFAULT_BATCH_USERS,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Predict top K video recommendations for many users at once.
+        
+        All answer dicts are mapped and preprocessed into one (N*40, F)
+        matrix (or N*40 raw-column rows for the fused model), then scored with one ONNX call per micro-batch of
+        ``batch_size`` users instead of one call per user.
+        
+        Args:
+            answers_list: One questionnaire answers dict per user (same
+                format as predict_top_k)
+            k: Number of recommendations to return per user
+            batch_size: Max users per ONNX session.run call
+        
+        Returns:
+            One predict_top_k-style result list per input, in input order
+        """
+        if not self._initialized:
+            raise RuntimeError(f"MLPredictor not initialized: {self._error_message}")
+        
+        if not answers_list:
+            return []
+        
+        batch_size = max(1, int(batch_size))
+        n_stim = len(STIM)
+        
+        vectors = [self._map_answers_to_features(a) for a in answers_list]
+        keys = [_RankingCache.key(self.model_version, v) for v in vectors]
+        
+        # Serve cache hits; score each distinct missing vector once
+        results: List[Optional[List[Dict[str, Any]]]] = [self._cache.get(key, k) for key in keys]
+        pending: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                pending.setdefault(key, []).append(i)
+        
+        todo = [(key, ids) for key, ids in pending.items()]
+        if todo:
+            feeds = self._to_batch_feeds([vectors[ids[0]] for _, ids in todo])
+            for start in range(0, len(todo), batch_size):
+                stop = min(start + batch_size, len(todo))
+                p = self._chills_probabilities(
+                    {name: x[start * n_stim:stop * n_stim] for name, x in feeds.items()}
+                )
+                for u in range(stop - start):
+                    key, ids = todo[start + u]
+                    ranking = self._with_rank_keys(self._rank(p[u * n_stim:(u + 1) * n_stim], n_stim))
+                    self._cache.put(key, ranking)
+                    for i in ids:
+                        results[i] = [dict(r) for r in ranking[:k]]
         
         return results
     
@@ -750,6 +1103,38 @@ class MLPredictor:
         """Get initialization error message if any."""
         return self._error_message
     
+    def model_files(self) -> List[str]:
+        """
+        Files whose contents determine predictions (and the model version).
+        With REWIRE_ML_USE_FUSED on, the fused model is watched even while
+        it is missing or failed to load, so building it triggers a reload.
+        """
+        model = [] if self.uses_fused_model else [ONNX_MODEL_PATH, PREPROCESSOR_PATH]
+        if self.use_fused:
+            model.append(self.fused_path)
+        return model + [FEATURES_PATH, STIMULI_CSV_PATH]
+    
+    def clear_cache(self) -> None:
+        """Drop all cached rankings."""
+        self._cache.clear()
+    
+    def diagnostics(self) -> Dict[str, Any]:
+        """Model, session and timing details for the health/diagnostics endpoint."""
+        return {
+            "initialized": self._initialized,
+            "error": self._error_message,
+            "fused_model": self.uses_fused_model,
+            "model_path": self.fused_path if self.uses_fused_model else ONNX_MODEL_PATH,
+            "chills_output": self._chills_output,
+            "chills_layout": self._chills_layout,
+            "intra_op_threads": ORT_INTRA_OP_THREADS,
+            "inter_op_threads": ORT_INTER_OP_THREADS,
+            "graph_optimization_level": ORT_GRAPH_OPT_LEVEL,
+            "timings_ms": dict(self.timings),
+            "model_version": self.model_version,
+            "ranking_cache": self._cache.stats(),
+        }
+    
     def get_all_stimuli(self) -> List[Dict[str, str]]:
         """Get list of all available stimuli."""
         results = []
@@ -758,8 +1143,8 @@ class MLPredictor:
             description = ""
             if i in self.stim_to_csv_idx:
                 csv_row = self.stim_to_csv_idx[i]
-                if csv_row < len(self.stimuli_df):
-                    row = self.stimuli_df.iloc[csv_row]
+                if csv_row < len(self.stimuli_rows):
+                    row = self.stimuli_rows[csv_row]
                     url = str(row.get("url", "")).strip()
                     description = str(row.get("desc", "")).strip()
             
@@ -779,6 +1164,8 @@ class MLPredictor:
 
 # Create singleton instance for use throughout the app
 _predictor_instance: Optional[MLPredictor] = None
+_predictor_lock = threading.Lock()
+_last_model_check = 0.0
 
 
 def get_predictor() -> MLPredictor:
@@ -790,12 +1177,31 @@ def get_predictor() -> MLPredictor:
     """
     global _predictor_instance
     
-    if _predictor_instance is None:
-        _predictor_instance = MLPredictor()
+    if _predictor_instance is None or _model_files_changed(_predictor_instance):
+        with _predictor_lock:
+            if _predictor_instance is None or _model_files_changed(_predictor_instance, force=True):
+                if _predictor_instance is not None:
+                    logger.info("Model files changed on disk, reloading MLPredictor")
+                _predictor_instance = MLPredictor()
     
     return _predictor_instance
 
 
+def _model_files_changed(predictor: MLPredictor, force: bool = False) -> bool:
+    """
+    True if the predictor's model files changed since it was loaded.
+    Checked at most every MODEL_RELOAD_CHECK_SECONDS unless force is set.
+    """
+    global _last_model_check
+    now = time.monotonic()
+    if not force and now - _last_model_check < MODEL_RELOAD_CHECK_SECONDS:
+        return False
+    _last_model_check = now
+    if not predictor.is_initialized:
+        return False
+    return _model_fingerprint(predictor.model_files()) != predictor.model_version
+
+
 def predict_videos_for_user(
     answers: Dict[str, Any],
     k: int = 5
@@ -814,6 +1220,51 @@ def predict_videos_for_user(
     return predictor.predict_top_k(answers, k=k)
 
 
+def predict_videos_for_users(
+    answers_list: List[Dict[str, Any]],
+    k: int = 5,
+    batch_size: int = DEFAULT_BATCH_USERS,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Convenience function to predict videos for many users in one batch.
+    
+    Args:
+        answers_list: One questionnaire answers dict per user
+        k: Number of recommendations per user
+        batch_size: Max users per ONNX call
+    
+    Returns:
+        One list of video recommendations per user, in input order
+    """
+    predictor = get_predictor()
+    return predictor.predict_top_k_batch(answers_list, k=k, batch_size=batch_size)
+
+
+def answers_from_response(response: Any) -> Dict[str, Any]:
+    """
+    Build the predictor answers dict from a stored MLQuestionnaireResponse.
+    
+    Uses the same question-code keys as /api/intake/ml-questionnaire so a
+    re-score of stored responses matches what the endpoint produced.
+    """
+    return {
+        "DPES_1": response.dpes_1,
+        "NEO-FFI_10": response.neo_ffi_10,
+        "NEO-FFI_46": response.neo_ffi_46,
+        "NEO-FFI_16": response.neo_ffi_16,
+        "KAMF_4_1": response.kamf_4_1,
+        "NEO-FFI_14": response.neo_ffi_14,
+        "DPES_4": response.dpes_4,
+        "NEO-FFI_45": response.neo_ffi_45,
+        "DPES_29": response.dpes_29,
+        "Age": response.age,
+        "Gender": response.gender,
+        "Ethnicity": response.ethnicity,
+        "Education": response.education,
+        "Depression": response.depression_status,
+    }
+
+
 def get_video_for_user_day(
     answers: Dict[str, Any],
     day_number: int
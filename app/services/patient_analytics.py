@@ -15,9 +15,10 @@ from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select, union_all
 
 from app import models
+from app.services import engagement_rollup
 
 
 # =============================================================================
@@ -81,29 +82,6 @@ class PatternInsight:
 # =============================================================================
 
 
-def _count_in_period(
-    db: Session,
-    model,
-    user_hash: str,
-    date_field,
-    start: datetime,
-    end: datetime,
-    extra_filters: List = None,
-) -> int:
-    """Count records in a date range."""
-    query = db.query(func.count(model.id)).filter(
-        model.user_hash == user_hash,
-        date_field >= start,
-        date_field < end,
-    )
-    
-    if extra_filters:
-        for f in extra_filters:
-            query = query.filter(f)
-    
-    return query.scalar() or 0
-
-
 def _get_trend(current: int, previous: int) -> str:
     """Determine trend direction."""
     if previous == 0:
@@ -148,25 +126,19 @@ def get_activity_heatmap(
     Returns:
         ActivityHeatmap with daily activity levels
     """
-    today = date.today()
+    today = datetime.utcnow().date()
     period_start = today - timedelta(days=days - 1)
     
+    # One read of the daily rollup instead of a COUNT per day
+    daily = engagement_rollup.get_daily_stats(db, user_hash, period_start, today)
+    
     heatmap_days = []
     total_activities = 0
     
     for i in range(days):
         check_date = period_start + timedelta(days=i)
-        
-        # Count completed activities on this date
-        activity_count = (
-            db.query(func.count(models.ActivitySessions.id))
-            .filter(
-                models.ActivitySessions.user_hash == user_hash,
-                models.ActivitySessions.status == "completed",
-                func.date(models.ActivitySessions.completed_at) == check_date,
-            )
-            .scalar()
-        ) or 0
+        row = daily.get(check_date)
+        activity_count = row.activities_completed if row else 0
         
         total_activities += activity_count
         
@@ -215,61 +187,43 @@ def get_engagement_metrics(
         EngagementMetrics with all engagement data
     """
     now = datetime.utcnow()
-    week_ago = now - timedelta(days=7)
-    two_weeks_ago = now - timedelta(days=14)
-    
-    # Activities
-    activities_this_week = _count_in_period(
-        db, models.ActivitySessions, user_hash,
-        models.ActivitySessions.completed_at,
-        week_ago, now,
-        [models.ActivitySessions.status == "completed"]
-    )
-    
-    activities_last_week = _count_in_period(
-        db, models.ActivitySessions, user_hash,
-        models.ActivitySessions.completed_at,
-        two_weeks_ago, week_ago,
-        [models.ActivitySessions.status == "completed"]
-    )
-    
-    # Sessions (audio journeys)
-    sessions_this_week = (
-        db.query(func.count(models.Sessions.id))
-        .filter(
-            models.Sessions.user_hash == user_hash,
-            models.Sessions.created_at >= week_ago,
-            models.Sessions.created_at < now,
-        )
-        .scalar()
-    ) or 0
-    
-    sessions_last_week = (
-        db.query(func.count(models.Sessions.id))
+    today = now.date()
+    week_start = today - timedelta(days=6)
+    prev_week_start = today - timedelta(days=13)
+    
+    # One rollup read: the last 14 days (weekly trends) plus every day with a
+    # completed activity (streaks), in date order.
+    R = models.UserDailyStats
+    rows = (
+        db.query(R.date, R.activities_completed, R.audio_sessions, R.journal_entries)
         .filter(
-            models.Sessions.user_hash == user_hash,
-            models.Sessions.created_at >= two_weeks_ago,
-            models.Sessions.created_at < week_ago,
+            R.user_hash == user_hash,
+            R.date <= today,
+            or_(R.date >= prev_week_start, R.activities_completed > 0),
         )
-        .scalar()
-    ) or 0
-    
-    # Journals
-    journals_this_week = _count_in_period(
-        db, models.JournalEntries, user_hash,
-        models.JournalEntries.created_at,
-        week_ago, now,
-    )
-    
-    journals_last_week = _count_in_period(
-        db, models.JournalEntries, user_hash,
-        models.JournalEntries.created_at,
-        two_weeks_ago, week_ago,
+        .order_by(R.date.asc())
+        .all()
     )
     
-    # Streak calculation
-    streak_days = _calculate_current_streak(db, user_hash)
-    longest_streak = _calculate_longest_streak(db, user_hash)
+    activities_this_week = activities_last_week = 0
+    sessions_this_week = sessions_last_week = 0
+    journals_this_week = journals_last_week = 0
+    activity_dates = []
+    
+    for day, activities, sessions, journals in rows:
+        if activities:
+            activity_dates.append(day)
+        if day >= week_start:
+            activities_this_week += activities or 0
+            sessions_this_week += sessions or 0
+            journals_this_week += journals or 0
+        elif day >= prev_week_start:
+            activities_last_week += activities or 0
+            sessions_last_week += sessions or 0
+            journals_last_week += journals or 0
+    
+    # Streak calculation (single pass over the activity dates)
+    streak_days, longest_streak = engagement_rollup.streaks_from_dates(activity_dates, today)
     
     # Last active
     last_active = _get_last_active_datetime(db, user_hash)
@@ -299,103 +253,17 @@ def get_engagement_metrics(
     )
 
 
-def _calculate_current_streak(db: Session, user_hash: str) -> int:
-    """Calculate current consecutive days with activity."""
-    today = date.today()
-    streak = 0
-    
-    for i in range(365):  # Max 1 year lookback
-        check_date = today - timedelta(days=i)
-        
-        has_activity = (
-            db.query(models.ActivitySessions)
-            .filter(
-                models.ActivitySessions.user_hash == user_hash,
-                models.ActivitySessions.status == "completed",
-                func.date(models.ActivitySessions.completed_at) == check_date,
-            )
-            .first()
-        ) is not None
-        
-        if has_activity:
-            streak += 1
-        elif i == 0:
-            # Today has no activity yet, but don't break streak
-            continue
-        else:
-            break
-    
-    return streak
-
-
-def _calculate_longest_streak(db: Session, user_hash: str) -> int:
-    """Calculate longest streak of consecutive days with activity."""
-    # Get all activity dates
-    activity_dates = (
-        db.query(func.date(models.ActivitySessions.completed_at))
-        .filter(
-            models.ActivitySessions.user_hash == user_hash,
-            models.ActivitySessions.status == "completed",
-            models.ActivitySessions.completed_at.isnot(None),
-        )
-        .distinct()
-        .order_by(func.date(models.ActivitySessions.completed_at))
-        .all()
-    )
-    
-    if not activity_dates:
-        return 0
-    
-    dates = sorted([d[0] for d in activity_dates if d[0]])
-    
-    if not dates:
-        return 0
-    
-    longest = 1
-    current = 1
-    
-    for i in range(1, len(dates)):
-        if dates[i] - dates[i-1] == timedelta(days=1):
-            current += 1
-            longest = max(longest, current)
-        else:
-            current = 1
-    
-    return longest
-
-
 def _get_last_active_datetime(db: Session, user_hash: str) -> Optional[datetime]:
-    """Get the most recent activity timestamp."""
-    # Check multiple tables
-    timestamps = []
-    
-    # Last journal
-    last_journal = (
-        db.query(func.max(models.JournalEntries.created_at))
-        .filter(models.JournalEntries.user_hash == user_hash)
-        .scalar()
-    )
-    if last_journal:
-        timestamps.append(last_journal)
-    
-    # Last activity
-    last_activity = (
-        db.query(func.max(models.ActivitySessions.created_at))
-        .filter(models.ActivitySessions.user_hash == user_hash)
-        .scalar()
+    """Get the most recent activity timestamp (journal, activity or session) in one query."""
+    latest = union_all(
+        select(func.max(models.JournalEntries.created_at))
+        .where(models.JournalEntries.user_hash == user_hash),
+        select(func.max(models.ActivitySessions.created_at))
+        .where(models.ActivitySessions.user_hash == user_hash),
+        select(func.max(models.Sessions.created_at))
+        .where(models.Sessions.user_hash == user_hash),
     )
-    if last_activity:
-        timestamps.append(last_activity)
-    
-    # Last session
-    last_session = (
-        db.query(func.max(models.Sessions.created_at))
-        .filter(models.Sessions.user_hash == user_hash)
-        .scalar()
-    )
-    if last_session:
-        timestamps.append(last_session)
-    
+    timestamps = [row[0] for row in db.execute(latest).all() if row[0]]
     return max(timestamps) if timestamps else None
 
 
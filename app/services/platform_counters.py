@@ -0,0 +1,270 @@
+"""
+Platform Counters Service
+
+Materialized platform-wide counts for the admin console's /stats view, kept
+in the platform_counters table instead of a dozen COUNT(*) scans per page
+load:
+- Totals: active users, audio sessions, completed activities, journal
+  entries, feedback, chills taps, video sessions, ML questionnaires
+- Per-UTC-day buckets for sessions and completed activities ("sessions:2024-05-01")
+
+Counters move by +1/-1 in an after_flush hook on SessionLocal, in the same
+transaction as the write. Active users today / this week come from the
+user_daily_stats rollup (engagement_rollup). Bulk statements bypass the
+hook; recompute() recounts everything from the raw tables and overwrites the
+stored values (/api/admin/stats?fresh=1).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta, date
+from typing import Dict, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+TOTALS = (
+    "users",
+    "sessions",
+    "activities_completed",
+    "journal_entries",
+    "feedback",
+    "chills",
+    "video_sessions",
+    "ml_questionnaires",
+)
+DAILY = ("sessions", "activities_completed")
+
+_table = models.PlatformCounter.__table__
+
+# Plain row counters: one per model, +1 on insert, -1 on delete
+_ROW_COUNTERS = (
+    (models.Sessions, "sessions"),
+    (models.JournalEntries, "journal_entries"),
+    (models.Feedback, "feedback"),
+    (models.ChillsTimestamp, "chills"),
+    (models.VideoSession, "video_sessions"),
+    (models.MLQuestionnaireResponse, "ml_questionnaires"),
+)
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+def daily_name(counter: str, day: date) -> str:
+    return f"{counter}:{day.isoformat()}"
+
+
+def _day_of(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _today()
+
+
+def _previous(obj, attr: str):
+    """(changed, old value) of a column on a dirty object."""
+    hist = inspect(obj).attrs[attr].history
+    if not hist.has_changes():
+        return False, None
+    return True, hist.deleted[0] if hist.deleted else None
+
+
+# =============================================================================
+# INCREMENTAL MAINTENANCE (after_flush hook)
+# =============================================================================
+
+
+def _collect_deltas(session: Session) -> Dict[str, int]:
+    deltas: Dict[str, int] = defaultdict(int)
+
+    for sign, objs in ((1, session.new), (-1, session.deleted)):
+        for obj in objs:
+            if isinstance(obj, models.Users):
+                if obj.deleted_at is None:
+                    deltas["users"] += sign
+                continue
+            if isinstance(obj, models.ActivitySessions):
+                if obj.completed_at is not None:
+                    deltas["activities_completed"] += sign
+                    deltas[daily_name("activities_completed", _day_of(obj.completed_at))] += sign
+                continue
+            for model, counter in _ROW_COUNTERS:
+                if isinstance(obj, model):
+                    deltas[counter] += sign
+                    if counter == "sessions":
+                        deltas[daily_name("sessions", _day_of(obj.created_at))] += sign
+                    break
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Users):
+            changed, was = _previous(obj, "deleted_at")
+            if changed and (was is None) != (obj.deleted_at is None):
+                deltas["users"] += 1 if obj.deleted_at is None else -1
+        elif isinstance(obj, models.ActivitySessions):
+            changed, was = _previous(obj, "completed_at")
+            if not changed:
+                continue
+            if was is not None:
+                deltas["activities_completed"] -= 1
+                deltas[daily_name("activities_completed", _day_of(was))] -= 1
+            if obj.completed_at is not None:
+                deltas["activities_completed"] += 1
+                deltas[daily_name("activities_completed", _day_of(obj.completed_at))] += 1
+
+    return {name: n for name, n in deltas.items() if n}
+
+
+def _bump(conn, name: str, n: int) -> None:
+    now = datetime.utcnow()
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        conn.execute(
+            dialect_insert(_table)
+            .values(name=name, value=n, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=["name"], set_={"value": _table.c.value + n, "updated_at": now}
+            )
+        )
+        return
+
+    result = conn.execute(
+        update(_table).where(_table.c.name == name).values(value=_table.c.value + n, updated_at=now)
+    )
+    if not result.rowcount:
+        conn.execute(insert(_table).values(name=name, value=n, updated_at=now))
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    try:
+        deltas = _collect_deltas(session)
+        if not deltas:
+            return
+        conn = session.connection()
+        for name, n in deltas.items():
+            _bump(conn, name, n)
+    except Exception as e:
+        # Never fail the user's write over a counter; ?fresh=1 reconciles.
+        print(f"[platform_counters] Failed to update counters: {e}")
+
+
+def _noop(target, value, oldvalue, initiator):
+    return value
+
+
+def install(session_factory) -> None:
+    """Register the counter hook on a sessionmaker (idempotent)."""
+    if not event.contains(session_factory, "after_flush", _after_flush):
+        event.listen(session_factory, "after_flush", _after_flush)
+    # Load the previous value on assignment so transitions are counted once.
+    for attr in (models.Users.deleted_at, models.ActivitySessions.completed_at):
+        if not event.contains(attr, "set", _noop):
+            event.listen(attr, "set", _noop, retval=True, active_history=True)
+
+
+# =============================================================================
+# RECONCILE
+# =============================================================================
+
+
+def _exact_counts(db: Session, today: date) -> Dict[str, int]:
+    """Every stored counter recounted from the raw tables (one statement)."""
+    today_start = datetime.combine(today, datetime.min.time())
+    AS = models.ActivitySessions
+    A = models.ArchivedSessionCounts  # taps moved to the cold archive still count
+    done = AS.completed_at.isnot(None)
+
+    def count(model, *where):
+        q = select(func.count(model.id))
+        for w in where:
+            q = q.where(w)
+        return q.scalar_subquery()
+
+    exprs = {
+        "users": count(models.Users, models.Users.deleted_at.is_(None)),
+        "sessions": count(models.Sessions),
+        "activities_completed": count(AS, done),
+        "journal_entries": count(models.JournalEntries),
+        "feedback": count(models.Feedback),
+        "chills": count(models.ChillsTimestamp) + select(func.coalesce(func.sum(A.row_count), 0)).where(
+            A.source == "chills"
+        ).scalar_subquery(),
+        "video_sessions": count(models.VideoSession),
+        "ml_questionnaires": count(models.MLQuestionnaireResponse),
+        daily_name("sessions", today): count(models.Sessions, models.Sessions.created_at >= today_start),
+        daily_name("activities_completed", today): count(AS, done, AS.completed_at >= today_start),
+    }
+    row = db.execute(select(*[e.label(f"c{i}") for i, e in enumerate(exprs.values())])).one()
+    return {name: int(v or 0) for name, v in zip(exprs, row)}
+
+
+def recompute(db: Session, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Recount the counters from the raw tables and overwrite the stored values.
+    Daily buckets older than a week are dropped. Commits.
+    """
+    today = today or _today()
+    counts = _exact_counts(db, today)
+    now = datetime.utcnow()
+
+    keep = {daily_name(c, today - timedelta(days=i)) for c in DAILY for i in range(8)}
+    stale = [
+        name for (name,) in db.execute(select(_table.c.name).where(_table.c.name.like("%:%"))).all()
+        if name not in keep
+    ]
+    if stale:
+        db.execute(delete(_table).where(_table.c.name.in_(stale)))
+    db.execute(delete(_table).where(_table.c.name.in_(list(counts))))
+    db.execute(insert(_table), [{"name": n, "value": v, "updated_at": now} for n, v in counts.items()])
+    db.commit()
+    return counts
+
+
+# =============================================================================
+# READER
+# =============================================================================
+
+
+def read_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Stored totals, today's buckets and active-user counts in one statement.
+
+    Active users are users with an audio session in user_daily_stats today /
+    in the last 7 UTC days.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    week_start = today - timedelta(days=6)
+    names = list(TOTALS) + [daily_name(c, today) for c in DAILY]
+    UDS = models.UserDailyStats
+
+    stmt = union_all(
+        select(_table.c.name, _table.c.value).where(_table.c.name.in_(names)),
+        select(literal("active_users_today"), func.count(UDS.id)).where(
+            UDS.date == today, UDS.audio_sessions > 0
+        ),
+        select(literal("active_users_week"), func.count(func.distinct(UDS.user_hash))).where(
+            UDS.date >= week_start, UDS.audio_sessions > 0
+        ),
+    )
+    return {name: int(value or 0) for name, value in db.execute(stmt).all()}
+
+
+def has_totals(stats: Dict[str, int]) -> bool:
+    """False until the counters have been reconciled once (e.g. right after deploy)."""
+    return all(name in stats for name in TOTALS)
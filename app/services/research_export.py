@@ -0,0 +1,357 @@
+"""
+Research Export Service
+
+Columnar (Parquet / Arrow IPC) snapshots of the research tables for analysts.
+Each table is written as a Hive-style month-partitioned dataset:
+
+    <out>/<table>/month=2024-03/part-0.parquet
+
+so `pandas.read_parquet("<out>/chills")` loads every month with a `month`
+column, and a single month can be read on its own. Rows are streamed from
+the database in batches (yield_per) and written one record batch at a time,
+so memory stays bounded by the batch size.
+
+Identifier and category-like string columns (user_hash, session_id,
+video_name, ...) are dictionary-encoded; free text is stored as plain
+strings. Parquet pages and Arrow IPC buffers are zstd-compressed.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, select
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+BATCH_SIZE = int(os.getenv("REWIRE_RESEARCH_EXPORT_BATCH", "10000"))
+FORMATS = ("parquet", "arrow")
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# Research tables whose old rows may live in the cold archive (cold_archive.SOURCES)
+ARCHIVED_TABLES = ("chills", "body_map")
+
+
+# =============================================================================
+# TABLE REGISTRY
+# =============================================================================
+
+
+@dataclass
+class ExportTable:
+    """One exported dataset: its columns, the month-partition column and joins."""
+    name: str
+    model: Any
+    columns: Dict[str, Any]
+    partition_column: Any
+    categorical: Tuple[str, ...] = ()
+    joins: List[Tuple[Any, Any]] = field(default_factory=list)
+
+
+def _tables() -> Dict[str, ExportTable]:
+    C = models.ChillsTimestamp
+    B = models.BodyMapSpot
+    P = models.PostVideoResponse
+    M = models.MLQuestionnaireResponse
+    VS = models.VideoSession
+
+    tables = [
+        ExportTable(
+            name="chills",
+            model=C,
+            columns={
+                "id": C.id,
+                "user_hash": C.user_hash,
+                "session_id": C.session_id,
+                "video_time_seconds": C.video_time_seconds,
+                "video_name": C.video_name,
+                "intensity": C.intensity,
+                "created_at": C.created_at,
+            },
+            partition_column=C.created_at,
+            categorical=("user_hash", "session_id", "video_name"),
+        ),
+        ExportTable(
+            name="body_map",
+            model=B,
+            columns={
+                "id": B.id,
+                "user_hash": VS.user_hash,
+                "session_id": B.session_id,
+                "x_percent": B.x_percent,
+                "y_percent": B.y_percent,
+                "created_at": B.created_at,
+            },
+            partition_column=B.created_at,
+            categorical=("user_hash", "session_id"),
+            joins=[(VS, VS.session_id == B.session_id)],
+        ),
+        ExportTable(
+            name="post_video_responses",
+            model=P,
+            columns={
+                "id": P.id,
+                "user_hash": P.user_hash,
+                "session_id": P.session_id,
+                "insights_text": P.insights_text,
+                "value_selected": P.value_selected,
+                "value_custom": P.value_custom,
+                "action_selected": P.action_selected,
+                "action_custom": P.action_custom,
+                "created_at": P.created_at,
+            },
+            partition_column=P.created_at,
+            categorical=("user_hash", "session_id", "value_selected", "action_selected"),
+        ),
+        ExportTable(
+            name="ml_questionnaire",
+            model=M,
+            columns={
+                "id": M.id,
+                "user_hash": M.user_hash,
+                "dpes_1": M.dpes_1,
+                "dpes_4": M.dpes_4,
+                "dpes_29": M.dpes_29,
+                "neo_ffi_10": M.neo_ffi_10,
+                "neo_ffi_14": M.neo_ffi_14,
+                "neo_ffi_16": M.neo_ffi_16,
+                "neo_ffi_45": M.neo_ffi_45,
+                "neo_ffi_46": M.neo_ffi_46,
+                "kamf_4_1": M.kamf_4_1,
+                "age": M.age,
+                "gender": M.gender,
+                "ethnicity": M.ethnicity,
+                "education": M.education,
+                "depression_status": M.depression_status,
+                "created_at": M.created_at,
+            },
+            partition_column=M.created_at,
+            categorical=("user_hash", "age", "gender", "ethnicity", "education", "depression_status"),
+        ),
+        ExportTable(
+            name="video_sessions",
+            model=VS,
+            columns={
+                "id": VS.id,
+                "session_id": VS.session_id,
+                "user_hash": VS.user_hash,
+                "video_id": VS.video_id,
+                "started_at": VS.started_at,
+                "completed_at": VS.completed_at,
+                "watched_duration_seconds": VS.watched_duration_seconds,
+                "completed": VS.completed,
+                "chills_count": VS.chills_count,
+                "body_map_spots": VS.body_map_spots,
+                "has_response": VS.has_response,
+            },
+            partition_column=VS.started_at,
+            categorical=("user_hash",),
+        ),
+    ]
+    return {t.name: t for t in tables}
+
+
+TABLES = _tables()
+
+
+# =============================================================================
+# SCHEMA
+# =============================================================================
+
+
+def _arrow_type(column, categorical: bool) -> pa.DataType:
+    sql_type = column.type
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, Date):
+        return pa.date32()
+    return pa.dictionary(pa.int32(), pa.string()) if categorical else pa.string()
+
+
+def arrow_schema(table: ExportTable) -> pa.Schema:
+    """Arrow schema for a table, derived from the SQLAlchemy column types."""
+    return pa.schema([
+        pa.field(name, _arrow_type(col, name in table.categorical))
+        for name, col in table.columns.items()
+    ])
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+
+def _month_key(value) -> str:
+    if value is None:
+        return NULL_PARTITION
+    if isinstance(value, str):
+        return value[:7]
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def iter_month_rows(
+    db: Session,
+    table: ExportTable,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    batch_size: int = BATCH_SIZE,
+):
+    """
+    Yield (month, rows) in partition-column order, at most batch_size rows at a
+    time. A database batch that spans a month boundary is split, so every
+    chunk belongs to one month.
+    """
+    part = table.partition_column
+    stmt = select(*[col.label(name) for name, col in table.columns.items()]).select_from(table.model)
+    for target, on in table.joins:
+        stmt = stmt.outerjoin(target, on)
+    if start:
+        stmt = stmt.where(part >= datetime.combine(start, datetime.min.time()))
+    if end:
+        stmt = stmt.where(part < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    stmt = stmt.order_by(part.is_(None), part, table.model.id)
+
+    part_index = next(i for i, col in enumerate(table.columns.values()) if col is part)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        chunk, month = [], None
+        for row in rows:
+            key = _month_key(row[part_index])
+            if month is not None and key != month:
+                yield month, chunk
+                chunk = []
+            month = key
+            chunk.append(row)
+        if chunk:
+            yield month, chunk
+
+
+class _PartitionWriter:
+    """
+    Writes rows into <root>/month=<key>/<part>-<n>.<ext>, one open file at a
+    time. n counts how often a month has been opened, so coming back to a
+    month starts a new file instead of overwriting the first one.
+
+    Dictionary columns are encoded against a vocabulary that only grows within
+    a file, so every batch's dictionary extends the previous one. Arrow IPC
+    files accept that as dictionary deltas; replacing a dictionary is an error.
+    """
+
+    def __init__(self, root: Path, schema: pa.Schema, fmt: str, part: str = "part"):
+        self.root = root
+        self.schema = schema
+        self.fmt = fmt
+        self.part = part
+        self._opened: Dict[str, int] = {}
+        self.month: Optional[str] = None
+        self.files: Dict[str, int] = {}
+        self._writer = None
+        self._sink = None
+        self._vocab: Dict[int, Tuple[List[str], Dict[str, int]]] = {}
+
+    def write(self, month: str, rows: Sequence) -> None:
+        if month != self.month:
+            self.close()
+            self._open(month)
+        self._writer.write_batch(self._to_batch(rows))
+        self.files[self._path] += len(rows)
+
+    def _to_batch(self, rows: Sequence) -> pa.RecordBatch:
+        arrays = []
+        for i, f in enumerate(self.schema):
+            values = [row[i] for row in rows]
+            if not pa.types.is_dictionary(f.type):
+                arrays.append(pa.array(values, type=f.type))
+                continue
+            words, index = self._vocab.setdefault(i, ([], {}))
+            codes = []
+            for v in values:
+                if v is None:
+                    codes.append(None)
+                    continue
+                code = index.get(v)
+                if code is None:
+                    code = index[v] = len(words)
+                    words.append(v)
+                codes.append(code)
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(codes, type=pa.int32()), pa.array(words, type=pa.string())
+            ))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _open(self, month: str) -> None:
+        directory = self.root / f"month={month}"
+        directory.mkdir(parents=True, exist_ok=True)
+        self.month = month
+        self._vocab = {}
+        n = self._opened.get(month, 0)
+        self._opened[month] = n + 1
+        if self.fmt == "parquet":
+            self._path = str(directory / f"{self.part}-{n}.parquet")
+            self._writer = pq.ParquetWriter(self._path, self.schema, compression="zstd", use_dictionary=True)
+        else:
+            self._path = str(directory / f"{self.part}-{n}.arrow")
+            self._sink = pa.OSFile(self._path, "wb")
+            self._writer = ipc.new_file(
+                self._sink, self.schema, options=ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+            )
+        self.files[self._path] = 0
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        self.month = None
+
+
+def export_table(
+    db: Session,
+    name: str,
+    out_dir,
+    fmt: str = "parquet",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Write one table as a month-partitioned dataset under out_dir/<name>.
+    Returns {file path: row count}. Rows are ordered by the partition column,
+    so each month's file is opened once. Rows moved to the cold archive
+    (chills, body_map) are written first; they are older than any live row.
+    """
+    if name not in TABLES:
+        raise ValueError(f"Unknown research table: {name}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    table = TABLES[name]
+    writer = _PartitionWriter(Path(out_dir) / name, arrow_schema(table), fmt)
+    try:
+        if name in ARCHIVED_TABLES:
+            from app.services import cold_archive
+
+            names = list(table.columns)
+            for month, rows in cold_archive.iter_archived_rows(db, name, start, end):
+                writer.write(month, [[row.get(n) for n in names] for row in rows])
+        for month, rows in iter_month_rows(db, table, start, end, batch_size):
+            writer.write(month, rows)
+    finally:
+        writer.close()
+    return writer.files
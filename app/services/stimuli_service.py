@@ -14,9 +14,12 @@ The service loads Stimuli.csv and provides convenient methods to:
 
 import os
 import re
+import math
+import bisect
 import logging
 import unicodedata
-from typing import Dict, List, Optional, Any
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 import pandas as pd
 
@@ -189,6 +192,163 @@ class Stimulus:
         return f"Stimulus(index={self.index}, name='{self.name}')"
 
 
+# ============================================================================
+# SEARCH INDEX
+# ============================================================================
+
+def _trigrams(s: str) -> Set[str]:
+    """Character trigrams of a normalized string, padded so short names still match."""
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StimuliSearchIndex:
+    """
+    Inverted index over stimulus names and descriptions.
+    
+    Built once at load time from pre-normalized text:
+    - term -> postings {doc: (tf in name, tf in description)}, scored with
+      BM25 per field (name weighted above description)
+    - sorted vocabulary for prefix expansion of query terms
+    - character-trigram postings over names for fuzzy name lookup
+    
+    Query cost depends on the postings touched, not on catalogue size.
+    """
+    
+    K1 = 1.2
+    B = 0.75
+    NAME_WEIGHT = 3.0
+    DESC_WEIGHT = 1.0
+    PREFIX_DISCOUNT = 0.5
+    MIN_PREFIX_LEN = 2
+    MAX_PREFIX_TERMS = 50
+    
+    # Phrase bonuses kept from the original substring scoring
+    EXACT_NAME_BONUS = 100.0
+    NAME_PHRASE_BONUS = 50.0
+    DESC_PHRASE_BONUS = 20.0
+    
+    def __init__(self, stimuli: List[Stimulus]):
+        self.names: List[str] = []
+        self.descs: List[str] = []
+        self.name_len: List[int] = []
+        self.desc_len: List[int] = []
+        self.postings: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        self.trigram_postings: Dict[str, Set[int]] = defaultdict(set)
+        self.name_trigram_count: List[int] = []
+        
+        tf: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        for doc, stimulus in enumerate(stimuli):
+            name_norm = normalize_text(stimulus.name)
+            desc_norm = normalize_text(stimulus.description)
+            name_toks = name_norm.split()
+            desc_toks = desc_norm.split()
+            
+            self.names.append(name_norm)
+            self.descs.append(desc_norm)
+            self.name_len.append(len(name_toks))
+            self.desc_len.append(len(desc_toks))
+            
+            for field, toks in ((0, name_toks), (1, desc_toks)):
+                for t in toks:
+                    counts = tf[t].setdefault(doc, [0, 0])
+                    counts[field] += 1
+            
+            grams = _trigrams(name_norm)
+            self.name_trigram_count.append(len(grams))
+            for g in grams:
+                self.trigram_postings[g].add(doc)
+        
+        self.postings = {t: {d: (c[0], c[1]) for d, c in docs.items()} for t, docs in tf.items()}
+        self.vocab: List[str] = sorted(self.postings)
+        self.n_docs = len(stimuli)
+        self.avg_name_len = (sum(self.name_len) / self.n_docs) if self.n_docs else 0.0
+        self.avg_desc_len = (sum(self.desc_len) / self.n_docs) if self.n_docs else 0.0
+    
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+    
+    def _bm25(self, tf: int, length: int, avg_len: float) -> float:
+        if tf == 0:
+            return 0.0
+        norm = 1.0 - self.B + self.B * (length / avg_len if avg_len else 0.0)
+        return tf * (self.K1 + 1.0) / (tf + self.K1 * norm)
+    
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Exact term at full weight plus vocabulary terms it prefixes, discounted."""
+        terms = []
+        if token in self.postings:
+            terms.append((token, 1.0))
+        if len(token) >= self.MIN_PREFIX_LEN:
+            i = bisect.bisect_right(self.vocab, token)
+            while i < len(self.vocab) and self.vocab[i].startswith(token) and len(terms) < self.MAX_PREFIX_TERMS:
+                terms.append((self.vocab[i], self.PREFIX_DISCOUNT))
+                i += 1
+        return terms
+    
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """Return doc ids ranked by BM25 over name + description, best first."""
+        query_norm = normalize_text(query)
+        if not query_norm:
+            return []
+        
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(query_norm.split()):
+            for term, weight in self._expand(token):
+                idf = self._idf(term)
+                for doc, (tf_name, tf_desc) in self.postings[term].items():
+                    scores[doc] += weight * idf * (
+                        self.NAME_WEIGHT * self._bm25(tf_name, self.name_len[doc], self.avg_name_len)
+                        + self.DESC_WEIGHT * self._bm25(tf_desc, self.desc_len[doc], self.avg_desc_len)
+                    )
+        
+        # Phrase bonuses only need checking on docs that already matched
+        for doc in scores:
+            if query_norm == self.names[doc]:
+                scores[doc] += self.EXACT_NAME_BONUS
+            elif query_norm in self.names[doc]:
+                scores[doc] += self.NAME_PHRASE_BONUS
+            elif query_norm in self.descs[doc]:
+                scores[doc] += self.DESC_PHRASE_BONUS
+        
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        return [doc for doc, score in ranked[:limit] if score > 0]
+    
+    def fuzzy_name(self, name: str, min_similarity: float = 0.5) -> Optional[int]:
+        """
+        Best fuzzy name match via trigram overlap.
+        
+        A name containing the query (or contained in it) wins, as in the
+        original partial match; otherwise the highest Dice similarity at or
+        above min_similarity.
+        """
+        query_norm = normalize_text(name)
+        if not query_norm:
+            return None
+        grams = _trigrams(query_norm)
+        
+        overlap: Dict[int, int] = defaultdict(int)
+        for g in grams:
+            for doc in self.trigram_postings.get(g, ()):
+                overlap[doc] += 1
+        if not overlap:
+            return None
+        
+        def dice(doc: int) -> float:
+            return 2.0 * overlap[doc] / (len(grams) + self.name_trigram_count[doc])
+        
+        containing = [
+            d for d in overlap
+            if query_norm in self.names[d] or self.names[d] in query_norm
+        ]
+        if containing:
+            return max(containing, key=lambda d: (dice(d), -d))
+        
+        best = max(overlap, key=lambda d: (dice(d), -d))
+        return best if dice(best) >= min_similarity else None
+
+
 # ============================================================================
 # STIMULI SERVICE CLASS
 # ============================================================================
@@ -209,6 +369,7 @@ class StimuliService:
         self._by_name: Dict[str, Stimulus] = {}
         self._by_normalized_name: Dict[str, Stimulus] = {}
         self._by_video_id: Dict[str, Stimulus] = {}
+        self._index: Optional[StimuliSearchIndex] = None
         
         try:
             self._load_stimuli()
@@ -293,6 +454,8 @@ class StimuliService:
             
             if stimulus.video_id:
                 self._by_video_id[stimulus.video_id] = stimulus
+        
+        self._index = StimuliSearchIndex(self._stimuli)
     
     @property
     def is_initialized(self) -> bool:
@@ -362,10 +525,11 @@ class StimuliService:
             if normalized in self._by_normalized_name:
                 return self._by_normalized_name[normalized]
             
-            # Try partial match
-            for norm_name, stimulus in self._by_normalized_name.items():
-                if normalized in norm_name or norm_name in normalized:
-                    return stimulus
+            # Try partial / trigram fuzzy match
+            if self._index is not None:
+                doc = self._index.fuzzy_name(name)
+                if doc is not None:
+                    return self._stimuli[doc]
         
         return None
     
@@ -400,7 +564,8 @@ class StimuliService:
         """
         Search stimuli by query string.
         
-        Searches in name and description.
+        Searches in name and description using the inverted index (BM25
+        with prefix matching, plus exact/phrase bonuses on name matches).
         
         Args:
             query: Search query
@@ -409,46 +574,9 @@ class StimuliService:
         Returns:
             List of matching Stimulus objects
         """
-        query_norm = normalize_text(query)
-        query_words = set(query_norm.split())
-        
-        results = []
-        for stimulus in self._stimuli:
-            name_norm = normalize_text(stimulus.name)
-            desc_norm = normalize_text(stimulus.description)
-            
-            # Calculate simple relevance score
-            score = 0
-            
-            # Exact name match
-            if query_norm == name_norm:
-                score += 100
-            # Name contains query
-            elif query_norm in name_norm:
-                score += 50
-            # Description contains query
-            elif query_norm in desc_norm:
-                score += 20
-            else:
-                # Word overlap
-                name_words = set(name_norm.split())
-                desc_words = set(desc_norm.split())
-                
-                name_overlap = len(query_words & name_words)
-                desc_overlap = len(query_words & desc_words)
-                
-                if name_overlap > 0:
-                    score += name_overlap * 10
-                if desc_overlap > 0:
-                    score += desc_overlap * 2
-            
-            if score > 0:
-                results.append((score, stimulus))
-        
-        # Sort by score descending
-        results.sort(key=lambda x: x[0], reverse=True)
-        
-        return [s for _, s in results[:limit]]
+        if self._index is None:
+            return []
+        return [self._stimuli[doc] for doc in self._index.search(query, limit=limit)]
     
     def get_videos_only(self) -> List[Stimulus]:
         """
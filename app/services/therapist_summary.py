@@ -6,17 +6,24 @@ Generates AI-powered summaries and insights for therapist dashboard:
 - What's working analysis
 - Focus area recommendations
 - Clinical insights from patient data
+
+Summaries and session prep notes are materialized in
+patient_summary_snapshots (see get_patient_summary / get_session_prep_notes)
+and only regenerated when the patient's data version changes or the stored
+copy is older than REWIRE_SUMMARY_MAX_AGE_HOURS.
 """
 
 from __future__ import annotations
 
 import json
+import os
 from datetime import datetime, timedelta, date
 from typing import List, Optional, Dict, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 from app import models
 from app.services.patient_analytics import (
@@ -636,7 +643,7 @@ def generate_session_prep_notes(
             .filter(
                 models.ActivitySessions.user_hash == user_hash,
                 models.ActivitySessions.status == "completed",
-                func.date(models.ActivitySessions.completed_at) >= last_session_date,
+                models.ActivitySessions.completed_at >= datetime.combine(last_session_date, datetime.min.time()),
             )
             .scalar()
         ) or 0
@@ -816,3 +823,162 @@ def check_has_milestone(
         )
     
     return (False, "", "")
+
+
+# =============================================================================
+# MATERIALIZED SUMMARIES
+# =============================================================================
+
+
+SUMMARY_MAX_AGE = timedelta(hours=float(os.getenv("REWIRE_SUMMARY_MAX_AGE_HOURS", "24")))
+
+
+def get_summary_data_version(db: Session, user_hash: str, extra: str = "") -> str:
+    """
+    Stamp of everything a summary depends on, in one query.
+    
+    Changes when any rollup-tracked write happens (activities, journals,
+    sessions, feedback, chills), when a journal entry or feedback is edited
+    (their updated_at), when a new intake is stored, and at UTC midnight (the
+    weekly windows move).
+    """
+    rollup_ts = (
+        db.query(func.max(models.UserDailyStats.updated_at))
+        .filter(models.UserDailyStats.user_hash == user_hash)
+        .scalar_subquery()
+    )
+    journal_ts = (
+        db.query(func.max(models.JournalEntries.updated_at))
+        .filter(models.JournalEntries.user_hash == user_hash)
+        .scalar_subquery()
+    )
+    feedback_ts = (
+        db.query(func.max(models.Feedback.updated_at))
+        .join(models.Sessions, models.Sessions.id == models.Feedback.session_id)
+        .filter(models.Sessions.user_hash == user_hash)
+        .scalar_subquery()
+    )
+    intake_id = (
+        db.query(func.max(models.ClinicalIntake.id))
+        .filter(models.ClinicalIntake.user_hash == user_hash)
+        .scalar_subquery()
+    )
+    ts, journal, feedback, intake = db.query(rollup_ts, journal_ts, feedback_ts, intake_id).one()
+    return f"{datetime.utcnow().date().isoformat()}|{ts}|{journal}|{feedback}|{intake}|{extra}"
+
+
+def _load_snapshot(db: Session, user_hash: str, kind: str, version: str) -> Optional[Dict[str, Any]]:
+    row = (
+        db.query(models.PatientSummarySnapshot)
+        .filter(
+            models.PatientSummarySnapshot.user_hash == user_hash,
+            models.PatientSummarySnapshot.kind == kind,
+        )
+        .first()
+    )
+    if not row or row.data_version != version:
+        return None
+    if row.generated_at and datetime.utcnow() - row.generated_at.replace(tzinfo=None) > SUMMARY_MAX_AGE:
+        return None
+    try:
+        return json.loads(row.payload_json)
+    except Exception:
+        return None
+
+
+def _store_snapshot(db: Session, user_hash: str, kind: str, version: str, payload: Dict[str, Any]) -> None:
+    payload_json = json.dumps(payload, default=str)
+    now = datetime.utcnow()
+    row = (
+        db.query(models.PatientSummarySnapshot)
+        .filter(
+            models.PatientSummarySnapshot.user_hash == user_hash,
+            models.PatientSummarySnapshot.kind == kind,
+        )
+        .first()
+    )
+    if row:
+        row.data_version = version
+        row.payload_json = payload_json
+        row.generated_at = now
+    else:
+        db.add(models.PatientSummarySnapshot(
+            user_hash=user_hash,
+            kind=kind,
+            data_version=version,
+            payload_json=payload_json,
+            generated_at=now,
+        ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker stored the same snapshot first
+        db.rollback()
+
+
+def _summary_from_dict(d: Dict[str, Any]) -> PatientSummary:
+    d = dict(d)
+    d["generated_at"] = datetime.fromisoformat(d["generated_at"])
+    if d.get("journal_insight_date"):
+        d["journal_insight_date"] = date.fromisoformat(d["journal_insight_date"])
+    return PatientSummary(**d)
+
+
+def get_patient_summary(
+    db: Session,
+    user_hash: str,
+    patient_name: Optional[str] = None,
+    force: bool = False,
+) -> PatientSummary:
+    """
+    Materialized generate_patient_summary: served from storage while the
+    patient's data version is unchanged, regenerated (and stored) otherwise.
+    """
+    version = get_summary_data_version(db, user_hash, extra=patient_name or "")
+    if not force:
+        cached = _load_snapshot(db, user_hash, "summary", version)
+        if cached is not None:
+            try:
+                return _summary_from_dict(cached)
+            except Exception:
+                pass
+    
+    summary = generate_patient_summary(db, user_hash, patient_name)
+    _store_snapshot(db, user_hash, "summary", version, asdict(summary))
+    return summary
+
+
+def get_session_prep_notes(
+    db: Session,
+    user_hash: str,
+    patient_name: Optional[str] = None,
+    last_session_date: Optional[date] = None,
+    force: bool = False,
+) -> SessionPrepNotes:
+    """Materialized generate_session_prep_notes (same staleness rules as get_patient_summary)."""
+    version = get_summary_data_version(
+        db, user_hash, extra=f"{patient_name or ''}|{last_session_date or ''}"
+    )
+    if not force:
+        cached = _load_snapshot(db, user_hash, "prep_notes", version)
+        if cached is not None:
+            try:
+                return SessionPrepNotes(**cached)
+            except Exception:
+                pass
+    
+    notes = generate_session_prep_notes(db, user_hash, patient_name, last_session_date)
+    _store_snapshot(db, user_hash, "prep_notes", version, asdict(notes))
+    return notes
+
+
+def precompute_patient(
+    db: Session,
+    user_hash: str,
+    patient_name: Optional[str] = None,
+    last_session_date: Optional[date] = None,
+    force: bool = False,
+) -> None:
+    """Materialize both the summary and the session prep notes for one patient."""
+    get_patient_summary(db, user_hash, patient_name, force=force)
+    get_session_prep_notes(db, user_hash, patient_name, last_session_date, force=force)
@@ -0,0 +1,65 @@
+"""
+Move old journey_events, chills taps and body map spots to the cold archive.
+
+Whole months older than --older-than-days (REWIRE_ARCHIVE_AFTER_DAYS, 180)
+are written to zstd Parquet files under REWIRE_ARCHIVE_DIR and deleted from
+the database; per-session daily counts stay in archived_session_counts. Safe
+to rerun (e.g. nightly): archived months have no rows left, and files from an
+interrupted run are removed first. A second run started while one is in
+progress exits without doing anything.
+
+    python scripts/archive_cold_data.py                          # everything past the default age
+    python scripts/archive_cold_data.py --older-than-days 365
+    python scripts/archive_cold_data.py --tables chills --dry-run
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import Base, SessionLocal, engine
+from app.services import cold_archive
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--older-than-days", type=int, default=cold_archive.ARCHIVE_AFTER_DAYS)
+    ap.add_argument(
+        "--tables", default=",".join(cold_archive.SOURCES),
+        help=f"comma-separated, any of {', '.join(cold_archive.SOURCES)}",
+    )
+    ap.add_argument("--archive-dir", type=Path, default=cold_archive.ARCHIVE_DIR)
+    ap.add_argument("--dry-run", action="store_true", help="only report what would be archived")
+    args = ap.parse_args()
+
+    sources = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = [t for t in sources if t not in cold_archive.SOURCES]
+    if unknown:
+        ap.error(f"unknown tables: {', '.join(unknown)}")
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        cutoff = cold_archive.cutoff_date(args.older_than_days)
+        try:
+            results = cold_archive.archive_old_rows(
+                db, sources, args.older_than_days, args.archive_dir, dry_run=args.dry_run
+            )
+        except cold_archive.ArchiveBusy as e:
+            raise SystemExit(str(e))
+        verb = "Would archive" if args.dry_run else "Archived"
+        for res in results:
+            print(f"  {res.source:<15} {res.month}  {res.rows:>9} rows")
+        print(
+            f"{verb} {sum(r.rows for r in results)} rows from before {cutoff.isoformat()} "
+            f"in {len(results)} table-months ({time.perf_counter() - t0:.2f}s)"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Rebuild the user_daily_stats engagement rollup from the raw tables.
+
+Migration 014 does the initial full backfill; run this periodically as a
+catch-up job to repair anything written outside the ORM hook (bulk deletes,
+manual SQL). Rows in scope are recomputed and replaced in one transaction.
+
+    python scripts/backfill_user_daily_stats.py                  # everything
+    python scripts/backfill_user_daily_stats.py --days 3         # catch-up: last 3 days
+    python scripts/backfill_user_daily_stats.py --user-hash abc  # one user
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import Base, SessionLocal, engine
+from app.services.engagement_rollup import rebuild_daily_stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--user-hash", default=None, help="only rebuild this user")
+    ap.add_argument("--since", type=date.fromisoformat, default=None, help="only rebuild days >= YYYY-MM-DD")
+    ap.add_argument("--days", type=int, default=None, help="only rebuild the last N days (UTC)")
+    args = ap.parse_args()
+
+    since = args.since
+    if args.days is not None:
+        since = datetime.utcnow().date() - timedelta(days=max(args.days - 1, 0))
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        written = rebuild_daily_stats(db, user_hash=args.user_hash, since=since)
+        db.commit()
+        scope = ", ".join(
+            s for s in (
+                f"user {args.user_hash}" if args.user_hash else "",
+                f"since {since.isoformat()}" if since else "",
+            ) if s
+        ) or "all users, all days"
+        print(f"Rebuilt {written} user_daily_stats rows ({scope}) in {time.perf_counter() - t0:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
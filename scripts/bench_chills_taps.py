@@ -0,0 +1,122 @@
+"""
+Chills tap ingestion benchmark.
+
+Seeds a throwaway SQLite database with a few video stimuli, then through the
+app (TestClient) reports:
+
+- SQL statements per request for POST /api/chills/timestamp, for a new
+  session (cold) and for a session this worker has already seen (warm), and
+  for POST /api/chills/timestamps/batch
+- taps/s for several threads tapping single taps vs sending batches
+
+Hook statements (engagement rollup, platform counters) run once per
+transaction and are listed separately. On SQLite each tap in a batch is its
+own INSERT inside the one transaction (see chills_ingest); on PostgreSQL the
+flush is a single multi-row INSERT.
+
+    python scripts/bench_chills_taps.py [--threads 8] [--seconds 3] [--batch 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+HOOK_TABLES = ("user_daily_stats", "platform_counters")
+
+
+def _tap(session_id: str, i: int) -> dict:
+    return {
+        "session_id": session_id,
+        "video_time_seconds": i * 0.5,
+        "video_name": "Ocean Sunrise",
+        "user_hash": "bench-user",
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--batch", type=int, default=20, help="taps per batch request")
+    args = ap.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="rewire-chills-bench-")
+    os.environ["DB_URL"] = f"sqlite:///{tmpdir}/bench.db"
+    os.environ.setdefault("REWIRE_ML_WARMUP", "0")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app import models
+    from app.db import SessionLocal, engine
+    from app.main import app
+    from app.migrations import migrate
+
+    migrate(engine)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def count(fn) -> tuple:
+        statements.clear()
+        fn()
+        hooks = [s for s in statements if any(t in s for t in HOOK_TABLES)]
+        return len(statements) - len(hooks), len(hooks)
+
+    with TestClient(app) as client:
+        def post(path, body):
+            resp = client.post(path, json=body)
+            assert resp.status_code == 200, resp.text
+
+        print("statements per request (ingest + hooks)")
+        rows = (
+            ("single, cold session", lambda: post("/api/chills/timestamp", _tap("cold-1", 1))),
+            ("single, warm session", lambda: post("/api/chills/timestamp", _tap("cold-1", 2))),
+            (f"batch of {args.batch}, new session", lambda: post(
+                "/api/chills/timestamps/batch", {"taps": [_tap("cold-2", i) for i in range(args.batch)]})),
+            (f"batch of {args.batch}, warm session", lambda: post(
+                "/api/chills/timestamps/batch", {"taps": [_tap("cold-2", i) for i in range(args.batch)]})),
+        )
+        for label, fn in rows:
+            ingest, hooks = count(fn)
+            print(f"  {label:<28} {ingest:>3} + {hooks}")
+        event.remove(engine, "before_cursor_execute", _count)
+
+        for mode in ("single", "batch"):
+            done = [0] * args.threads
+            stop = time.monotonic() + args.seconds
+
+            def worker(n: int) -> None:
+                session_id = f"{mode}-{n}"
+                i = 0
+                while time.monotonic() < stop:
+                    if mode == "single":
+                        post("/api/chills/timestamp", _tap(session_id, i))
+                        i += 1
+                    else:
+                        post("/api/chills/timestamps/batch",
+                             {"taps": [_tap(session_id, i + k) for k in range(args.batch)]})
+                        i += args.batch
+                    done[n] = i
+
+            t0 = time.monotonic()
+            workers = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            elapsed = time.monotonic() - t0
+            print(f"{mode:<6} {args.threads} threads: {sum(done) / elapsed:8.0f} taps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark patient_analytics.get_engagement_metrics on a synthetic patient.
+
+Seeds a scratch SQLite database with one user and --days of history
+(activities, journals, audio sessions), builds the user_daily_stats rollup,
+then reports query count and latency for:
+- before: the original raw-table implementation (per-day streak loop,
+  one COUNT/MAX per metric), reproduced here as the baseline
+- after:  get_engagement_metrics (one rollup read + one UNION ALL)
+
+The original counted weekly totals over rolling 7x24h windows ending now;
+get_engagement_metrics counts 7 UTC calendar days (today and the 6 before).
+The before/after check runs the baseline on the calendar windows so the two
+lines should match; the rolling-window totals are printed for reference.
+
+    python scripts/bench_engagement_metrics.py [--days 730] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+_tmpdir = tempfile.mkdtemp(prefix="rewire-bench-")
+os.environ["DB_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event, func
+
+from app import models
+from app.db import Base, SessionLocal, engine
+from app.services.engagement_rollup import rebuild_daily_stats
+from app.services.patient_analytics import get_engagement_metrics
+
+USER = "bench-user"
+
+
+# =============================================================================
+# BASELINE (implementation before the rollup)
+# =============================================================================
+
+
+def _legacy_count(db, model, date_field, start, end, *filters):
+    q = db.query(func.count(model.id)).filter(model.user_hash == USER, date_field >= start, date_field < end)
+    for f in filters:
+        q = q.filter(f)
+    return q.scalar() or 0
+
+
+def legacy_engagement_metrics(db, calendar_weeks: bool = False):
+    AS = models.ActivitySessions
+    now = datetime.utcnow()
+    week_ago, two_weeks_ago = now - timedelta(days=7), now - timedelta(days=14)
+    if calendar_weeks:
+        # Same queries, bounded like get_engagement_metrics: [today-13, today-6), [today-6, tomorrow)
+        midnight = datetime.combine(now.date(), datetime.min.time())
+        now = midnight + timedelta(days=1)
+        week_ago, two_weeks_ago = midnight - timedelta(days=6), midnight - timedelta(days=13)
+    done = AS.status == "completed"
+
+    out = {
+        "activities_this_week": _legacy_count(db, AS, AS.completed_at, week_ago, now, done),
+        "activities_last_week": _legacy_count(db, AS, AS.completed_at, two_weeks_ago, week_ago, done),
+        "sessions_this_week": _legacy_count(db, models.Sessions, models.Sessions.created_at, week_ago, now),
+        "sessions_last_week": _legacy_count(db, models.Sessions, models.Sessions.created_at, two_weeks_ago, week_ago),
+        "journals_this_week": _legacy_count(db, models.JournalEntries, models.JournalEntries.created_at, week_ago, now),
+        "journals_last_week": _legacy_count(
+            db, models.JournalEntries, models.JournalEntries.created_at, two_weeks_ago, week_ago
+        ),
+    }
+
+    streak, today = 0, date.today()
+    for i in range(365):
+        hit = db.query(AS).filter(
+            AS.user_hash == USER, done, func.date(AS.completed_at) == today - timedelta(days=i)
+        ).first()
+        if hit:
+            streak += 1
+        elif i:
+            break
+    out["streak_days"] = streak
+
+    dates = sorted(
+        date.fromisoformat(str(d)[:10])
+        for (d,) in db.query(func.date(AS.completed_at))
+        .filter(AS.user_hash == USER, done, AS.completed_at.isnot(None))
+        .distinct()
+    )
+    longest = cur = 1 if dates else 0
+    for a, b in zip(dates, dates[1:]):
+        cur = cur + 1 if b - a == timedelta(days=1) else 1
+        longest = max(longest, cur)
+    out["longest_streak"] = longest
+
+    for model in (models.JournalEntries, AS, models.Sessions):
+        db.query(func.max(model.created_at)).filter(model.user_hash == USER).scalar()
+    return out
+
+
+# =============================================================================
+# SEED + MEASURE
+# =============================================================================
+
+
+def seed(db, days: int) -> None:
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    activities, journals, sessions = [], [], []
+    for d in range(days):
+        # Recent 20 days unbroken so the current-streak loop runs long
+        if d > 20 and rng.random() < 0.3:
+            continue
+        day_start = datetime.combine((now - timedelta(days=d)).date(), datetime.min.time())
+        ts = now if d == 0 else day_start + timedelta(minutes=rng.randint(0, 1439))
+        for _ in range(rng.randint(1, 3)):
+            activities.append({
+                "user_hash": USER, "activity_id": 1, "status": "completed",
+                "created_at": ts, "started_at": ts, "completed_at": ts,
+            })
+        if rng.random() < 0.5:
+            journals.append({"user_hash": USER, "entry_type": "journal", "body": "x", "date": ts.date(), "created_at": ts})
+        if rng.random() < 0.3:
+            sessions.append({"id": f"s{d}", "user_hash": USER, "audio_path": "a.mp3", "created_at": ts})
+    db.bulk_insert_mappings(models.ActivitySessions, activities)
+    db.bulk_insert_mappings(models.JournalEntries, journals)
+    db.bulk_insert_mappings(models.Sessions, sessions)
+    rebuild_daily_stats(db, user_hash=USER)
+    db.commit()
+    print(f"Seeded {len(activities)} activities, {len(journals)} journals, {len(sessions)} sessions over {days} days")
+
+
+def measure(fn, runs: int):
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return len(statements), statistics.median(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--days", type=int, default=730)
+    ap.add_argument("--runs", type=int, default=20)
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, args.days)
+        rolling = legacy_engagement_metrics(db)
+        before = legacy_engagement_metrics(db, calendar_weeks=True)
+        after = get_engagement_metrics(db, USER)
+        print(f"before: streak={before['streak_days']} longest={before['longest_streak']} "
+              f"activities={before['activities_this_week']}/{before['activities_last_week']}")
+        print(f"after:  streak={after.streak_days} longest={after.longest_streak} "
+              f"activities={after.activities_this_week}/{after.activities_last_week}")
+        print(f"(before on rolling 7x24h windows: activities={rolling['activities_this_week']}/"
+              f"{rolling['activities_last_week']}; weeks are now UTC calendar days, so these may differ)")
+
+        for label, fn in (
+            ("before", lambda: legacy_engagement_metrics(db)),
+            ("after", lambda: get_engagement_metrics(db, USER)),
+        ):
+            queries, ms = measure(fn, args.runs)
+            print(f"{label:<7} {queries:>4} queries  {ms:8.2f} ms (median of {args.runs})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Journey event ingestion benchmark.
+
+Several threads (standing in for request handlers) post playback events for a
+fixed time, through each write path:
+- per-event: one session, INSERT and COMMIT per event (the old log_event)
+- buffered: event_buffer.log(), coalesced into multi-row inserts; the clock
+  stops after the final flush, so only durable events are counted
+- batch: POST /api/journey/events with --batch events per request
+
+Each SQLite profile runs in its own process (the profile is read when app.db
+is imported) and the result is durable events per second.
+
+    python scripts/bench_journey_events.py [--threads 8] [--seconds 5] [--batch 100]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROFILES = {
+    "legacy": {"REWIRE_SQLITE_PROFILE": "legacy"},
+    "wal": {"REWIRE_SQLITE_PROFILE": "wal"},
+}
+MODES = ("per-event", "buffered", "batch")
+
+
+def _child(mode: str, threads: int, seconds: float, batch: int) -> None:
+    """Child process: run one mode, print a JSON result line."""
+    sys.path.insert(0, str(ROOT))
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.schemas import JourneyEventIn
+    from app.services import event_buffer
+
+    Base.metadata.create_all(bind=engine)
+
+    def make(i: int) -> JourneyEventIn:
+        return JourneyEventIn(
+            session_id=f"s{i % 500}", user_hash=f"u{i % 200}", event_type="progress",
+            t_ms=i * 250, label="tick", payload={"position": i},
+        )
+
+    def per_event(n):
+        while time.monotonic() < stop:
+            x = make(n)
+            q = SessionLocal()
+            try:
+                q.add(models.JourneyEvent(
+                    session_id=x.session_id, user_hash=x.user_hash or "", event_type=x.event_type,
+                    t_ms=x.t_ms, label=x.label or "", payload_json=json.dumps(x.payload),
+                ))
+                q.commit()
+            finally:
+                q.close()
+            n += 1
+
+    def buffered(n):
+        while time.monotonic() < stop:
+            event_buffer.log(make(n))
+            n += 1
+
+    def batched(n):
+        while time.monotonic() < stop:
+            event_buffer.write_rows([event_buffer.to_row(make(n + i)) for i in range(batch)])
+            n += batch
+
+    target = {"per-event": per_event, "buffered": buffered, "batch": batched}[mode]
+    t0 = time.monotonic()
+    stop = t0 + seconds
+    workers = [threading.Thread(target=target, args=(i * 1_000_000,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    event_buffer.stop()
+    elapsed = time.monotonic() - t0
+
+    with engine.connect() as conn:
+        from sqlalchemy import func, select
+        written = conn.execute(select(func.count()).select_from(models.JourneyEvent.__table__)).scalar()
+    print(json.dumps({"events_per_s": written / elapsed, "events": written, **event_buffer.stats()}))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--batch", type=int, default=100, help="events per batch request")
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _child(args.child, args.threads, args.seconds, args.batch)
+        return
+
+    print(f"{args.threads} threads, {args.seconds:g}s per run, batch of {args.batch}")
+    for name, env in PROFILES.items():
+        line = []
+        for mode in MODES:
+            tmpdir = tempfile.mkdtemp(prefix="rewire-events-bench-")
+            child_env = {**os.environ, **env, "DB_URL": f"sqlite:///{tmpdir}/bench.db"}
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--threads", str(args.threads),
+                 "--seconds", str(args.seconds), "--batch", str(args.batch)],
+                env=child_env, capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            line.append(f"{mode} {r['events_per_s']:9.0f}/s")
+        print(f"  {name:<7} " + "   ".join(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Concurrent read/write benchmark for the SQLite engine profiles in app/db.py.
+
+Runs reader and writer threads against a scratch database for a fixed time
+under each profile (each in its own process, since the profile is read when
+app.db is imported) and reports throughput and "database is locked" errors:
+- legacy: rollback journal, synchronous=FULL (SQLite defaults)
+- wal: REWIRE_SQLITE_PROFILE=wal (WAL, synchronous=NORMAL, mmap, cache)
+- wal+queue: wal plus REWIRE_SQLITE_WRITE_QUEUE=1
+
+    python scripts/bench_sqlite_concurrency.py [--readers 8] [--writers 4] [--seconds 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROFILES = {
+    "legacy": {"REWIRE_SQLITE_PROFILE": "legacy", "REWIRE_SQLITE_WRITE_QUEUE": "0"},
+    "wal": {"REWIRE_SQLITE_PROFILE": "wal", "REWIRE_SQLITE_WRITE_QUEUE": "0"},
+    "wal+queue": {"REWIRE_SQLITE_PROFILE": "wal", "REWIRE_SQLITE_WRITE_QUEUE": "1"},
+}
+
+
+def _worker_main(readers: int, writers: int, seconds: float) -> None:
+    """Child process: seed, hammer, print a JSON result line."""
+    sys.path.insert(0, str(ROOT))
+    from sqlalchemy import func
+
+    from app import models
+    from app.db import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.bulk_insert_mappings(models.JournalEntries, [
+        {"user_hash": f"u{i % 200}", "entry_type": "journal", "body": "x" * 200} for i in range(20000)
+    ])
+    db.commit()
+    db.close()
+
+    stop = time.monotonic() + seconds
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        while time.monotonic() < stop:
+            s = SessionLocal()
+            try:
+                s.query(func.count(models.JournalEntries.id)).filter(
+                    models.JournalEntries.user_hash == f"u{n % 200}"
+                ).scalar()
+                bump("reads")
+            except Exception:
+                bump("errors")
+            finally:
+                s.close()
+            n += 1
+
+    def writer(n):
+        while time.monotonic() < stop:
+            s = SessionLocal()
+            try:
+                s.add(models.JournalEntries(user_hash=f"u{n % 200}", entry_type="journal", body="y" * 200))
+                s.commit()
+                bump("writes")
+            except Exception:
+                s.rollback()
+                bump("errors")
+            finally:
+                s.close()
+            n += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(json.dumps({k: v / seconds for k, v in counts.items()}))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _worker_main(args.readers, args.writers, args.seconds)
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    for name, env in PROFILES.items():
+        tmpdir = tempfile.mkdtemp(prefix="rewire-sqlite-bench-")
+        child_env = {**os.environ, **env, "DB_URL": f"sqlite:///{tmpdir}/bench.db"}
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--readers", str(args.readers),
+             "--writers", str(args.writers), "--seconds", str(args.seconds)],
+            env=child_env, capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"  {name:<10} reads/s {r['reads']:9.0f}   writes/s {r['writes']:7.0f}   errors/s {r['errors']:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Build app/ml_models/final_global_mlp_fused.onnx: the sklearn preprocessor
+converted to ONNX operators and merged in front of final_global_mlp.onnx.
+
+With the fused model present, MLPredictor scores with onnxruntime + NumPy
+only (no joblib/sklearn at inference). Offline build step; needs the extra
+packages `skl2onnx` and `onnx`, which the app itself does not require:
+
+    pip install skl2onnx onnx
+    python scripts/build_fused_model.py
+
+Before writing, the fused model is checked against the current
+preprocessor + MLP path on every one of the 40 stimuli for a grid of
+answer vectors. The file is only written if scores agree within --atol and
+rankings match up to ties within that tolerance.
+"""
+import argparse
+import itertools
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.ml_predictor import (
+    FUSED_MODEL_PATH,
+    MLPredictor,
+    ONNX_MODEL_PATH,
+    STIM,
+)
+
+
+def _input_types(preprocessor):
+    """One [None, 1] input per raw column: string for one-hot columns, float otherwise."""
+    from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+
+    categorical = set()
+    for _, pipe, cols in preprocessor.transformers_:
+        steps = getattr(pipe, "named_steps", {})
+        if any(type(s).__name__ == "OneHotEncoder" for s in steps.values()):
+            categorical.update(cols)
+    return [
+        (str(col), StringTensorType([None, 1]) if col in categorical else FloatTensorType([None, 1]))
+        for col in preprocessor.feature_names_in_
+    ]
+
+
+def _convertible(preprocessor):
+    """
+    Copy of the preprocessor that skl2onnx can convert.
+
+    skl2onnx only converts imputers on string columns when missing_values is
+    a string. The app never feeds NaN to the categorical columns (Age is
+    always a float from ag(), Stimulus always a STIM name), so switching the
+    marker from NaN to "" does not change any output; the parity check below
+    confirms it.
+    """
+    import copy
+
+    pre = copy.deepcopy(preprocessor)
+    for _, pipe, _ in pre.transformers_:
+        for step in getattr(pipe, "named_steps", {}).values():
+            if type(step).__name__ == "SimpleImputer" and step.statistics_.dtype == object:
+                step.missing_values = ""
+    return pre
+
+
+def build(preprocessor, mlp_path: str):
+    import onnx
+    from onnx import compose
+    from skl2onnx import convert_sklearn
+
+    mlp = onnx.load(mlp_path)
+    preprocessor = _convertible(preprocessor)
+    opsets = {op.domain: op.version for op in mlp.opset_import}
+    pre = convert_sklearn(
+        preprocessor,
+        initial_types=_input_types(preprocessor),
+        target_opset={"": opsets.get("", 21), "ai.onnx.ml": max(opsets.get("ai.onnx.ml", 1), 3)},
+    )
+    pre.ir_version = mlp.ir_version
+
+    # merge_models needs identical opset imports. The MLP only uses
+    # ai.onnx.ml ArrayFeatureExtractor, unchanged since ml opset 1, so
+    # raising its imports to the preprocessor's versions is safe.
+    merged = {op.domain: op.version for op in pre.opset_import}
+    for op in mlp.opset_import:
+        merged[op.domain] = max(merged.get(op.domain, 0), op.version)
+    for model in (pre, mlp):
+        del model.opset_import[:]
+        model.opset_import.extend(onnx.helper.make_opsetid(d, v) for d, v in merged.items())
+
+    pre_out = pre.graph.output[0].name
+    mlp_in = mlp.graph.input[0].name
+    pre = compose.add_prefix(pre, prefix="pre_", rename_inputs=False, rename_outputs=True)
+    fused = compose.merge_models(pre, mlp, io_map=[("pre_" + pre_out, mlp_in)])
+    onnx.checker.check_model(fused)
+    return fused
+
+
+def _answer_grid():
+    ages = ["18-24", "25-34", "35-44", "45-54", "55-64", "65+", "40", ""]
+    for dpes, n10, n46, n16 in itertools.product(range(1, 8), range(1, 6), (1, 3, 5), (1, 3, 5)):
+        yield {
+            "DPES_1": dpes,
+            "NEO-FFI_10": n10,
+            "NEO-FFI_46": n46,
+            "NEO-FFI_16": n16,
+            "Age": ages[(dpes + n10) % len(ages)],
+        }
+
+
+def check_parity(fused_path: str, atol: float) -> None:
+    reference = MLPredictor(use_fused=False)
+    candidate = MLPredictor(fused_path=fused_path)
+    if not reference.is_initialized or not candidate.is_initialized:
+        raise SystemExit(f"Predictor init failed: {reference.error_message or candidate.error_message}")
+    if not candidate.uses_fused_model:
+        raise SystemExit("Fused model did not load")
+
+    answers = list(_answer_grid())
+    ref = reference.predict_top_k_batch(answers, k=len(STIM))
+    got = candidate.predict_top_k_batch(answers, k=len(STIM))
+
+    # Many chills probabilities saturate near 1.0, where float32 noise can
+    # swap exact ties. A swap is accepted only between stimuli whose
+    # reference scores are within atol of each other.
+    worst = 0.0
+    for a, r, g in zip(answers, ref, got):
+        ref_score = {x["idx"]: x["score"] for x in r}
+        for pos, (x, y) in enumerate(zip(r, g)):
+            worst = max(worst, abs(ref_score[y["idx"]] - y["score"]))
+            if abs(ref_score[y["idx"]] - x["score"]) > atol:
+                raise SystemExit(f"Ranking mismatch at rank {pos + 1} for answers {a}")
+    if worst > atol:
+        raise SystemExit(f"Score mismatch: max abs diff {worst:.3g} > {atol:.3g}")
+    print(f"Parity OK: {len(answers)} answer vectors x {len(STIM)} stimuli, max abs diff {worst:.3g}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fuse the sklearn preprocessor into the chills ONNX model")
+    ap.add_argument("--out", default=FUSED_MODEL_PATH)
+    ap.add_argument("--atol", type=float, default=1e-5)
+    args = ap.parse_args()
+
+    import onnx
+
+    reference = MLPredictor(use_fused=False)
+    if not reference.is_initialized:
+        raise SystemExit(f"Predictor init failed: {reference.error_message}")
+
+    fused = build(reference.preprocessor, ONNX_MODEL_PATH)
+    tmp = Path(args.out).with_suffix(".tmp.onnx")
+    onnx.save(fused, str(tmp))
+    try:
+        check_parity(str(tmp), args.atol)
+    except SystemExit:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(args.out)
+    print(f"Wrote fused model → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
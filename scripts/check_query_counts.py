@@ -0,0 +1,134 @@
+"""
+Query-count regression check for the therapist caseload endpoints.
+
+Seeds a throwaway SQLite database with one therapist and a small and a
+large caseload, calls each endpoint for both, and fails if the number of SQL
+statements grows with the number of patients. Run after touching
+caseload_metrics or the therapist routes:
+
+    python scripts/check_query_counts.py [--small 3] [--large 40]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Point the app at a scratch database before app.db is imported
+_tmpdir = tempfile.mkdtemp(prefix="rewire-qc-")
+os.environ["DB_URL"] = f"sqlite:///{_tmpdir}/qc.db"
+# Measure the compute path, not the snapshot cache
+os.environ["REWIRE_DASHBOARD_CACHE"] = "off"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event
+
+from app import models
+from app.db import Base, SessionLocal, engine
+from app.services import engagement_rollup
+from app.routes import therapist_dashboard, therapist_patients
+
+
+# Endpoint name -> callable(db, therapist); each must stay O(1) in queries
+ENDPOINTS = {
+    # The dashboard handlers are async wrappers around these (run_sync)
+    "dashboard.stats": lambda db, t: therapist_dashboard._compute_dashboard_stats(db, t),
+    "dashboard.attention": lambda db, t: therapist_dashboard._compute_attention_needed(db, t),
+    "patients.list": lambda db, t: therapist_patients.list_patients(
+        status_filter=None, sort="linked_at", order="desc", limit=None, cursor=None, current_therapist=t, db=db
+    ),
+    "patients.list?sort=last_active&limit=2": lambda db, t: therapist_patients.list_patients(
+        status_filter=None, sort="last_active", order="desc", limit=2, cursor=None, current_therapist=t, db=db
+    ),
+}
+
+
+def _seed(db, n_patients: int) -> models.Therapists:
+    tag = f"n{n_patients}"
+    therapist = models.Therapists(
+        therapist_hash=f"t-{tag}", email=f"t-{tag}@example.com", password_hash="x", name="T"
+    )
+    db.add(therapist)
+    db.flush()
+
+    social = models.Activities(title="Call a friend", description="d", life_area="Social")
+    other = models.Activities(title="Walk", description="d", life_area="Health")
+    db.add_all([social, other])
+    db.flush()
+
+    now = datetime.utcnow()
+    for i in range(n_patients):
+        user_hash = f"{tag}-u{i}"
+        user = models.Users(user_hash=user_hash, email=f"{user_hash}@example.com", provider="email")
+        db.add(user)
+        db.flush()
+        db.add(models.TherapistPatients(therapist_id=therapist.id, patient_user_id=user.id, status="active"))
+
+        # Vary the profile so every attention branch is exercised
+        for d in range(i % 9):
+            db.add(models.ActivitySessions(
+                user_hash=user_hash,
+                activity_id=(social if d == 0 and i % 2 else other).id,
+                status="completed",
+                created_at=now - timedelta(days=d),
+                completed_at=now - timedelta(days=d),
+            ))
+        if i % 3 == 0:
+            db.add(models.JournalEntries(user_hash=user_hash, entry_type="journal", body="b" * 30, date=now.date()))
+        if i % 4 == 0:
+            intake = models.ClinicalIntake(user_hash=user_hash)
+            db.add(intake)
+            db.flush()
+            for q in range(1, 10):
+                db.add(models.Phq9ItemResponse(intake_id=intake.id, user_hash=user_hash, question_number=q, score=2))
+    db.commit()
+    return therapist
+
+
+def _count_queries(fn) -> int:
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+    return len(statements)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--small", type=int, default=3)
+    ap.add_argument("--large", type=int, default=40)
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    engagement_rollup.install(SessionLocal)
+
+    db = SessionLocal()
+    try:
+        therapists = {n: _seed(db, n) for n in (args.small, args.large)}
+        failed = False
+        for name, call in ENDPOINTS.items():
+            counts = {}
+            for n, therapist in therapists.items():
+                db.expire_all()
+                counts[n] = _count_queries(lambda: call(db, therapist))
+            ok = counts[args.small] == counts[args.large]
+            failed |= not ok
+            print(f"{'OK  ' if ok else 'FAIL'} {name}: {counts[args.small]} queries @ {args.small} patients, "
+                  f"{counts[args.large]} @ {args.large}")
+    finally:
+        db.close()
+
+    if failed:
+        raise SystemExit("Query count grows with caseload size")
+
+
+if __name__ == "__main__":
+    main()
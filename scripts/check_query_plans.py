@@ -0,0 +1,209 @@
+"""
+Query-plan regression check for the per-user hot queries.
+
+Builds a throwaway SQLite database from the models, calls the route and
+service functions that issue each hot query, captures the SQL they send
+(before_cursor_execute, as check_query_counts.py does) and runs EXPLAIN
+QUERY PLAN on it with the real bound parameters. Fails if a query is no
+longer issued, degrades to a full table scan or stops using the index it was
+given. Run after touching app/models.py indexes or these queries:
+
+    python scripts/check_query_plans.py [--rows 2000] [--verbose]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Point the app at a scratch database before app.db is imported
+_tmpdir = tempfile.mkdtemp(prefix="rewire-qp-")
+os.environ["DB_URL"] = f"sqlite:///{_tmpdir}/qp.db"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event
+
+from app import models
+from app.db import SessionLocal, engine
+from app.migrations import migrate
+from app.routes import chills, feedback, journal, journey, therapist_dashboard
+from app.services import narrative, push, therapist_summary
+
+
+AS = models.ActivitySessions
+S = models.Sessions
+J = models.JournalEntries
+P = models.PreGeneratedAudio
+PS = models.PushSubscription
+C = models.ChillsTimestamp
+
+_NOW = datetime.utcnow().replace(microsecond=0)
+
+# name -> (callable(db, ctx), SQL fragments that pick out the hot statement,
+#          index the plan must use)
+QUERIES = {
+    "activity heatmap (therapist_dashboard)": (
+        lambda db, ctx: therapist_dashboard._activity_heatmap(db, ctx["therapist"], ctx["patient_id"], 30),
+        ["FROM activity_sessions", "activity_sessions.completed_at <"],
+        "ix_activity_sessions_user_hash_status_completed_at",
+    ),
+    "activities since last session (therapist_summary)": (
+        lambda db, ctx: therapist_summary.generate_session_prep_notes(
+            db, "u1", "Pat Doe", (_NOW - timedelta(days=7)).date()
+        ),
+        ["count(activity_sessions.id) AS count_1 \nFROM activity_sessions \nWHERE", "activity_sessions.completed_at >="],
+        "ix_activity_sessions_user_hash_status_completed_at",
+    ),
+    "latest audio session (narrative)": (
+        lambda db, ctx: narrative.compute_journey_state(db, "u1"),
+        ["FROM sessions", "ORDER BY sessions.created_at DESC"],
+        "ix_sessions_user_hash_created_at",
+    ),
+    "journal today and upcoming (journal)": (
+        lambda db, ctx: journal._journal_timeline(db, "u1", 50),
+        ["FROM journal_entries", "journal_entries.date >="],
+        "ix_journal_entries_user_hash_date",
+    ),
+    "journal timeline page (journal)": (
+        lambda db, ctx: journal._journal_timeline(db, "u1", 50, ((_NOW - timedelta(days=10)).date(), 500)),
+        ["FROM journal_entries", "journal_entries.id <"],
+        "ix_journal_entries_user_hash_date",
+    ),
+    "journal incremental sync (journal)": (
+        lambda db, ctx: journal._journal_timeline(db, "u1", 50, None, _NOW - timedelta(hours=1)),
+        ["FROM journal_entries", "journal_entries.updated_at >="],
+        "ix_journal_entries_user_hash_updated_at",
+    ),
+    # Day 30 has no exact match, so both the exact and the fallback lookup run
+    "pre-generated audio, exact day (journey)": (
+        lambda db, ctx: journey._check_pre_generated_audio(db, "u1", 30),
+        ["FROM pre_generated_audio", "pre_generated_audio.for_journey_day ="],
+        "ix_pre_generated_audio_user_hash_day_status",
+    ),
+    "pre-generated audio, fallback (journey)": (
+        lambda db, ctx: journey._check_pre_generated_audio(db, "u1", 30),
+        ["FROM pre_generated_audio", "pre_generated_audio.for_journey_day <"],
+        "ix_pre_generated_audio_user_hash_day_status",
+    ),
+    # The seeded day-4 row is found, so no generation is started
+    "pre-generated audio, existing (feedback)": (
+        lambda db, ctx: feedback._trigger_pre_generation("u1", 3, None, None, None, "a1"),
+        ["FROM pre_generated_audio", "pre_generated_audio.status IN"],
+        "ix_pre_generated_audio_user_hash_day_status",
+    ),
+    "active push subscriptions (push)": (
+        lambda db, ctx: push.get_user_subscriptions(db, "u1"),
+        ["FROM push_subscriptions", "push_subscriptions.is_active"],
+        "ix_push_subscriptions_user_hash_is_active",
+    ),
+    "chills for a session (chills)": (
+        lambda db, ctx: chills.get_chills_timestamps("s1", q=db),
+        ["FROM chills_timestamps", "chills_timestamps.session_id ="],
+        "ix_chills_timestamps_session_id",
+    ),
+}
+
+
+def _seed(db, n: int) -> dict:
+    users = [f"u{i}" for i in range(max(n // 20, 2))]
+    therapist = models.Therapists(therapist_hash="t0", email="t0@example.com", password_hash="x", name="T")
+    patient = models.Users(user_hash="u1", email="u1@example.com", provider="email")
+    db.add_all([therapist, patient])
+    db.flush()
+    db.add(models.TherapistPatients(therapist_id=therapist.id, patient_user_id=patient.id, status="active"))
+    for i, user_hash in enumerate(users):
+        db.add(models.VideoSession(session_id=f"s{i}", user_hash=user_hash, video_id=1))
+    db.add(P(user_hash="u1", for_journey_day=4, audio_path="x.mp3", status="ready"))
+    for i in range(n):
+        user_hash = users[i % len(users)]
+        ts = _NOW - timedelta(hours=i)
+        db.add(S(id=f"a{i}", user_hash=user_hash, audio_path="x.mp3", created_at=ts))
+        db.add(AS(user_hash=user_hash, activity_id=1, status="completed" if i % 3 else "planned",
+                  created_at=ts, completed_at=ts if i % 3 else None))
+        db.add(J(user_hash=user_hash, entry_type="journal", body="b", date=ts.date(), updated_at=ts))
+        db.add(P(user_hash=user_hash, for_journey_day=i % 14, audio_path="x.mp3",
+                 status="ready" if i % 2 else "used"))
+        db.add(PS(user_hash=user_hash, endpoint=f"e{i}", p256dh_key="k", auth_key="a", is_active=bool(i % 2)))
+        db.add(C(session_id=f"s{i % len(users)}", user_hash=user_hash, video_time_seconds=float(i), created_at=ts))
+    db.commit()
+    return {"therapist": therapist, "patient_id": patient.id}
+
+
+def _capture(fn) -> list:
+    """(statement, parameters) for every SQL statement fn() sends."""
+    captured = []
+
+    def capture(conn_, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return captured
+
+
+def _plan(conn, statement, parameters):
+    return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()]
+
+
+def _problem(plan, index: str):
+    for detail in plan:
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            return f"full table scan: {detail}"
+    if not any(index in detail for detail in plan):
+        return f"does not use {index}"
+    return None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Fail if a hot query degrades to a table scan")
+    ap.add_argument("--rows", type=int, default=2000, help="rows seeded per table")
+    ap.add_argument("--verbose", action="store_true", help="print every plan")
+    args = ap.parse_args()
+
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        ctx = _seed(db, args.rows)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+
+        failures = 0
+        with engine.connect() as conn:
+            for name, (call, fragments, index) in QUERIES.items():
+                db.expire_all()
+                issued = [
+                    (statement, parameters)
+                    for statement, parameters in _capture(lambda: call(db, ctx))
+                    if all(f in statement for f in fragments)
+                ]
+                db.rollback()
+                if not issued:
+                    print(f"FAIL {name}: query not issued")
+                    failures += 1
+                    continue
+                problem = None
+                for statement, parameters in issued:
+                    plan = _plan(conn, statement, parameters)
+                    problem = _problem(plan, index)
+                    if problem:
+                        break
+                print(f"{'FAIL' if problem else 'ok  '} {name}" + (f": {problem}" if problem else ""))
+                if problem or args.verbose:
+                    for detail in plan:
+                        print(f"       {detail}")
+                failures += bool(problem)
+    finally:
+        db.close()
+
+    print(f"{len(QUERIES) - failures}/{len(QUERIES)} queries use their index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
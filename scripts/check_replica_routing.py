@@ -0,0 +1,137 @@
+"""
+Check read-replica routing with two SQLite files standing in for the
+primary and the replica.
+
+Creates both schemas, puts a marker user only on each side, then verifies:
+- SessionLocal() reads and writes the primary
+- read_session() reads the replica
+- writes through read_session() land on the primary, and the session reads
+  the primary from then on (it sees its own writes)
+- the same for AsyncSessionLocal() / async_read_session()
+- ORM UNION reads (platform_counters.read_stats) stay on the replica
+- admin write endpoints (user delete, /stats?fresh=1) read and write the
+  primary, even for rows the replica does not have yet
+
+    python scripts/check_replica_routing.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_tmpdir = tempfile.mkdtemp(prefix="rewire-replica-")
+os.environ["DB_URL"] = f"sqlite:///{_tmpdir}/primary.db"
+os.environ["DB_REPLICA_URL"] = f"sqlite:///{_tmpdir}/replica.db"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import platform_counters
+from app.db import (
+    AsyncSessionLocal,
+    Base,
+    SessionLocal,
+    async_engine,
+    async_read_session,
+    async_replica_engine,
+    engine,
+    read_session,
+    replica_engine,
+)
+
+
+def _hashes(db) -> set:
+    return {h for (h,) in db.query(models.Users.user_hash).all()}
+
+
+def _check(label: str, ok: bool) -> bool:
+    print(f"{'OK  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+async def _check_async() -> list:
+    results = []
+    async with AsyncSessionLocal() as db:
+        hashes = await db.run_sync(_hashes)
+        results.append(_check("AsyncSessionLocal reads the primary", "on-replica" not in hashes))
+
+    async with async_read_session() as db:
+        hashes = await db.run_sync(_hashes)
+        results.append(_check("async_read_session reads the replica", hashes == {"on-replica"}))
+        await db.run_sync(platform_counters.read_stats)
+        results.append(_check("async_read_session keeps UNION reads on the replica", not db.sync_session.info.get("wrote")))
+        db.add(models.Users(user_hash="written-async", email="wa@example.com", provider="email"))
+        await db.commit()
+        hashes = await db.run_sync(_hashes)
+        results.append(_check("async_read_session reads its own writes after writing", "written-async" in hashes))
+    # Pooled aiosqlite connections each hold a thread; close them before exit
+    await async_engine.dispose()
+    await async_replica_engine.dispose()
+    return results
+
+
+def _check_admin_writes() -> list:
+    os.environ.setdefault("REWIRE_ML_WARMUP", "0")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    results = []
+    # A user only the primary has: the replica is "lagging"
+    with Session(bind=engine) as s:
+        user_id = s.query(models.Users.id).filter(models.Users.user_hash == "written").scalar()
+    resp = client.delete(f"/api/admin/users/{user_id}")
+    results.append(_check("admin user delete finds a user only the primary has", resp.status_code == 200))
+
+    resp = client.get("/api/admin/stats?fresh=1")
+    with Session(bind=engine) as s:
+        active = s.query(models.Users).filter(models.Users.deleted_at.is_(None)).count()
+    results.append(_check(
+        "/stats?fresh=1 recounts the primary", resp.status_code == 200 and resp.json()["total_users"] == active
+    ))
+    return results
+
+
+def main() -> None:
+    for eng, marker in ((engine, "on-primary"), (replica_engine, "on-replica")):
+        Base.metadata.create_all(bind=eng)
+        with Session(bind=eng) as s:
+            s.add(models.Users(user_hash=marker, email=f"{marker}@example.com", provider="email"))
+            s.commit()
+
+    results = []
+    with SessionLocal() as db:
+        results.append(_check("SessionLocal reads the primary", _hashes(db) == {"on-primary"}))
+
+    with read_session() as db:
+        results.append(_check("read_session reads the replica", _hashes(db) == {"on-replica"}))
+        platform_counters.read_stats(db)
+        results.append(_check("read_session keeps UNION reads on the replica", not db.info.get("wrote")))
+        db.add(models.Users(user_hash="written", email="w@example.com", provider="email"))
+        db.commit()
+        results.append(_check(
+            "read_session reads its own writes after writing", _hashes(db) == {"on-primary", "written"}
+        ))
+
+    results.extend(asyncio.run(_check_async()))
+
+    results.extend(_check_admin_writes())
+
+    with Session(bind=engine) as s:
+        results.append(_check("writes landed on the primary", {"written", "written-async"} <= _hashes(s)))
+    with Session(bind=replica_engine) as s:
+        results.append(_check("replica untouched by the write", _hashes(s) == {"on-replica"}))
+        results.append(_check(
+            "replica counters untouched by /stats?fresh=1", not s.query(models.PlatformCounter).count()
+        ))
+
+    if not all(results):
+        raise SystemExit("Replica routing check failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Export research tables as month-partitioned Parquet / Arrow IPC datasets.
+
+Writes <out>/<table>/month=YYYY-MM/part-0.<ext> for each table, streaming
+rows from the database in batches. Load a table with
+pandas.read_parquet("<out>/chills") or pyarrow.dataset.dataset(...).
+
+    python scripts/export_research_dataset.py --out exports/ [--tables chills,body_map]
+        [--format parquet|arrow] [--since 2024-01-01] [--until 2024-06-30]
+        [--batch-size 10000] [--compare-csv]
+
+--compare-csv also writes each table as a single CSV (the admin export
+format) and prints file size and pandas load time for both.
+"""
+import argparse
+import csv
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import SessionLocal
+from app.services import research_export
+
+
+def _write_csv(db, name: str, path: Path, since, until) -> None:
+    table = research_export.TABLES[name]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(table.columns)
+        for _, rows in research_export.iter_month_rows(db, table, since, until):
+            writer.writerows(
+                [v.isoformat() if hasattr(v, "isoformat") else v for v in row] for row in rows
+            )
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _load_seconds(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def _compare(name: str, dataset: Path, csv_path: Path, fmt: str) -> None:
+    import pandas as pd
+    import pyarrow.dataset as ds
+
+    if not dataset.exists():
+        print(f"  {name:<22} no rows")
+        return
+    if fmt == "parquet":
+        columnar_load = _load_seconds(lambda: pd.read_parquet(dataset))
+    else:
+        columnar_load = _load_seconds(
+            lambda: ds.dataset(dataset, format="arrow", partitioning="hive").to_table().to_pandas()
+        )
+    csv_load = _load_seconds(lambda: pd.read_csv(csv_path))
+    print(f"  {name:<22} csv {_dir_size(csv_path.parent) / 1e6:8.2f} MB load {csv_load:6.2f}s | "
+          f"{fmt} {_dir_size(dataset) / 1e6:8.2f} MB load {columnar_load:6.2f}s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--out", required=True, help="output directory")
+    ap.add_argument("--tables", default=",".join(research_export.TABLES),
+                    help=f"comma-separated subset of: {', '.join(research_export.TABLES)}")
+    ap.add_argument("--format", choices=research_export.FORMATS, default="parquet")
+    ap.add_argument("--since", type=date.fromisoformat, default=None, help="YYYY-MM-DD, inclusive")
+    ap.add_argument("--until", type=date.fromisoformat, default=None, help="YYYY-MM-DD, inclusive")
+    ap.add_argument("--batch-size", type=int, default=research_export.BATCH_SIZE)
+    ap.add_argument("--compare-csv", action="store_true", help="also write CSV and compare size / load time")
+    args = ap.parse_args()
+
+    names = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = [t for t in names if t not in research_export.TABLES]
+    if unknown:
+        raise SystemExit(f"Unknown tables: {', '.join(unknown)}")
+
+    out = Path(args.out)
+    db = SessionLocal()
+    try:
+        for name in names:
+            t0 = time.perf_counter()
+            files = research_export.export_table(
+                db, name, out, fmt=args.format, start=args.since, end=args.until, batch_size=args.batch_size
+            )
+            print(f"{name}: {sum(files.values())} rows, {len(files)} month partitions "
+                  f"in {time.perf_counter() - t0:.2f}s")
+
+        if args.compare_csv:
+            print("Size and pandas load time, CSV vs columnar:")
+            for name in names:
+                csv_path = out / "_csv" / name / f"{name}.csv"
+                csv_path.parent.mkdir(parents=True, exist_ok=True)
+                _write_csv(db, name, csv_path, args.since, args.until)
+                _compare(name, out / name, csv_path, args.format)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
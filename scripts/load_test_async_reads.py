@@ -0,0 +1,192 @@
+"""
+Load test for the async read endpoints.
+
+Seeds a throwaway SQLite database, starts the app under uvicorn and drives the
+journal timeline with many concurrent clients, once through the async handler
+(/api/journey/journal/timeline) and once through a sync twin that runs the
+same code in a `def` handler (mounted only by this script). While each load
+runs it samples:
+
+- threadpool tokens in use (FastAPI runs `def` handlers and sync dependencies
+  on a 40-thread pool)
+- latency of /api/health, a sync endpoint that needs a free pool thread
+
+With the sync twin the pool saturates and unrelated sync endpoints queue
+behind it; the async handler keeps the pool free regardless of concurrency.
+
+    python scripts/load_test_async_reads.py [--concurrency 50,200,500] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+N_USERS = 200
+
+
+def _serve(port: int) -> None:
+    """Child process: the app plus the sync twin and a threadpool probe."""
+    import anyio.to_thread
+    import uvicorn
+    from fastapi import Depends, Query
+    from sqlalchemy.orm import Session
+
+    from app.main import app
+    from app.routes import journal
+
+    @app.get("/_loadtest/sync/timeline")
+    def sync_timeline(user_hash: str = Query(...), q: Session = Depends(journal.db)):
+        return journal._journal_timeline(q, user_hash)
+
+    @app.get("/_loadtest/threads")
+    async def threads():
+        return {"borrowed": anyio.to_thread.current_default_thread_limiter().borrowed_tokens}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", timeout_keep_alive=120)
+
+
+def _seed(db_url: str) -> None:
+    os.environ["DB_URL"] = db_url
+    from app import models
+    from app.db import SessionLocal, engine
+    from app.migrations import migrate
+
+    migrate(engine)
+    db = SessionLocal()
+    now = datetime.utcnow()
+    for i in range(N_USERS):
+        user_hash = f"u{i}"
+        for d in range(30):
+            db.add(models.JournalEntries(
+                user_hash=user_hash, entry_type="journal", body="entry " * 20, date=date.today() - timedelta(days=d)
+            ))
+            if d % 2 == 0:
+                db.add(models.ActivitySessions(
+                    user_hash=user_hash, activity_id=1, status="completed", completed_at=now - timedelta(days=d)
+                ))
+    db.commit()
+    db.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(values, p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+async def _run_load(client, path: str, concurrency: int, seconds: float) -> dict:
+    import httpx
+
+    latencies, probe, borrowed, errors = [], [], [], 0
+    stop = time.perf_counter() + seconds
+
+    async def worker(n: int):
+        nonlocal errors
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            try:
+                resp = await client.get(path, params={"user_hash": f"u{n % N_USERS}"})
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if resp.status_code == 200:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+
+    async def prober():
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            await client.get("/api/health")
+            probe.append(time.perf_counter() - t0)
+            borrowed.append((await client.get("/_loadtest/threads")).json()["borrowed"])
+            await asyncio.sleep(0.05)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(prober(), *[worker(n) for n in range(concurrency)])
+    elapsed = time.perf_counter() - t0
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": _pct(latencies, 0.50),
+        "p99": _pct(latencies, 0.99),
+        "errors": errors,
+        "health_p50": _pct(probe, 0.50),
+        "health_p99": _pct(probe, 0.99),
+        "threads_peak": max(borrowed, default=0),
+    }
+
+
+async def _main_async(base_url: str, levels, seconds: float) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(levels) + 10, max_keepalive_connections=max(levels) + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        print(f"{'handler':<7} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'err':>4} "
+              f"{'health p50':>11} {'health p99':>11} {'pool threads':>13}")
+        for concurrency in levels:
+            for label, path in (("sync", "/_loadtest/sync/timeline"), ("async", "/api/journey/journal/timeline")):
+                r = await _run_load(client, path, concurrency, seconds)
+                print(f"{label:<7} {concurrency:>5} {r['rps']:>8.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} "
+                      f"{r['errors']:>4} {r['health_p50']:>9.1f}ms {r['health_p99']:>9.1f}ms "
+                      f"{r['threads_peak']:>10}/40")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Concurrent-request load test, sync vs async handlers")
+    ap.add_argument("--concurrency", default="50,200,500", help="comma-separated client counts")
+    ap.add_argument("--seconds", type=float, default=5.0, help="duration of each run")
+    ap.add_argument("--serve", type=int, default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        _serve(args.serve)
+        return
+
+    tmpdir = tempfile.mkdtemp(prefix="rewire-load-")
+    db_url = f"sqlite:///{tmpdir}/load.db"
+    _seed(db_url)
+
+    port = _free_port()
+    env = {**os.environ, "DB_URL": db_url, "REWIRE_ML_WARMUP": "0", "PYTHONPATH": str(ROOT)}
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        import httpx
+
+        base_url = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                if httpx.get(f"{base_url}/api/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        else:
+            raise SystemExit("server did not start")
+        levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+        asyncio.run(_main_async(base_url, levels, args.seconds))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
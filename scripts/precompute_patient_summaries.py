@@ -0,0 +1,108 @@
+"""
+Precompute materialized patient summaries and session prep notes.
+
+Selects active patients with a therapist session coming up (or every active
+patient with --all, for the nightly run) and materializes
+therapist_summary.get_patient_summary + get_session_prep_notes for each, in
+parallel worker processes. Patients whose stored snapshots are still current
+are skipped unless --force is given.
+
+    python scripts/precompute_patient_summaries.py [--therapist-id 3] [--days 2] [--workers 4]
+    python scripts/precompute_patient_summaries.py --all          # nightly
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import models
+from app.db import SessionLocal, engine
+
+
+def _select_patients(therapist_id, days, include_all):
+    db = SessionLocal()
+    try:
+        q = (
+            db.query(models.Users.user_hash, models.Users.name, models.TherapistPatients.last_session_date)
+            .join(models.TherapistPatients, models.TherapistPatients.patient_user_id == models.Users.id)
+            .filter(models.TherapistPatients.status == "active")
+        )
+        if therapist_id is not None:
+            q = q.filter(models.TherapistPatients.therapist_id == therapist_id)
+        if not include_all:
+            today = datetime.utcnow().date()
+            q = q.filter(
+                models.TherapistPatients.next_session_date >= today,
+                models.TherapistPatients.next_session_date <= today + timedelta(days=days),
+            )
+        # A patient linked to several therapists is computed once
+        seen = {}
+        for user_hash, name, last_session in q.all():
+            if user_hash and user_hash not in seen:
+                seen[user_hash] = (user_hash, name, last_session)
+        return list(seen.values())
+    finally:
+        db.close()
+
+
+def _init_worker():
+    # Never reuse pooled connections inherited from the parent process
+    engine.dispose(close=False)
+
+
+def _work(chunk, force):
+    """Worker process: own DB session, one patient at a time."""
+    from app.services.therapist_summary import precompute_patient
+
+    done, failed = 0, []
+    db = SessionLocal()
+    try:
+        for user_hash, name, last_session in chunk:
+            try:
+                precompute_patient(db, user_hash, name, last_session, force=force)
+                done += 1
+            except Exception as e:
+                db.rollback()
+                failed.append(f"{user_hash}: {e}")
+    finally:
+        db.close()
+    return done, failed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--therapist-id", type=int, default=None, help="only this therapist's patients")
+    ap.add_argument("--days", type=int, default=2, help="sessions within the next N days")
+    ap.add_argument("--all", action="store_true", help="every active patient (nightly run)")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--force", action="store_true", help="regenerate even if snapshots are current")
+    args = ap.parse_args()
+
+    patients = _select_patients(args.therapist_id, args.days, args.all)
+    print(f"Precomputing summaries for {len(patients)} patients with {args.workers} workers")
+    if not patients:
+        return
+
+    t0 = time.perf_counter()
+    workers = max(1, min(args.workers, len(patients)))
+    chunks = [patients[i::workers] for i in range(workers)]
+    done, failed = 0, []
+    # The parent's pooled connection must not be shared with forked workers
+    engine.dispose()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for fut in as_completed([pool.submit(_work, chunk, args.force) for chunk in chunks]):
+            n, errs = fut.result()
+            done += n
+            failed.extend(errs)
+
+    print(f"Materialized {done} patients in {time.perf_counter() - t0:.2f}s")
+    for line in failed:
+        print(f"  failed {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Re-score every stored ML questionnaire and rewrite StimuliSuggestion rows.
+
+Used after a model upgrade or for backfills. Answers are scored with
+MLPredictor.predict_top_k_batch (one ONNX call per micro-batch of users) and
+suggestions are replaced in bulk, one transaction per chunk of users.
+
+    python scripts/rescore_stimuli_suggestions.py [--k 10] [--batch-size 256] [--chunk 500] [--dry-run]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import models
+from app.db import SessionLocal
+from app.services.ml_predictor import DEFAULT_BATCH_USERS, answers_from_response, get_predictor
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--k", type=int, default=10, help="suggestions stored per user (intake stores 10)")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_USERS, help="users per ONNX call")
+    ap.add_argument("--chunk", type=int, default=500, help="users per DB transaction")
+    ap.add_argument("--dry-run", action="store_true", help="score but do not write suggestions")
+    args = ap.parse_args()
+
+    predictor = get_predictor()
+    if not predictor.is_initialized:
+        raise SystemExit(f"ML predictor not initialized: {predictor.error_message}")
+
+    db = SessionLocal()
+    try:
+        # Latest questionnaire per user (intake keeps one row per user, but be safe)
+        latest = {}
+        for q in db.query(models.MLQuestionnaireResponse).order_by(models.MLQuestionnaireResponse.id.asc()):
+            latest[q.user_hash] = q
+        responses = list(latest.values())
+        print(f"Re-scoring {len(responses)} questionnaire responses (k={args.k}, batch={args.batch_size})")
+
+        t0 = time.perf_counter()
+        written = 0
+        for start in range(0, len(responses), args.chunk):
+            chunk = responses[start:start + args.chunk]
+            ranked = predictor.predict_top_k_batch(
+                [answers_from_response(q) for q in chunk],
+                k=args.k,
+                batch_size=args.batch_size,
+            )
+            if args.dry_run:
+                continue
+
+            user_hashes = [q.user_hash for q in chunk]
+            db.query(models.StimuliSuggestion).filter(
+                models.StimuliSuggestion.user_hash.in_(user_hashes)
+            ).delete(synchronize_session=False)
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "user_hash": q.user_hash,
+                    "questionnaire_id": q.id,
+                    "stimulus_rank": pred["rank"],
+                    "stimulus_name": pred["stimulus_name"],
+                    "stimulus_url": pred["stimulus_url"],
+                    "stimulus_description": pred.get("stimulus_description", ""),
+                    "score": pred["score"],
+                    "created_at": now,
+                }
+                for q, preds in zip(chunk, ranked)
+                for pred in preds
+            ]
+            if rows:
+                db.bulk_insert_mappings(models.StimuliSuggestion, rows)
+            db.commit()
+            written += len(rows)
+            print(f"  {min(start + args.chunk, len(responses))}/{len(responses)} users done")
+
+        elapsed = time.perf_counter() - t0
+        print(f"Wrote {written} suggestions in {elapsed:.2f}s" + (" (dry run)" if args.dry_run else ""))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()